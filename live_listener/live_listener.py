@@ -2,14 +2,22 @@
 """
 خدمة المستمع الحي لقنوات التيليجرام
 تقوم بالاستماع إلى القنوات الثلاث وإرسال الرسائل الجديدة إلى webhook في n8n
+
+الاستخدام:
+    python live_listener.py
+    python live_listener.py backfill [--since 2025-01-01T08:00] [--until ...] [--min-id kol_track=123] [--limit N] [--notify]
 """
 
+import argparse
 import asyncio
 import aiohttp
 import json
 import logging
 import os
-from datetime import datetime
+import re
+import time
+from datetime import datetime, timezone
+from urllib.parse import urljoin
 from telethon import TelegramClient, events
 from telethon.tl.types import PeerChannel
 
@@ -19,8 +27,168 @@ logging.basicConfig(
     format='%(asctime)s - [%(levelname)s] - %(message)s'
 )
 
-class SmartFalconListener:
+class ListenerMetrics:
+    """
+    عدادات المستمع ومدرجات زمن المراحل بصيغة Prometheus النصية
+    (مطابقة لمقاييس الخادم في /metrics، وتُعرض على LISTENER_METRICS_PORT إن حُدد)
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
     def __init__(self):
+        self.enabled = os.getenv('METRICS_ENABLED', '1') == '1'
+        # (signal_type, outcome) -> عدد
+        self.messages = {}
+        # (stage, result) -> [عدادات الحدود، المجموع، العدد]
+        self.durations = {}
+    
+    def count(self, signal_type, outcome):
+        if self.enabled:
+            key = (signal_type, outcome)
+            self.messages[key] = self.messages.get(key, 0) + 1
+    
+    def observe(self, stage, result, seconds):
+        if not self.enabled:
+            return
+        entry = self.durations.setdefault((stage, result), [[0] * (len(self.BUCKETS) + 1), 0.0, 0])
+        index = next((i for i, bound in enumerate(self.BUCKETS) if seconds <= bound), len(self.BUCKETS))
+        entry[0][index] += 1
+        entry[1] += seconds
+        entry[2] += 1
+    
+    def render(self):
+        lines = [
+            '# HELP smart_falcon_listener_messages_total Telegram messages seen by the listener by outcome',
+            '# TYPE smart_falcon_listener_messages_total counter'
+        ]
+        for (signal_type, outcome), value in sorted(self.messages.items()):
+            lines.append(f'smart_falcon_listener_messages_total{{signal_type="{signal_type}",outcome="{outcome}"}} {value}')
+        
+        lines += [
+            '# HELP smart_falcon_listener_stage_duration_seconds Duration of listener stages',
+            '# TYPE smart_falcon_listener_stage_duration_seconds histogram'
+        ]
+        for (stage, result), (counts, total, count) in sorted(self.durations.items()):
+            labels = f'stage="{stage}",result="{result}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.BUCKETS + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'smart_falcon_listener_stage_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'smart_falcon_listener_stage_duration_seconds_sum{{{labels}}} {total}')
+            lines.append(f'smart_falcon_listener_stage_duration_seconds_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+    
+    async def serve(self, port):
+        """
+        خادم HTTP صغير لمسار /metrics داخل حلقة المستمع نفسها
+        """
+        from aiohttp import web
+        
+        async def handle(request):
+            return web.Response(text=self.render(), content_type='text/plain', charset='utf-8')
+        
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '0.0.0.0', port).start()
+        logging.info(f"📈 مقاييس المستمع متاحة على المنفذ {port}/metrics")
+
+# نفس أنماط استخلاص العقد في محرك التحليل بالخادم (SmartFalconAnalyzer)
+CONTRACT_PATTERN = r'([A-HJ-NP-Za-km-z1-9]{32,44})'
+KOL_TRACK_CONTRACT_PATTERN = r'solana\s*`?([A-HJ-NP-Za-km-z1-9]{32,44})`?'
+PHANES_CONTRACT_PATTERN = r'[├└]\s*`?([A-HJ-NP-Za-km-z1-9]{32,44})`?'
+
+def extract_contract_address(message_text, signal_type):
+    """
+    عنوان العقد من نص رسالة KOL Track أو Phanes، أو None
+    """
+    if signal_type == 'kol_track':
+        match = re.search(KOL_TRACK_CONTRACT_PATTERN, message_text, re.IGNORECASE)
+    else:
+        match = re.search(PHANES_CONTRACT_PATTERN, message_text, re.MULTILINE)
+    match = match or re.search(CONTRACT_PATTERN, message_text)
+    return match.group(1) if match else None
+
+class ContractFilter:
+    """
+    عناوين عقود الإشارات المفتوحة لإسقاط تحديثات Phanes غير المتعلقة بها قبل إرسالها
+    تُزامن دورياً من /api/signals/open-contracts (مع ETag فيرد 304 دون تغيير)، وتُضاف إليها فوراً
+    عناوين رسائل KOL Track المرسلة حتى لا تُسقط تحديثات إشارة لم تصل بعد في المزامنة
+    قبل أول مزامنة ناجحة أو إذا تقادمت المزامنة تمر كل الرسائل (fail open)
+    """
+    
+    def __init__(self, url, interval, metrics):
+        self.enabled = os.getenv('CONTRACT_FILTER_ENABLED', '1') == '1'
+        self.url = url
+        self.interval = interval
+        self.metrics = metrics
+        self.contracts = set()
+        # عنوان -> وقت إضافته محلياً
+        self.recent = {}
+        self.etag = None
+        self.synced_at = None
+    
+    @property
+    def ready(self):
+        return (
+            self.enabled and self.synced_at is not None
+            and time.monotonic() - self.synced_at < self.interval * 3
+        )
+    
+    def add(self, contract_address):
+        if contract_address:
+            self.contracts.add(contract_address)
+            self.recent[contract_address] = time.monotonic()
+    
+    def allows(self, contract_address):
+        return not self.ready or contract_address is None or contract_address in self.contracts
+    
+    async def sync(self, session):
+        """
+        مزامنة واحدة، تُرجع نتيجتها (ok أو not_modified أو http_error أو timeout أو error)
+        """
+        started = time.perf_counter()
+        requested = time.monotonic()
+        result = 'error'
+        try:
+            headers = {'If-None-Match': self.etag} if self.etag else {}
+            async with session.get(self.url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 304:
+                    result = 'not_modified'
+                elif response.status == 200:
+                    contracts = set((await response.json()).get('contract_addresses') or [])
+                    # إشارة أُرسلت قبل الطلب بقليل قد لا تكون حُفظت بعد في الخادم، فتبقى العناوين المحلية الحديثة
+                    horizon = requested - self.interval
+                    self.recent = {address: added for address, added in self.recent.items() if added >= horizon}
+                    self.contracts = contracts | set(self.recent)
+                    self.etag = response.headers.get('ETag')
+                    result = 'ok'
+                else:
+                    result = 'http_error'
+                    logging.warning(f"⚠️ استجابة غير متوقعة من مرشح العقود: {response.status}")
+            if result in ('ok', 'not_modified'):
+                self.synced_at = time.monotonic()
+        except asyncio.TimeoutError:
+            result = 'timeout'
+            logging.warning("⚠️ انتهت مهلة مزامنة مرشح العقود")
+        except Exception as e:
+            logging.warning(f"⚠️ خطأ في مزامنة مرشح العقود: {e}")
+        finally:
+            self.metrics.observe('contract_filter_sync', result, time.perf_counter() - started)
+        return result
+    
+    async def run(self):
+        """
+        حلقة المزامنة الدورية (مهمة في حلقة المستمع)
+        """
+        async with aiohttp.ClientSession() as session:
+            while True:
+                await self.sync(session)
+                await asyncio.sleep(self.interval)
+
+class SmartFalconListener:
+    def __init__(self, client=None):
         # إعدادات التيليجرام من متغيرات البيئة
         self.api_id = int(os.getenv('TELEGRAM_API_ID', '0'))
         self.api_hash = os.getenv('TELEGRAM_API_HASH', '')
@@ -36,11 +204,34 @@ class SmartFalconListener:
         # رابط webhook
         self.webhook_url = os.getenv('N8N_WEBHOOK_URL', 'http://localhost:5000/webhook/telegram')
         
-        # إنشاء عميل التيليجرام
-        self.client = TelegramClient('smart_falcon_session', self.api_id, self.api_hash)
+        # التعبئة (الرسائل الفائتة أثناء التوقف) تُرسل دفعات إلى مسار الخادم المجمّع مباشرة
+        self.batch_webhook_url = os.getenv('BACKFILL_WEBHOOK_URL', self.webhook_url.rstrip('/') + '/batch')
+        self.backfill_batch_size = int(os.getenv('BACKFILL_BATCH_SIZE', '200'))
+        self.backfill_on_start = os.getenv('LISTENER_BACKFILL_ON_START', '0') == '1'
+        
+        # آخر معرف رسالة أُرسل بنجاح لكل قناة، يُحفظ في ملف لتبدأ منه التعبئة بعد إعادة التشغيل
+        self.state_file = os.getenv('LISTENER_STATE_FILE', 'listener_state.json')
+        self.last_seen = self.load_state()
+        # قنوات فشل فيها إرسال رسالة خلال هذا التشغيل: لا يتقدم معرفها المحفوظ بعد ذلك حتى لا تتجاوز
+        # الرسالة الفاشلة، فتعيدها التعبئة التالية (والمكرر منها يزيله الخادم)
+        self.blocked_channels = set()
+        
+        # إنشاء عميل التيليجرام (أو عميل بديل يُمرَّر في القياسات والاختبارات)
+        self.client = client or TelegramClient('smart_falcon_session', self.api_id, self.api_hash)
         
         # قائمة الرسائل المعالجة لتجنب التكرار
         self.processed_messages = set()
+        
+        # مقاييس المستمع (تُعرض فقط إذا حُدد LISTENER_METRICS_PORT)
+        self.metrics = ListenerMetrics()
+        self.metrics_port = int(os.getenv('LISTENER_METRICS_PORT', '0'))
+        
+        # مرشح عقود الإشارات المفتوحة لتحديثات Phanes
+        self.contract_filter = ContractFilter(
+            os.getenv('CONTRACT_FILTER_URL', urljoin(self.webhook_url, '/api/signals/open-contracts')),
+            float(os.getenv('CONTRACT_FILTER_SYNC_INTERVAL', '30')),
+            self.metrics
+        )
     
     async def start(self):
         """
@@ -49,6 +240,9 @@ class SmartFalconListener:
         try:
             logging.info("🚀 بدء تشغيل خدمة المستمع الحي...")
             
+            if self.metrics_port and self.metrics.enabled:
+                await self.metrics.serve(self.metrics_port)
+            
             # الاتصال بالتيليجرام
             await self.client.start(phone=self.phone)
             logging.info("✅ تم الاتصال بالتيليجرام بنجاح")
@@ -59,6 +253,17 @@ class SmartFalconListener:
             # تسجيل معالجات الأحداث
             self.register_handlers()
             
+            if self.contract_filter.enabled:
+                self.filter_task = asyncio.create_task(self.contract_filter.run())
+            
+            # تعبئة ما فات منذ آخر تشغيل (بعد تسجيل المعالجات حتى لا تضيع رسالة بينهما،
+            # والتداخل بين المسارين يزيله الخادم)
+            if self.backfill_on_start and self.last_seen:
+                try:
+                    await self.backfill()
+                except Exception as e:
+                    logging.warning(f"⚠️ فشلت تعبئة الرسائل الفائتة: {e}")
+            
             logging.info("🎯 المستمع جاهز ويستمع للرسائل الجديدة...")
             
             # تشغيل المستمع
@@ -102,39 +307,213 @@ class SmartFalconListener:
         """
         معالجة الرسالة الجديدة
         """
+        started = time.perf_counter()
         try:
             message_id = f"{event.chat_id}_{event.id}"
+            self.metrics.count(signal_type, 'received')
             
             # تجنب معالجة الرسالة مرتين
             if message_id in self.processed_messages:
+                self.metrics.count(signal_type, 'duplicate')
                 return
             
             self.processed_messages.add(message_id)
             
-            # استخلاص نص الرسالة
-            message_text = event.message.message or ""
-            
             # تحضير البيانات للإرسال
-            payload = {
-                'signal_type': signal_type,
-                'message_text': message_text,
-                'timestamp': datetime.now().isoformat(),
-                'channel_id': event.chat_id,
-                'message_id': event.id
-            }
+            payload = self.build_payload(event.message, signal_type, event.chat_id)
+            message_text = payload['message_text']
+            
+            # تحديثات Phanes لعقود بلا إشارة مفتوحة لا تُرسل
+            contract_address = extract_contract_address(message_text, signal_type)
+            if signal_type == 'kol_track':
+                self.contract_filter.add(contract_address)
+            elif not self.contract_filter.allows(contract_address):
+                # لا يتقدم آخر معرف محفوظ: رسالة لم يستلمها الخادم تبقى قابلة للاسترجاع بالتعبئة
+                self.metrics.count(signal_type, 'filtered')
+                return
             
             # إرسال البيانات إلى webhook
-            await self.send_to_webhook(payload)
+            result = await self.send_to_webhook(payload)
+            self.metrics.count(signal_type, 'forwarded' if result == 'ok' else 'failed')
+            if result == 'ok':
+                self.mark_seen(signal_type, event.id)
+            else:
+                self.processed_messages.discard(message_id)
+                self.block_watermark(signal_type)
+            self.metrics.observe('process_message', result, time.perf_counter() - started)
             
             logging.info(f"📨 تم معالجة رسالة {signal_type}: {message_text[:100]}...")
             
         except Exception as e:
+            self.metrics.count(signal_type, 'error')
+            self.processed_messages.discard(f"{event.chat_id}_{event.id}")
+            self.block_watermark(signal_type)
             logging.error(f"❌ خطأ في معالجة الرسالة: {e}")
     
+    def build_payload(self, message, signal_type, channel_id):
+        """
+        حمولة webhook لرسالة تيليجرام (message_date وقت نشرها الأصلي بتوقيت UTC)
+        """
+        return {
+            'signal_type': signal_type,
+            'message_text': message.message or "",
+            'timestamp': datetime.now().isoformat(),
+            'message_date': message.date.isoformat() if message.date else None,
+            'channel_id': channel_id,
+            'message_id': message.id
+        }
+    
+    def load_state(self):
+        try:
+            with open(self.state_file, encoding='utf-8') as f:
+                return {name: int(value) for name, value in json.load(f).items() if name in self.channels}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"⚠️ تعذر قراءة حالة المستمع من {self.state_file}: {e}")
+            return {}
+    
+    def mark_seen(self, signal_type, message_id):
+        """
+        تقديم آخر معرف مُرسل للقناة وحفظه (كتابة ذرية لملف صغير)
+        """
+        if signal_type in self.blocked_channels or message_id <= self.last_seen.get(signal_type, 0):
+            return
+        self.last_seen[signal_type] = message_id
+        try:
+            temp_path = f"{self.state_file}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.last_seen, f)
+            os.replace(temp_path, self.state_file)
+        except Exception as e:
+            logging.warning(f"⚠️ تعذر حفظ حالة المستمع: {e}")
+    
+    def block_watermark(self, signal_type):
+        """
+        إيقاف تقدم آخر معرف محفوظ للقناة بقية هذا التشغيل بعد فشل إرسال إحدى رسائلها
+        """
+        if signal_type not in self.blocked_channels:
+            self.blocked_channels.add(signal_type)
+            logging.warning(
+                f"⚠️ فشل إرسال رسالة من {signal_type}: يبقى آخر معرف محفوظ {self.last_seen.get(signal_type)} "
+                f"لتعيدها التعبئة التالية"
+            )
+    
+    async def fetch_history(self, signal_type, since=None, until=None, min_id=0, limit=None):
+        """
+        جلب رسائل قناة من الأقدم للأحدث بعد since أو بعد min_id
+        iter_messages يطلب 100 رسالة لكل استدعاء (حد GetHistory)، و wait_time=0 يلغي انتظار الثانية
+        الافتراضي بين الصفحات في الجلب الطويل (انتظار FloodWait يتولاه telethon)
+        """
+        messages = []
+        async for message in self.client.iter_messages(
+            PeerChannel(self.channels[signal_type]), limit=limit, offset_date=since,
+            min_id=min_id or 0, reverse=True, wait_time=0
+        ):
+            if until is not None and message.date >= until:
+                break
+            if message.message:
+                messages.append(message)
+                self.metrics.count(signal_type, 'backfill_fetched')
+        return messages
+    
+    async def backfill(self, since=None, until=None, min_ids=None, limit=None, notify=False):
+        """
+        تعبئة الرسائل الفائتة: جلب سجل القنوات الثلاث بالتوازي ثم إرسالها بالترتيب الزمني
+        دفعات إلى /webhook/telegram/batch عبر جلسة HTTP واحدة
+        بدون since أو min_ids تبدأ كل قناة من آخر معرف محفوظ في ملف الحالة
+        notify=False لا يرسل توصيات متأخرة إلى تيليجرام
+        """
+        started = time.perf_counter()
+        if min_ids is None:
+            min_ids = {} if since is not None else dict(self.last_seen)
+        if since is None and not min_ids:
+            raise ValueError('التعبئة تحتاج since أو آخر معرف معروف لقناة واحدة على الأقل')
+        
+        signal_types = [name for name in self.channels if since is not None or name in min_ids]
+        histories = await asyncio.gather(*(
+            self.fetch_history(name, since, until, min_ids.get(name, 0), limit) for name in signal_types
+        ))
+        
+        # ترتيب زمني عبر القنوات، وإشارة KOL Track أولاً عند تساوي الوقت حتى تجد تحديثات Phanes إشارتها
+        pending = sorted(
+            ((message, name) for name, messages in zip(signal_types, histories) for message in messages),
+            key=lambda item: (item[0].date, item[1] != 'kol_track', item[0].id)
+        )
+        summary = {'fetched': len(pending), 'forwarded': 0, 'duplicate': 0, 'failed': 0, 'skipped': 0}
+        
+        batch = []
+        for message, name in pending:
+            message_id = f"{message.chat_id}_{message.id}"
+            if message_id in self.processed_messages:
+                summary['skipped'] += 1
+                self.metrics.count(name, 'duplicate')
+                continue
+            batch.append((name, message, self.build_payload(message, name, message.chat_id)))
+        
+        async with aiohttp.ClientSession() as session:
+            for offset in range(0, len(batch), self.backfill_batch_size):
+                chunk = batch[offset:offset + self.backfill_batch_size]
+                result, results = await self.send_batch_to_webhook(session, [payload for _, _, payload in chunk], notify)
+                if result != 'ok':
+                    # الدفعات التالية تعتمد على ترتيب هذه، فنتوقف وتستأنف التعبئة التالية من آخر معرف محفوظ
+                    summary['failed'] += len(batch) - offset
+                    for name, _, _ in batch[offset:]:
+                        self.metrics.count(name, 'failed')
+                        self.block_watermark(name)
+                    break
+                for (name, message, _), item in zip(chunk, results):
+                    if item.get('status') != 'success':
+                        summary['failed'] += 1
+                        self.metrics.count(name, 'failed')
+                        self.block_watermark(name)
+                        continue
+                    outcome = 'duplicate' if item.get('duplicate') else 'forwarded'
+                    summary[outcome] += 1
+                    self.metrics.count(name, 'backfill_' + outcome)
+                    self.processed_messages.add(f"{message.chat_id}_{message.id}")
+                    self.mark_seen(name, message.id)
+        
+        summary['elapsed_sec'] = round(time.perf_counter() - started, 3)
+        self.metrics.observe('backfill', 'ok' if not summary['failed'] else 'partial', summary['elapsed_sec'])
+        logging.info(f"📥 اكتملت التعبئة: {summary}")
+        return summary
+    
+    async def send_batch_to_webhook(self, session, payloads, notify=False):
+        """
+        إرسال دفعة رسائل إلى مسار الخادم المجمّع
+        تُرجع (نتيجة الإرسال، نتائج الرسائل بترتيبها)
+        """
+        started = time.perf_counter()
+        result, results = 'error', None
+        try:
+            async with session.post(
+                self.batch_webhook_url,
+                json={'messages': payloads, 'notify': notify},
+                timeout=aiohttp.ClientTimeout(total=120)
+            ) as response:
+                if response.status == 200:
+                    results = (await response.json()).get('results') or []
+                    result = 'ok'
+                else:
+                    result = 'http_error'
+                    logging.warning(f"⚠️ استجابة غير متوقعة من webhook المجمّع: {response.status}")
+        except asyncio.TimeoutError:
+            result = 'timeout'
+            logging.error("❌ انتهت مهلة الاتصال بـ webhook المجمّع")
+        except Exception as e:
+            logging.error(f"❌ خطأ في إرسال دفعة إلى webhook: {e}")
+        finally:
+            self.metrics.observe('webhook_batch_send', result, time.perf_counter() - started)
+        return result, results
+    
     async def send_to_webhook(self, payload):
         """
         إرسال البيانات إلى webhook
+        تُرجع نتيجة الإرسال (ok أو http_error أو timeout أو error) لمقاييس المستمع
         """
+        started = time.perf_counter()
+        result = 'error'
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.post(
@@ -144,19 +523,68 @@ class SmartFalconListener:
                     timeout=aiohttp.ClientTimeout(total=10)
                 ) as response:
                     if response.status == 200:
-                        logging.info(f"✅ تم إرسال البيانات إلى webhook بنجاح")
+                        result = 'ok'
+                        logging.info("✅ تم إرسال البيانات إلى webhook بنجاح")
                     else:
+                        result = 'http_error'
                         logging.warning(f"⚠️ استجابة غير متوقعة من webhook: {response.status}")
                         
         except asyncio.TimeoutError:
+            result = 'timeout'
             logging.error("❌ انتهت مهلة الاتصال بـ webhook")
         except Exception as e:
             logging.error(f"❌ خطأ في إرسال البيانات إلى webhook: {e}")
+        finally:
+            self.metrics.observe('webhook_send', result, time.perf_counter() - started)
+        return result
+
+def parse_time(value):
+    """
+    وقت ISO 8601، ودون منطقة زمنية يُعامل كـ UTC (أوقات تيليجرام بتوقيت UTC)
+    """
+    parsed = datetime.fromisoformat(value)
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='خدمة المستمع الحي لقنوات التيليجرام')
+    commands = parser.add_subparsers(dest='command')
+    backfill = commands.add_parser('backfill', help='جلب الرسائل الفائتة من سجل القنوات وإرسالها دفعات ثم الخروج')
+    backfill.add_argument('--since', type=parse_time, help='بداية المدى (ISO 8601)')
+    backfill.add_argument('--until', type=parse_time, help='نهاية المدى (ISO 8601)')
+    backfill.add_argument('--min-id', action='append', default=[], metavar='CHANNEL=ID',
+                          help='آخر معرف معروف لقناة (kol_track أو phanes_nf أو phanes_15m)، قابل للتكرار')
+    backfill.add_argument('--limit', type=int, help='أقصى عدد رسائل لكل قناة')
+    backfill.add_argument('--notify', action='store_true', help='إرسال توصيات الإشارات الفائتة إلى تيليجرام')
+    return parser.parse_args()
+
+async def run_backfill(listener, args):
+    """
+    تشغيل التعبئة مرة واحدة (بدون --since أو --min-id تبدأ من ملف الحالة)
+    """
+    min_ids = None
+    if args.min_id:
+        min_ids = {}
+        for item in args.min_id:
+            name, _, value = item.partition('=')
+            if name not in listener.channels:
+                raise ValueError(f'قناة غير معروفة: {name}')
+            min_ids[name] = int(value)
+    
+    await listener.client.start(phone=listener.phone)
+    try:
+        summary = await listener.backfill(
+            since=args.since, until=args.until, min_ids=min_ids, limit=args.limit, notify=args.notify
+        )
+        print(json.dumps(summary, ensure_ascii=False))
+    finally:
+        await listener.client.disconnect()
 
 async def main():
     """
     الدالة الرئيسية
     """
+    args = parse_args()
+    
     # التحقق من متغيرات البيئة
     required_vars = [
         'TELEGRAM_API_ID', 'TELEGRAM_API_HASH', 'TELEGRAM_PHONE',
@@ -170,6 +598,9 @@ async def main():
     
     # إنشاء وتشغيل المستمع
     listener = SmartFalconListener()
+    if args.command == 'backfill':
+        await run_backfill(listener, args)
+        return
     await listener.start()
 
 if __name__ == '__main__':
@@ -0,0 +1,3 @@
+"""
+أدوات قياس أداء الصقر الذكي (تعمل دون اتصال بالشبكة وعلى قواعد بيانات مؤقتة)
+"""
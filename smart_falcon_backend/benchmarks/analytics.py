@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+قياس التحليلات على بيانات اصطناعية بأحجام 10× و 100× و 1000× من ملفات final_*.csv
+- البيانات مشتقة إحصائياً من الملفات المرفقة: شعبية المحافظ (توزيع عدد المشاركات)، عدد المحافظ لكل إشارة،
+  نسب SUCCESS/FAILURE/PENDING، مضاعفات الربح، وساعات الإشارات. كل محفظة أصلية تُنسخ scale مرة
+  (النسخة الأولى بنفس المعرف، فتبقى المجموعات الذهبية موجودة) ونجاح الإشارة يتبع نسب نجاح محافظها
+- التحميل بإدراج جماعي على دفعات في قاعدة SQLite مؤقتة، ثم rebuild_wallet_stats و rebuild_profit_sketches
+- القياس: كل دالة في AdvancedPatternAnalyzer وكل مسار /api/analytics/* (الطلب الأول، ثم الوسيط مع
+  ذاكرة الاستجابات ودونها)
+- كل حجم يعمل في عملية مستقلة (الإعدادات تُقرأ عند استيراد التطبيق)، والنتائج JSON تُقارن بين الإصدارات بـ --compare
+
+الاستخدام (من مجلد smart_falcon_backend):
+    python benchmarks/analytics.py [--scales 10,100,1000] [--repeat 5] [--seed 42] [--output results.json] [--compare old.json]
+"""
+import argparse
+import bisect
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SOURCE_FILES = {
+    'wallets': 'final_wallets.csv',
+    'signals': 'final_signals.csv',
+    'links': 'final_signal_wallets_link.csv'
+}
+LOAD_CHUNK = 20000
+
+def read_csv(name: str) -> list:
+    with open(os.path.join(BACKEND_DIR, SOURCE_FILES[name]), newline='', encoding='utf-8-sig') as f:
+        return list(csv.DictReader(f))
+
+def parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+class DatasetProfile:
+    """
+    التوزيعات التجريبية المستخرجة من final_*.csv
+    """
+
+    def __init__(self):
+        wallets = read_csv('wallets')
+        signals = read_csv('signals')
+        links = read_csv('links')
+
+        calls = Counter(link['wallet_unique_id'] for link in links)
+        self.wallets = []
+        for row in wallets:
+            total = int(row['total_calls'] or 0)
+            successes = int(row['successful_calls'] or 0)
+            self.wallets.append({
+                'wallet_unique_id': row['wallet_unique_id'],
+                'wallet_type': row['wallet_type'],
+                'wallet_number': int(row['wallet_number']),
+                'weight': max(calls.get(row['wallet_unique_id'], 0), 1),
+                'success_rate': successes / total if total >= 3 else None
+            })
+
+        self.wallets_per_signal = [n for n in Counter(link['signal_id'] for link in links).values() if n >= 2]
+        self.mc_at_buy = [float(link['mc_at_buy']) for link in links if link['mc_at_buy']]
+        self.statuses = Counter(row['performance_status'] for row in signals)
+        self.multipliers = {
+            status: [float(row['profit_multiplier']) for row in signals
+                     if row['performance_status'] == status and row['profit_multiplier']]
+            for status in ('SUCCESS', 'FAILURE')
+        }
+        self.initial_ath = [float(row['initial_ath_usd']) for row in signals if row['initial_ath_usd']]
+        times = sorted(parse_time(row['signal_timestamp']) for row in signals)
+        self.start = times[0]
+        self.span_seconds = (times[-1] - times[0]).total_seconds()
+        self.hours = [t.hour for t in times]
+        self.signal_count = len(signals)
+
+        evaluated = self.statuses['SUCCESS'] + self.statuses['FAILURE']
+        self.success_ratio = self.statuses['SUCCESS'] / evaluated if evaluated else 0.0
+        self.pending_ratio = self.statuses['PENDING'] / len(signals) if signals else 0.0
+
+def synthesize_wallets(profile: DatasetProfile, scale: int, rng: random.Random) -> list:
+    """
+    scale نسخة من كل محفظة بنفس الوزن ونسبة نجاح قريبة (النسخة الأولى بمعرفها الأصلي)
+    """
+    next_number = {}
+    for wallet in profile.wallets:
+        next_number[wallet['wallet_type']] = max(next_number.get(wallet['wallet_type'], 0), wallet['wallet_number'])
+
+    default_rate = profile.success_ratio
+    wallets = []
+    for copy in range(scale):
+        for wallet in profile.wallets:
+            if copy == 0:
+                number = wallet['wallet_number']
+            else:
+                next_number[wallet['wallet_type']] += 1
+                number = next_number[wallet['wallet_type']]
+            rate = wallet['success_rate'] if wallet['success_rate'] is not None else default_rate
+            wallets.append({
+                'wallet_unique_id': f"{wallet['wallet_type']}_{number}",
+                'wallet_type': wallet['wallet_type'],
+                'wallet_number': number,
+                'weight': wallet['weight'],
+                'skill': min(max(rate + rng.gauss(0, 0.05), 0.0), 1.0)
+            })
+    return wallets
+
+def generate_signals(profile: DatasetProfile, wallets: list, scale: int, rng: random.Random):
+    """
+    دفعات من (صفوف الإشارات، صفوف الروابط) بعدد إشارات = scale × الأصل
+    """
+    cumulative = []
+    running = 0
+    for wallet in wallets:
+        running += wallet['weight']
+        cumulative.append(running)
+    # معامل يجعل متوسط نسبة النجاح المتوقعة مساوياً للنسبة الأصلية
+    expected_skill = sum(w['weight'] * w['skill'] for w in wallets) / running
+    success_factor = profile.success_ratio / expected_skill if expected_skill else 0.0
+
+    signals, links = [], []
+    for index in range(profile.signal_count * scale):
+        size = min(rng.choice(profile.wallets_per_signal), len(wallets))
+        chosen = set()
+        while len(chosen) < size:
+            chosen.add(bisect.bisect_right(cumulative, rng.random() * running))
+        members = [wallets[i] for i in chosen]
+
+        signal_id = f'syn_{index}'
+        offset = rng.random() * profile.span_seconds
+        signal_time = profile.start + timedelta(seconds=offset)
+        signal_time = signal_time.replace(hour=rng.choice(profile.hours))
+        initial_ath = rng.choice(profile.initial_ath)
+
+        if rng.random() < profile.pending_ratio:
+            status, multiplier, evaluated = 'PENDING', 0.0, False
+        else:
+            success_probability = success_factor * sum(w['skill'] for w in members) / len(members)
+            status = 'SUCCESS' if rng.random() < success_probability else 'FAILURE'
+            multiplier = rng.choice(profile.multipliers[status] or [1.0])
+            evaluated = True
+
+        details = []
+        for wallet in members:
+            mc_at_buy = rng.choice(profile.mc_at_buy)
+            details.append({'type': wallet['wallet_type'], 'id': wallet['wallet_number'], 'mc_at_buy': mc_at_buy})
+            links.append({
+                'link_id': f"link_{signal_id}_{wallet['wallet_unique_id']}",
+                'signal_id': signal_id,
+                'wallet_unique_id': wallet['wallet_unique_id'],
+                'mc_at_buy': mc_at_buy
+            })
+        signals.append({
+            'signal_id': signal_id,
+            'contract_address': f'{index:044d}',
+            'signal_time': signal_time,
+            'token_name': f'SYN{index}',
+            'total_wallets_involved': len(members),
+            'wallets_details': json.dumps(details),
+            'initial_ath_usd': initial_ath,
+            'final_ath_usd': initial_ath * multiplier,
+            'profit_multiplier': multiplier,
+            'performance_status': status,
+            'evaluation_complete': evaluated,
+            'decision': 'IGNORE',
+            'confidence_score': 0.0,
+            'decision_reasons': '[]'
+        })
+        if len(signals) >= LOAD_CHUNK:
+            yield signals, links
+            signals, links = [], []
+    if signals:
+        yield signals, links
+
+def load_dataset(profile: DatasetProfile, scale: int, seed: int) -> dict:
+    """
+    إدراج البيانات الاصطناعية ثم إعادة بناء إحصائيات المحافظ وملخصات المئينات بمسارات المشروع نفسها
+    """
+    from src.models.user import db
+    from src.models.smart_falcon import Signal, SignalWalletLink, Wallet
+    from src.services.analyzer import SmartFalconAnalyzer
+    from src.services.profit_quantiles import rebuild_profit_sketches
+    from src.services.wallet_stats import rebuild_wallet_stats
+
+    rng = random.Random(seed)
+    timings = {}
+
+    started = time.perf_counter()
+    wallets = synthesize_wallets(profile, scale, rng)
+    counts = {'wallets': len(wallets), 'signals': 0, 'links': 0}
+    with db.engine.begin() as connection:
+        connection.execute(Wallet.__table__.insert(), [
+            {
+                'wallet_unique_id': w['wallet_unique_id'], 'wallet_type': w['wallet_type'],
+                'wallet_number': w['wallet_number'], 'date_added': profile.start, 'last_seen': profile.start,
+                'status': 'ACTIVE'
+            }
+            for w in wallets
+        ])
+    for signals, links in generate_signals(profile, wallets, scale, rng):
+        with db.engine.begin() as connection:
+            connection.execute(Signal.__table__.insert(), signals)
+            connection.execute(SignalWalletLink.__table__.insert(), links)
+        counts['signals'] += len(signals)
+        counts['links'] += len(links)
+    timings['insert_sec'] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    rebuild_wallet_stats()
+    timings['wallet_stats_sec'] = round(time.perf_counter() - started, 3)
+
+    started = time.perf_counter()
+    rebuild_profit_sketches(SmartFalconAnalyzer().golden_clusters())
+    timings['profit_sketches_sec'] = round(time.perf_counter() - started, 3)
+    return {'rows': counts, 'load': timings}
+
+def measure(func, repeat: int) -> dict:
+    """
+    زمن الاستدعاء الأول ووسيط repeat استدعاء بعده (بالملي ثانية)
+    """
+    started = time.perf_counter()
+    func()
+    first = time.perf_counter() - started
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {
+        'first_ms': round(first * 1000, 2),
+        'median_ms': round(statistics.median(samples) * 1000, 2) if samples else None
+    }
+
+def benchmark_analyzer(analyzer, repeat: int) -> dict:
+    top_wallets = []
+    clusters = analyzer.analyze_wallet_clusters(2, mode='exact', signals_limit=0)
+    if clusters.get('promising_clusters'):
+        top_wallets = clusters['promising_clusters'][0]['cluster']
+
+    methods = {
+        'analyze_wallet_clusters(2, exact)': lambda: analyzer.analyze_wallet_clusters(2, mode='exact'),
+        'analyze_wallet_clusters(2, approximate)': lambda: analyzer.analyze_wallet_clusters(2, mode='approximate'),
+        'analyze_wallet_clusters(3, auto)': lambda: analyzer.analyze_wallet_clusters(3),
+        'analyze_individual_performance': analyzer.analyze_individual_performance,
+        'analyze_time_patterns': analyzer.analyze_time_patterns,
+        'generate_smart_rules': analyzer.generate_smart_rules,
+        'get_pattern_insights': analyzer.get_pattern_insights
+    }
+    if top_wallets:
+        methods['get_cluster_signals'] = lambda: analyzer.get_cluster_signals(top_wallets)
+    return {name: measure(func, repeat) for name, func in methods.items()}
+
+def benchmark_routes(app, repeat: int) -> dict:
+    from src.models.smart_falcon import Signal, Wallet
+
+    client = app.test_client()
+    with app.app_context():
+        top_wallet = quote(Wallet.query.order_by(Wallet.total_calls.desc()).first().wallet_unique_id)
+        sample_signal = Signal.query.filter_by(performance_status='SUCCESS').first().signal_id
+    golden = 'KOL_15,KOL_22'
+
+    paths = [
+        '/api/analytics/patterns',
+        '/api/analytics/clusters?size=2',
+        '/api/analytics/clusters?size=3',
+        f'/api/analytics/clusters/signals?wallets={golden}',
+        '/api/analytics/performance',
+        '/api/analytics/time-patterns',
+        '/api/analytics/rules',
+        f'/api/analytics/wallet/{top_wallet}',
+        f'/api/analytics/signal/{sample_signal}',
+        f'/api/analytics/quantiles/wallet/{top_wallet}',
+        f'/api/analytics/quantiles/merge?wallets={golden}',
+        '/api/analytics/quantiles/clusters'
+    ]
+    results = {}
+    for path in paths:
+        statuses = set()
+        separator = '&' if '?' in path else '?'
+        bust = iter(range(10 ** 9))
+
+        def cached():
+            statuses.add(client.get(path).status_code)
+
+        def uncached():
+            # معامل فريد يتجاوز ذاكرة الاستجابات (مفتاحها المسار والمعاملات وإصدار البيانات)
+            statuses.add(client.get(f'{path}{separator}_bench={next(bust)}').status_code)
+
+        timings = measure(cached, repeat)
+        results[path] = {
+            'first_ms': timings['first_ms'],
+            'cached_median_ms': timings['median_ms'],
+            'uncached_median_ms': measure(uncached, repeat)['median_ms'],
+            'statuses': sorted(statuses)
+        }
+    return results
+
+def run_scale(scale: int, seed: int, repeat: int) -> dict:
+    """
+    تشغيل حجم واحد في هذه العملية على قاعدة ولقطات مؤقتة
+    """
+    tmp_dir = tempfile.mkdtemp(prefix=f'sf_analytics_bench_{scale}x_')
+    db_path = os.path.join(tmp_dir, 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['ANALYTICS_SNAPSHOT_DIR'] = os.path.join(tmp_dir, 'analytics_snapshots')
+    os.environ['TELEGRAM_BOT_TOKEN'] = ''
+
+    from src.main import app, init_db
+    from src.routes.analytics import get_analyzer
+
+    logging.disable(logging.WARNING)
+    init_db()
+    profile = DatasetProfile()
+    with app.app_context():
+        dataset = load_dataset(profile, scale, seed)
+        analyzer_results = benchmark_analyzer(get_analyzer(), repeat)
+    route_results = benchmark_routes(app, repeat)
+
+    return {
+        'scale': scale,
+        **dataset,
+        'db_bytes': os.path.getsize(db_path),
+        'analyzer': analyzer_results,
+        'routes': route_results
+    }
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat(timespec='seconds')
+    }
+
+def compare(previous: dict, current: dict, threshold: float) -> list:
+    """
+    مقارنة الوسيط (دون ذاكرة الاستجابات للمسارات) لكل بند بين ملفي نتائج
+    """
+    rows = []
+    old_scales = {item['scale']: item for item in previous.get('results', [])}
+    for item in current['results']:
+        old = old_scales.get(item['scale'])
+        if old is None:
+            continue
+        for section, key in (('analyzer', 'median_ms'), ('routes', 'uncached_median_ms')):
+            for name, values in item[section].items():
+                before = old.get(section, {}).get(name, {}).get(key)
+                after = values.get(key)
+                if not before or after is None:
+                    continue
+                ratio = after / before
+                rows.append({
+                    'scale': item['scale'], 'name': name, 'before_ms': before, 'after_ms': after,
+                    'ratio': round(ratio, 2), 'regression': ratio > threshold
+                })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='قياس التحليلات على بيانات اصطناعية بأحجام مختلفة')
+    parser.add_argument('--scales', default='10,100,1000')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='ملف JSON للنتائج (وإلا تُطبع)')
+    parser.add_argument('--compare', help='ملف نتائج سابق للمقارنة')
+    parser.add_argument('--threshold', type=float, default=1.2, help='نسبة التباطؤ التي تُعد تراجعاً')
+    parser.add_argument('--worker-scale', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_scale:
+        print(json.dumps(run_scale(args.worker_scale, args.seed, args.repeat)))
+        return
+
+    results = []
+    for scale in [int(s) for s in args.scales.split(',') if s.strip()]:
+        print(f"⏳ الحجم {scale}×...", file=sys.stderr)
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker-scale', str(scale),
+             '--seed', str(args.seed), '--repeat', str(args.repeat)],
+            cwd=BACKEND_DIR, capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            print(process.stderr, file=sys.stderr)
+            raise SystemExit(f"فشل قياس الحجم {scale}×")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        results.append(result)
+        slowest = max(result['analyzer'].items(), key=lambda item: item[1]['median_ms'] or item[1]['first_ms'])
+        print(f"   {result['rows']} تحميل {result['load']} أبطأ دالة: {slowest[0]}", file=sys.stderr)
+
+    report = {'environment': environment(), 'seed': args.seed, 'repeat': args.repeat, 'results': results}
+    if args.compare:
+        with open(args.compare) as f:
+            report['comparison'] = compare(json.load(f), report, args.threshold)
+        for row in report['comparison']:
+            if row['regression']:
+                print(
+                    f"⚠️ تراجع {row['scale']}× {row['name']}: {row['before_ms']} ← {row['after_ms']}ms (×{row['ratio']})",
+                    file=sys.stderr
+                )
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"✅ النتائج في {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
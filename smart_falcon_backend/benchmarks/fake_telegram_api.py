@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+خادم محلي يحاكي Telegram Bot API (sendMessage و getMe) لاختبار الإشعارات دون اتصال
+- زمن استجابة قابل للضبط (ثابت + تذبذب عشوائي)
+- نسبة أخطاء خادم (500) عشوائية
+- حدود المعدل كما في تيليجرام: دلو رموز لكل محادثة ودلو عام، وعند تجاوزه
+  429 مع parameters.retry_after بالثواني
+- أخطاء الطلب المعتادة: نص فارغ، نص أطول من 4096، chat_id مفقود (400)
+- GET /stats لإحصائيات الخادم و POST /reset لتصفيرها
+
+الاستخدام (من مجلد smart_falcon_backend):
+    python benchmarks/fake_telegram_api.py [--port 8081] [--latency-ms 30] [--error-rate 0.01] [--chat-rate 20] [--burst 20]
+ثم: TELEGRAM_API_BASE_URL=http://127.0.0.1:8081 TELEGRAM_BOT_TOKEN=test TELEGRAM_NOTIFICATION_CHANNEL_ID=-100123
+"""
+import argparse
+import asyncio
+import math
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from aiohttp import web
+
+MAX_MESSAGE_LENGTH = 4096
+
+class TokenBucket:
+    """
+    rate رمز/ث بسعة burst؛ take يرجع 0 عند النجاح أو الثواني المتبقية حتى يتوفر رمز
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class FakeTelegramBotAPI:
+    """
+    تطبيق aiohttp بسلوك sendMessage في Bot API (حدود المعدل بـ 0 تعني دون حد)
+    """
+
+    def __init__(self, latency_ms: float = 30, jitter_ms: float = 10, error_rate: float = 0.0,
+                 chat_rate: float = 0, burst: float = 20, global_rate: float = 0, seed: Optional[int] = None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.chat_rate = chat_rate
+        self.burst = burst
+        self.global_rate = global_rate
+        self.random = random.Random(seed)
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._global_bucket = TokenBucket(global_rate, max(burst, global_rate)) if global_rate > 0 else None
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.base_url = None
+        self.reset()
+
+    def reset(self):
+        self.stats = {'requests': 0, 'delivered': 0, 'rate_limited': 0, 'server_errors': 0, 'bad_requests': 0}
+        self.messages: Dict[str, int] = {}
+        self._message_id = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/bot{token}/sendMessage', self.send_message)
+        app.router.add_route('*', '/bot{token}/getMe', self.get_me)
+        app.router.add_get('/stats', self.get_stats)
+        app.router.add_post('/reset', self.post_reset)
+        return app
+
+    @staticmethod
+    def _error(status: int, description: str, **parameters) -> web.Response:
+        body = {'ok': False, 'error_code': status, 'description': description}
+        if parameters:
+            body['parameters'] = parameters
+        return web.json_response(body, status=status)
+
+    async def _payload(self, request: web.Request) -> Dict:
+        if request.content_type == 'application/json':
+            return await request.json()
+        return dict(await request.post()) or dict(request.query)
+
+    def _rate_limit(self, chat_id: str) -> float:
+        waits = []
+        if self._global_bucket is not None:
+            waits.append(self._global_bucket.take())
+        if self.chat_rate > 0:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.burst)
+            waits.append(bucket.take())
+        return max(waits, default=0.0)
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        self.stats['requests'] += 1
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+        if not request.match_info['token']:
+            return self._error(401, 'Unauthorized')
+        try:
+            payload = await self._payload(request)
+        except ValueError:
+            self.stats['bad_requests'] += 1
+            return self._error(400, "Bad Request: can't parse JSON")
+
+        chat_id = str(payload.get('chat_id') or '')
+        text = payload.get('text') or ''
+        if not chat_id:
+            self.stats['bad_requests'] += 1
+            return self._error(400, 'Bad Request: chat_id is empty')
+        if not text.strip():
+            self.stats['bad_requests'] += 1
+            return self._error(400, 'Bad Request: message text is empty')
+        if len(text) > MAX_MESSAGE_LENGTH:
+            self.stats['bad_requests'] += 1
+            return self._error(400, 'Bad Request: message is too long')
+
+        wait = self._rate_limit(chat_id)
+        if wait > 0:
+            self.stats['rate_limited'] += 1
+            retry_after = max(1, math.ceil(wait))
+            return self._error(429, f'Too Many Requests: retry after {retry_after}', retry_after=retry_after)
+
+        if self.random.random() < self.error_rate:
+            self.stats['server_errors'] += 1
+            return self._error(500, 'Internal Server Error')
+
+        self._message_id += 1
+        self.stats['delivered'] += 1
+        self.messages[chat_id] = self.messages.get(chat_id, 0) + 1
+        return web.json_response({
+            'ok': True,
+            'result': {
+                'message_id': self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'channel'},
+                'text': text
+            }
+        })
+
+    async def get_me(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'ok': True,
+            'result': {'id': 1, 'is_bot': True, 'first_name': 'Fake Smart Falcon', 'username': 'fake_smart_falcon_bot'}
+        })
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, 'messages_per_chat': self.messages})
+
+    async def post_reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({'ok': True})
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f'http://{host}:{bound_port}'
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        تشغيل الخادم في خيط بحلقة أحداث خاصة (لعملاء متزامنين مثل send_message_sync)
+        """
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start(host, port))
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, name='fake-telegram-api', daemon=True).start()
+        ready.wait()
+        return self.base_url
+
+    def stop_thread(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+def main():
+    parser = argparse.ArgumentParser(description='خادم محلي يحاكي Telegram Bot API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=30)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--chat-rate', type=float, default=20, help='رسالة/ث لكل محادثة (0 = دون حد)')
+    parser.add_argument('--burst', type=float, default=20)
+    parser.add_argument('--global-rate', type=float, default=30, help='رسالة/ث لكل البوت (0 = دون حد)')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    api = FakeTelegramBotAPI(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        chat_rate=args.chat_rate, burst=args.burst, global_rate=args.global_rate, seed=args.seed
+    )
+    print(f"🤖 Bot API وهمي على http://{args.host}:{args.port}")
+    web.run_app(api.app(), host=args.host, port=args.port, access_log=None, print=None)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+قياس زمن استيراد src.main عبر python -X importtime
+يفشل (رمز خروج 1) إذا تجاوز الزمن الميزانية أو إذا استُورِدت وحدة ثقيلة يجب أن تكون متأخرة
+نفس الفحص يعمل كاختبار انحدار ضمن pytest في tests/test_import_time.py
+
+الاستخدام (من مجلد smart_falcon_backend):
+    python benchmarks/import_time.py [--budget-ms 1000] [--runs 3] [--top 15]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# وحدات يجب ألا تُحمَّل عند استيراد التطبيق، بل عند أول استخدام فقط
+LAZY_MODULES = ('pandas', 'numpy', 'aiohttp', 'dateutil')
+
+LINE_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+def measure_once(module: str) -> dict:
+    """
+    تشغيل مفسر جديد واستخراج الزمن التراكمي لكل وحدة بالميكروثانية
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='قياس زمن استيراد التطبيق')
+    parser.add_argument('--module', default='src.main')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('IMPORT_BUDGET_MS', '1000')))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', action='store_true', help='طباعة النتيجة بصيغة JSON')
+    args = parser.parse_args()
+
+    runs = [measure_once(args.module) for _ in range(args.runs)]
+    total_ms = statistics.median(run.get(args.module, 0) for run in runs) / 1000
+    last = runs[-1]
+
+    loaded_lazy = sorted(
+        name for name in last
+        if name.split('.')[0] in LAZY_MODULES
+    )
+    loaded_lazy = sorted({name.split('.')[0] for name in loaded_lazy})
+
+    top = sorted(
+        ((name, us) for name, us in last.items() if name.startswith('src')),
+        key=lambda item: item[1],
+        reverse=True
+    )[:args.top]
+
+    result = {
+        'module': args.module,
+        'median_ms': round(total_ms, 1),
+        'budget_ms': args.budget_ms,
+        'eagerly_imported_lazy_modules': loaded_lazy,
+        'slowest_project_modules_ms': {name: round(us / 1000, 1) for name, us in top}
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print(f"⏱️  {args.module}: {result['median_ms']} ms (الميزانية {args.budget_ms} ms)")
+        for name, ms in result['slowest_project_modules_ms'].items():
+            print(f"   {ms:8.1f} ms  {name}")
+        if loaded_lazy:
+            print(f"❌ وحدات ثقيلة مستوردة مبكراً: {', '.join(loaded_lazy)}")
+
+    if total_ms > args.budget_ms or loaded_lazy:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+قياس خط الإدخال من البداية للنهاية: رسائل KOL Track و Phanes اصطناعية (benchmarks/messages.py)
+تُرسل إلى /webhook/telegram بمعدل ثابت على خادم محلي وقاعدة SQLite مؤقتة (دون أي اتصال خارجي)
+- الحمل مفتوح الحلقة: كل رسالة لها موعد مجدول، والزمن يُقاس من الموعد المجدول حتى الاستجابة
+  (فلا يختفي زمن الانتظار عند تشبع الخادم) إضافة لزمن الخدمة من لحظة الإرسال الفعلية
+- --via-listener: التسليم عبر SmartFalconListener.process_message بعميل تيليجرام بديل
+  (يتطلب اعتماديات live_listener/requirements.txt)
+- التقرير: الإنتاجية، p50/p99، الأخطاء، نمو قاعدة البيانات لكل رسالة، ومتوسط زمن مراحل الإدخال
+
+الاستخدام (من مجلد smart_falcon_backend):
+    python benchmarks/ingestion.py [--count 1000] [--rate 100] [--concurrency 16] [--seed 42] [--via-listener] [--json]
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LISTENER_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'live_listener')
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.messages import MessageGenerator
+
+def prepare_environment(tmp_dir: str) -> str:
+    """
+    قاعدة ولقطات مؤقتة ودون إشعارات تيليجرام، قبل استيراد التطبيق (الإعدادات تُقرأ عند الاستيراد)
+    """
+    db_path = os.path.join(tmp_dir, 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['ANALYTICS_SNAPSHOT_DIR'] = os.path.join(tmp_dir, 'analytics_snapshots')
+    os.environ['TELEGRAM_BOT_TOKEN'] = ''
+    os.environ['LISTENER_STATE_FILE'] = os.path.join(tmp_dir, 'listener_state.json')
+    os.environ.pop('METRICS_SHARED_DIR', None)
+    return db_path
+
+def database_size(db_path: str) -> int:
+    return sum(
+        os.path.getsize(path) for path in (db_path, f'{db_path}-wal') if os.path.exists(path)
+    )
+
+def table_counts(db_path: str) -> dict:
+    connection = sqlite3.connect(db_path)
+    try:
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        return {table: connection.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0] for table in tables}
+    finally:
+        connection.close()
+
+def start_server(app):
+    """
+    خادم werkzeug متعدد الخيوط على منفذ محلي عشوائي
+    """
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='bench-server', daemon=True)
+    thread.start()
+    return server
+
+def percentile(ordered: list, q: float):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+
+def latency_summary(latencies: list) -> dict:
+    ordered = sorted(latencies)
+    return {
+        'p50_ms': percentile(ordered, 0.5),
+        'p99_ms': percentile(ordered, 0.99),
+        'max_ms': round(ordered[-1] * 1000, 2) if ordered else None
+    }
+
+def post_webhook(port: int, payload: dict) -> int:
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request(
+            'POST', '/webhook/telegram', body=json.dumps(payload), headers={'Content-Type': 'application/json'}
+        )
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+def run_webhook_load(port: int, messages: list, rate: float, concurrency: int) -> dict:
+    """
+    إرسال الرسائل في مواعيدها (rate رسالة/ث، أو بأقصى سرعة إن كان 0) عبر concurrency خيطاً
+    """
+    results = []
+    lock = threading.Lock()
+
+    def send(message, scheduled):
+        started = time.perf_counter()
+        try:
+            status = post_webhook(port, message.payload())
+        except Exception:
+            status = None
+        finished = time.perf_counter()
+        with lock:
+            results.append((status, finished - started, finished - scheduled))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index, message in enumerate(messages):
+            scheduled = started + index / rate if rate > 0 else time.perf_counter()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, message, scheduled)
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'elapsed': elapsed,
+        'statuses': statuses,
+        'errors': sum(count for status, count in statuses.items() if status != '200'),
+        'service': latency_summary([service for _, service, _ in results]),
+        'scheduled': latency_summary([latency for _, _, latency in results])
+    }
+
+class FakeTelegramClient:
+    """
+    بديل TelegramClient للمستمع: لا جلسة ولا شبكة، والرسائل تُسلَّم مباشرة إلى process_message
+    """
+
+    def on(self, builder):
+        def decorator(handler):
+            return handler
+        return decorator
+
+    async def get_entity(self, peer):
+        return type('Entity', (), {'title': f'fake-{peer}'})()
+
+class FakeEvent:
+    """
+    الحد الأدنى من حدث NewMessage الذي يستخدمه المستمع: chat_id و id و message (النص والمعرف والتاريخ)
+    """
+
+    def __init__(self, message):
+        self.chat_id = message.channel_id
+        self.id = message.message_id
+        self.message = type('Message', (), {
+            'message': message.text, 'id': message.message_id, 'date': datetime.now(timezone.utc)
+        })()
+
+def load_listener():
+    sys.path.insert(0, LISTENER_DIR)
+    try:
+        from live_listener import SmartFalconListener
+    except ImportError as e:
+        raise SystemExit(
+            f"وضع --via-listener يتطلب اعتماديات المستمع ({e}): pip install -r live_listener/requirements.txt"
+        )
+    return SmartFalconListener
+
+def run_listener_load(port: int, messages: list, rate: float, concurrency: int) -> dict:
+    """
+    نفس الحمل المجدول لكن عبر SmartFalconListener (جلسة aiohttp لكل رسالة كما في الإنتاج)
+    """
+    listener_class = load_listener()
+    listener = listener_class(client=FakeTelegramClient())
+    listener.webhook_url = f'http://127.0.0.1:{port}/webhook/telegram'
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        service, scheduled_latencies = [], []
+
+        async def deliver(message, scheduled):
+            async with semaphore:
+                started = time.perf_counter()
+                await listener.process_message(FakeEvent(message), message.signal_type)
+                finished = time.perf_counter()
+                service.append(finished - started)
+                scheduled_latencies.append(finished - scheduled)
+
+        started = time.perf_counter()
+        tasks = []
+        for index, message in enumerate(messages):
+            scheduled = started + index / rate if rate > 0 else time.perf_counter()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(deliver(message, scheduled)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started, service, scheduled_latencies
+
+    elapsed, service, scheduled_latencies = asyncio.run(run())
+    outcomes = {}
+    for (_, outcome), count in listener.metrics.messages.items():
+        outcomes[outcome] = outcomes.get(outcome, 0) + count
+    return {
+        'elapsed': elapsed,
+        'statuses': outcomes,
+        'errors': outcomes.get('failed', 0) + outcomes.get('error', 0),
+        'service': latency_summary(service),
+        'scheduled': latency_summary(scheduled_latencies)
+    }
+
+def stage_means() -> dict:
+    """
+    متوسط زمن كل مرحلة من مدرج smart_falcon_stage_duration_seconds (نفس العملية)
+    """
+    from src.services.metrics import stage_duration
+
+    return {
+        stage: {'count': count, 'mean_ms': round(total / count * 1000, 3)}
+        for stage, (_, total, count) in sorted(stage_duration.state().items())
+        if count
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='قياس خط الإدخال من البداية للنهاية')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=100, help='رسالة/ث (0 = بأقصى سرعة)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--via-listener', action='store_true')
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='sf_ingest_bench_')
+    db_path = prepare_environment(tmp_dir)
+
+    from src.main import app, init_db
+
+    if not args.verbose:
+        # سجلات كل رسالة تطغى على القياس نفسه
+        logging.disable(logging.WARNING)
+    init_db()
+    messages = list(MessageGenerator(seed=args.seed).stream(args.count))
+    server = start_server(app)
+    size_before = database_size(db_path)
+
+    try:
+        if args.via_listener:
+            load = run_listener_load(server.server_port, messages, args.rate, args.concurrency)
+        else:
+            load = run_webhook_load(server.server_port, messages, args.rate, args.concurrency)
+    finally:
+        server.shutdown()
+
+    size_after = database_size(db_path)
+    results = {
+        'mode': 'listener' if args.via_listener else 'webhook',
+        'messages': args.count,
+        'target_rate': args.rate,
+        'concurrency': args.concurrency,
+        'elapsed_sec': round(load['elapsed'], 3),
+        'throughput_msgs_per_sec': round(args.count / load['elapsed'], 1),
+        'errors': load['errors'],
+        'statuses': load['statuses'],
+        'latency': load['service'],
+        'latency_from_schedule': load['scheduled'],
+        'db': {
+            'path': db_path,
+            'bytes_before': size_before,
+            'bytes_after': size_after,
+            'bytes_per_message': round((size_after - size_before) / args.count, 1) if args.count else None,
+            'rows': table_counts(db_path)
+        },
+        'stages': stage_means()
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+
+    print(f"الوضع: {results['mode']}، {args.count} رسالة بمعدل {args.rate:g}/ث وتزامن {args.concurrency}")
+    print(
+        f"الإنتاجية: {results['throughput_msgs_per_sec']} رسالة/ث خلال {results['elapsed_sec']} ث، "
+        f"الأخطاء: {results['errors']} {results['statuses']}"
+    )
+    print(
+        f"زمن الخدمة: p50={results['latency']['p50_ms']}ms p99={results['latency']['p99_ms']}ms | "
+        f"من الموعد المجدول: p50={results['latency_from_schedule']['p50_ms']}ms "
+        f"p99={results['latency_from_schedule']['p99_ms']}ms"
+    )
+    print(
+        f"قاعدة البيانات: {size_before} ← {size_after} بايت "
+        f"({results['db']['bytes_per_message']} بايت/رسالة)، الصفوف: {results['db']['rows']}"
+    )
+    for stage, values in results['stages'].items():
+        print(f"  {stage:<18} {values['mean_ms']:>9}ms × {values['count']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+مولد رسائل تيليجرام اصطناعية بصيغ قنوات KOL Track و Phanes كما يتوقعها
+SmartFalconAnalyzer.extract_kol_track_data و extract_phanes_data
+
+كل إشارة KOL تتبعها رسالة Phanes أولى (ATH الأولي) ثم تحديثات ATH لنفس العقد،
+مع توزيع مشاركة غير متساوٍ للمحافظ (بعضها نشط جداً) وظهور المجموعات الذهبية أحياناً
+"""
+import random
+import string
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+# معرفات قنوات افتراضية (بصيغة قنوات تيليجرام الخارقة)
+CHANNEL_IDS = {
+    'kol_track': -1001000000001,
+    'phanes_nf': -1001000000002,
+    'phanes_15m': -1001000000003
+}
+
+GOLDEN_CLUSTERS = [
+    [('KOL', 1), ('KOL', 15), ('KOL', 22)],
+    [('New Wallet', 56), ('New Wallet', 82)],
+    [('KOL', 15), ('KOL', 22)]
+]
+
+class SyntheticMessage(NamedTuple):
+    signal_type: str
+    text: str
+    channel_id: int
+    message_id: int
+    contract_address: str
+
+    def payload(self) -> Dict:
+        """
+        حمولة webhook بنفس شكل ما يرسله المستمع الحي
+        """
+        return {
+            'signal_type': self.signal_type,
+            'message_text': self.text,
+            'channel_id': self.channel_id,
+            'message_id': self.message_id
+        }
+
+def format_money(value: float) -> str:
+    for suffix, size in (('B', 1e9), ('M', 1e6), ('K', 1e3)):
+        if value >= size:
+            return f"{value / size:.1f}{suffix}"
+    return f"{value:.0f}"
+
+class MessageGenerator:
+    """
+    توليد رسائل قابلة للتكرار (seed) بنسب وتوزيعات قابلة للضبط
+    """
+
+    def __init__(self, seed: Optional[int] = None, kol_wallets: int = 40, new_wallets: int = 400,
+                 golden_rate: float = 0.05, updates_per_signal: int = 2, success_rate: float = 0.35,
+                 phanes_channels: Tuple[str, ...] = ('phanes_nf', 'phanes_15m'), first_message_id: int = 1):
+        self.random = random.Random(seed)
+        self.kol_wallets = kol_wallets
+        self.new_wallets = new_wallets
+        self.golden_rate = golden_rate
+        self.updates_per_signal = updates_per_signal
+        self.success_rate = success_rate
+        self.phanes_channels = phanes_channels
+        # معرفات تيليجرام تبدأ من first_message_id في كل قناة (مولدات متعددة على نفس القاعدة تحتاج نطاقات منفصلة)
+        self._message_ids = {channel: first_message_id - 1 for channel in CHANNEL_IDS}
+
+    def contract_address(self) -> str:
+        return ''.join(self.random.choice(BASE58_ALPHABET) for _ in range(44))
+
+    def token_name(self) -> str:
+        return ''.join(self.random.choice(string.ascii_uppercase) for _ in range(self.random.randint(3, 8)))
+
+    def _pick_wallet(self) -> Tuple[str, int]:
+        # توزيع باريتو تقريبي: أرقام المحافظ الصغيرة أنشط
+        if self.random.random() < 0.4:
+            return 'KOL', min(int(self.random.paretovariate(1.2)), self.kol_wallets)
+        return 'New Wallet', min(int(self.random.paretovariate(0.8)), self.new_wallets)
+
+    def wallets(self) -> List[Tuple[str, int]]:
+        selected = []
+        if self.random.random() < self.golden_rate:
+            selected.extend(self.random.choice(GOLDEN_CLUSTERS))
+        target = self.random.randint(max(2, len(selected)), max(2, len(selected)) + 4)
+        while len(selected) < target:
+            wallet = self._pick_wallet()
+            if wallet not in selected:
+                selected.append(wallet)
+        self.random.shuffle(selected)
+        return selected
+
+    def kol_track_text(self, contract_address: str, token_name: str, wallets: List[Tuple[str, int]],
+                       market_cap: float) -> str:
+        lines = [
+            f"🟢 {len(wallets)} wallets bought {token_name} avg MC: ${format_money(market_cap)}",
+            f"solana `{contract_address}`",
+            ""
+        ]
+        for position, (wallet_type, number) in enumerate(wallets, 1):
+            buy_cap = market_cap * self.random.uniform(0.6, 1.4)
+            sol = self.random.uniform(0.1, 5)
+            lines.append(f"{position}. {wallet_type} {number} ({sol:.2f} SOL) MC: ${format_money(buy_cap)}")
+        return '\n'.join(lines)
+
+    def phanes_text(self, contract_address: str, token_name: str, ath: float) -> str:
+        market_cap = ath * self.random.uniform(0.5, 1.0)
+        return '\n'.join([
+            f"💊 {token_name} (${token_name})",
+            f"├ `{contract_address}`",
+            f"└ #SOL | {self.random.randint(1, 59)}m | 🔎",
+            "",
+            f"📊 MC: ${format_money(market_cap)} | ATH: ${format_money(ath)}"
+        ])
+
+    def _message(self, signal_type: str, text: str, contract_address: str) -> SyntheticMessage:
+        self._message_ids[signal_type] += 1
+        return SyntheticMessage(
+            signal_type, text, CHANNEL_IDS[signal_type], self._message_ids[signal_type], contract_address
+        )
+
+    def kol_track(self) -> Tuple[SyntheticMessage, Dict]:
+        """
+        رسالة KOL Track جديدة وحالة العملة (لتوليد رسائل Phanes التابعة لها)
+        """
+        contract_address = self.contract_address()
+        token_name = self.token_name()
+        market_cap = self.random.lognormvariate(10, 0.8)
+        text = self.kol_track_text(contract_address, token_name, self.wallets(), market_cap)
+        token = {
+            'contract_address': contract_address,
+            'token_name': token_name,
+            'ath': market_cap * self.random.uniform(1.0, 1.5),
+            'succeeds': self.random.random() < self.success_rate,
+            'remaining': 1 + self.updates_per_signal
+        }
+        return self._message('kol_track', text, contract_address), token
+
+    def phanes_update(self, token: Dict) -> SyntheticMessage:
+        """
+        رسالة Phanes لعملة: الأولى تحدد ATH الأولي، والتالية ترفعه (نجاح) أو تبقيه (فشل)
+        """
+        if token['remaining'] <= self.updates_per_signal and token['succeeds']:
+            token['ath'] *= self.random.uniform(1.05, 3.0)
+        token['remaining'] -= 1
+        signal_type = self.random.choice(self.phanes_channels)
+        text = self.phanes_text(token['contract_address'], token['token_name'], token['ath'])
+        return self._message(signal_type, text, token['contract_address'])
+
+    def stream(self, count: int) -> Iterator[SyntheticMessage]:
+        """
+        تدفق count رسالة بتداخل واقعي: إشارات جديدة وتحديثات Phanes لإشارات سابقة
+        """
+        pending: List[Dict] = []
+        new_signal_probability = 1 / (2 + self.updates_per_signal)
+        for _ in range(count):
+            if not pending or self.random.random() < new_signal_probability:
+                message, token = self.kol_track()
+                pending.append(token)
+                yield message
+            else:
+                # التحديثات تصل غالباً للإشارات الأحدث
+                index = len(pending) - 1 - min(int(self.random.expovariate(0.3)), len(pending) - 1)
+                token = pending[index]
+                yield self.phanes_update(token)
+                if token['remaining'] <= 0:
+                    pending.pop(index)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+قياس حمل إشعارات التيليجرام على Bot API وهمي محلي (benchmarks/fake_telegram_api.py)
+يرسل --messages إشعاراً عبر TelegramNotificationService.send_message_sync من --concurrency خيطاً
+(نفس مسار webhook)، مع زمن استجابة وأخطاء وحدود معدل (429 + retry_after) قابلة للضبط
+التقرير: الرسائل المُسلَّمة في الثانية، المحاولات لكل رسالة، 429 وأخطاء الخادم، وزمن الإرسال p50/p99
+
+الاستخدام (من مجلد smart_falcon_backend):
+    python benchmarks/notifications.py [--messages 300] [--concurrency 16] [--latency-ms 30] [--error-rate 0.02]
+                                       [--chat-rate 20] [--burst 20] [--global-rate 30] [--max-retries 3] [--json]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_telegram_api import FakeTelegramBotAPI
+
+CHANNEL_ID = '-1001000000099'
+
+def percentile(ordered: list, q: float):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+
+def notification_text(index: int) -> str:
+    return (
+        f"🟢 **توصية شراء قوية**\n\n"
+        f"🪙 **العملة:** BENCH{index}\n"
+        f"📋 **العقد:** `{index:044d}`\n"
+        f"📊 **النقاط:** 87.5\n\n"
+        f"**الأسباب:**\n• مجموعة ذهبية\n• محافظ عالية الأداء\n\n"
+        f"#SmartFalcon #CryptoSignal"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='قياس حمل إشعارات التيليجرام على Bot API وهمي')
+    parser.add_argument('--messages', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=30)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    parser.add_argument('--chat-rate', type=float, default=20, help='رسالة/ث للقناة (0 = دون حد)')
+    parser.add_argument('--burst', type=float, default=20)
+    parser.add_argument('--global-rate', type=float, default=30, help='رسالة/ث للبوت (0 = دون حد)')
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--max-retry-after', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    api = FakeTelegramBotAPI(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        chat_rate=args.chat_rate, burst=args.burst, global_rate=args.global_rate, seed=args.seed
+    )
+    base_url = api.start_in_thread()
+
+    # الإعدادات تُقرأ عند إنشاء الخدمة
+    os.environ.update({
+        'TELEGRAM_API_BASE_URL': base_url,
+        'TELEGRAM_BOT_TOKEN': 'bench-token',
+        'TELEGRAM_NOTIFICATION_CHANNEL_ID': CHANNEL_ID,
+        'TELEGRAM_MAX_RETRIES': str(args.max_retries),
+        'TELEGRAM_MAX_RETRY_AFTER': str(args.max_retry_after)
+    })
+    from src.services.metrics import telegram_requests
+    from src.services.telegram_service import TelegramNotificationService
+
+    logging.disable(logging.ERROR)
+    service = TelegramNotificationService()
+    latencies, outcomes = [], {'delivered': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def send(index):
+        started = time.perf_counter()
+        delivered = service.send_message_sync(notification_text(index))
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            outcomes['delivered' if delivered else 'failed'] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(send, range(args.messages)))
+    elapsed = time.perf_counter() - started
+    api.stop_thread()
+
+    ordered = sorted(latencies)
+    server = dict(api.stats)
+    results = {
+        'messages': args.messages,
+        'concurrency': args.concurrency,
+        'limits': {'chat_rate': args.chat_rate, 'burst': args.burst, 'global_rate': args.global_rate},
+        'elapsed_sec': round(elapsed, 3),
+        'delivered': outcomes['delivered'],
+        'failed': outcomes['failed'],
+        'delivered_per_sec': round(outcomes['delivered'] / elapsed, 1),
+        'attempts_per_message': round(server['requests'] / args.messages, 2) if args.messages else None,
+        'server': server,
+        'client_attempts': telegram_requests.state(),
+        'latency': {
+            'p50_ms': percentile(ordered, 0.5),
+            'p99_ms': percentile(ordered, 0.99),
+            'max_ms': round(ordered[-1] * 1000, 2) if ordered else None
+        }
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+
+    print(
+        f"الحدود: {args.chat_rate:g}/ث للقناة (دفعة {args.burst:g})، {args.global_rate:g}/ث للبوت، "
+        f"أخطاء {args.error_rate:.0%}، زمن {args.latency_ms:g}ms"
+    )
+    print(
+        f"المُسلَّم: {results['delivered']}/{args.messages} خلال {results['elapsed_sec']} ث "
+        f"({results['delivered_per_sec']} رسالة/ث)، فشل: {results['failed']}"
+    )
+    print(
+        f"المحاولات: {server['requests']} ({results['attempts_per_message']} لكل رسالة)، "
+        f"429: {server['rate_limited']}، أخطاء خادم: {server['server_errors']}"
+    )
+    print(
+        f"زمن الإرسال (مع إعادة المحاولة): p50={results['latency']['p50_ms']}ms "
+        f"p99={results['latency']['p99_ms']}ms max={results['latency']['max_ms']}ms"
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+قياس إنتاجية القراءة/الكتابة المختلطة على SQLite قبل وبعد إعدادات src/storage.py
+- الكتّاب: معاملة تشبه webhook (إشارة + روابط + تحديث عدادات المحافظ)
+- القرّاء: استعلامات تشبه لوحة التحكم (عدادات، آخر الإشارات، أفضل المحافظ)
+
+الاستخدام (من مجلد smart_falcon_backend):
+    python benchmarks/sqlite_mixed_rw.py [--seconds 5] [--writers 4] [--readers 8] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from src.models.user import db
+from src.models import smart_falcon  # noqa: F401 (تسجيل الجداول في metadata)
+from src.storage import engine_options, tune_engine
+
+WALLETS = 1000
+SEED_SIGNALS = 5000
+
+def seed(engine):
+    db.metadata.create_all(engine)
+    now = datetime.now(timezone.utc).isoformat(sep=' ')
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO wallets (wallet_unique_id, wallet_type, wallet_number, date_added, last_seen, "
+                "total_calls, successful_calls, success_rate, status) "
+                "VALUES (:id, 'KOL', :n, :now, :now, 0, 0, 0.0, 'ACTIVE')"
+            ),
+            [{'id': f'KOL_{n}', 'n': n, 'now': now} for n in range(WALLETS)]
+        )
+    for _ in range(SEED_SIGNALS // 500):
+        with engine.begin() as connection:
+            for _ in range(500):
+                write_signal(connection)
+
+def write_signal(connection):
+    signal_id = f'bench_{uuid.uuid4().hex[:16]}'
+    now = datetime.now(timezone.utc).isoformat(sep=' ')
+    wallets = random.sample(range(WALLETS), random.randint(2, 5))
+    connection.execute(
+        text(
+            "INSERT INTO signals (signal_id, contract_address, signal_time, token_name, total_wallets_involved, "
+            "wallets_details, performance_status, evaluation_complete, decision, confidence_score, decision_reasons) "
+            "VALUES (:sid, :ca, :now, 'BENCH', :n, '[]', :status, 0, 'IGNORE', 0.0, '[]')"
+        ),
+        {
+            'sid': signal_id, 'ca': uuid.uuid4().hex, 'now': now, 'n': len(wallets),
+            'status': random.choice(['PENDING', 'SUCCESS', 'FAILURE'])
+        }
+    )
+    connection.execute(
+        text(
+            "INSERT INTO signal_wallet_links (link_id, signal_id, wallet_unique_id, mc_at_buy) "
+            "VALUES (:lid, :sid, :wid, 0.0)"
+        ),
+        [{'lid': f'link_{signal_id}_{w}', 'sid': signal_id, 'wid': f'KOL_{w}'} for w in wallets]
+    )
+    connection.execute(
+        text("UPDATE wallets SET total_calls = total_calls + 1, last_seen = :now WHERE wallet_unique_id = :wid"),
+        [{'now': now, 'wid': f'KOL_{w}'} for w in wallets]
+    )
+
+def read_dashboard(connection):
+    connection.execute(text(
+        "SELECT count(id), sum(CASE WHEN performance_status = 'SUCCESS' THEN 1 ELSE 0 END), "
+        "sum(CASE WHEN performance_status = 'PENDING' THEN 1 ELSE 0 END), (SELECT count(id) FROM wallets) "
+        "FROM signals"
+    )).all()
+    connection.execute(text("SELECT * FROM signals ORDER BY signal_time DESC LIMIT 5")).all()
+    connection.execute(text(
+        "SELECT * FROM wallets WHERE total_calls >= 5 ORDER BY success_rate DESC LIMIT 10"
+    )).all()
+
+def run_mode(name: str, tuned: bool, seconds: float, writers: int, readers: int) -> dict:
+    tmp_dir = tempfile.mkdtemp(prefix='sf_bench_')
+    uri = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    if tuned:
+        engine = create_engine(uri, **engine_options(uri))
+        tune_engine(engine)
+    else:
+        # إعدادات SQLAlchemy الافتراضية كما كان التطبيق قبل طبقة التخزين
+        engine = create_engine(uri)
+
+    seed(engine)
+
+    stop = threading.Event()
+    stats = {'write': [], 'read': [], 'write_errors': 0, 'read_errors': 0}
+    lock = threading.Lock()
+
+    def worker(kind):
+        latencies = []
+        errors = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                if kind == 'write':
+                    with engine.begin() as connection:
+                        write_signal(connection)
+                else:
+                    with engine.connect() as connection:
+                        read_dashboard(connection)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+        with lock:
+            stats[kind].extend(latencies)
+            stats[f'{kind}_errors'] += errors
+
+    threads = [threading.Thread(target=worker, args=('write',)) for _ in range(writers)]
+    threads += [threading.Thread(target=worker, args=('read',)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    def summary(latencies):
+        if not latencies:
+            return {'ops_per_sec': 0, 'p50_ms': None, 'p99_ms': None}
+        ordered = sorted(latencies)
+        return {
+            'ops_per_sec': round(len(ordered) / seconds, 1),
+            'p50_ms': round(statistics.median(ordered) * 1000, 2),
+            'p99_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2)
+        }
+
+    return {
+        'mode': name,
+        'writes': summary(stats['write']),
+        'reads': summary(stats['read']),
+        'write_errors': stats['write_errors'],
+        'read_errors': stats['read_errors']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='قياس القراءة/الكتابة المختلطة على SQLite')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    results = [
+        run_mode('default', False, args.seconds, args.writers, args.readers),
+        run_mode('tuned', True, args.seconds, args.writers, args.readers)
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        print(
+            f"{result['mode']:>8}: "
+            f"كتابة {result['writes']['ops_per_sec']}/ث (p99 {result['writes']['p99_ms']} ms، أخطاء {result['write_errors']}) | "
+            f"قراءة {result['reads']['ops_per_sec']}/ث (p99 {result['reads']['p99_ms']} ms، أخطاء {result['read_errors']})"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+إعدادات gunicorn لخادم الصقر الذكي
+كل القيم قابلة للتغيير عبر متغيرات البيئة
+"""
+import logging
+import os
+from src.storage import database_uri
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# التوسع بالخيوط (gthread)، والخيوط كثيرة لأن كل اتصال SSE يشغل خيطاً طوال مدته:
+# - كاتب الإدخال واحد لكل عملية، ومع SQLite يجب أن تكون الكتابة من عملية واحدة وإلا عادت
+#   الكتّاب (واحد لكل عامل) تتنافس على قفل الكتابة، فلا يُسمح بأكثر من عامل
+# - مع قاعدة خادم (PostgreSQL وغيرها) عامل لكل نواة افتراضياً
+# - ناقل الأحداث داخل العملية: عميل /api/stream على عامل لا يرى إشارات استقبلها عامل آخر
+SQLITE = database_uri().startswith('sqlite')
+workers = int(os.getenv('WEB_CONCURRENCY', '1' if SQLITE else str(os.cpu_count() or 1)))
+if SQLITE and workers > 1:
+    logging.warning(f"WEB_CONCURRENCY={workers} غير مدعوم مع SQLite (كاتب واحد لكل عملية)، سيُستخدم عامل واحد")
+    workers = 1
+elif workers > 1:
+    logging.warning(f"WEB_CONCURRENCY={workers}: بث /api/stream يقتصر على أحداث العامل الذي يخدم الاتصال")
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+
+# تحميل التطبيق مرة واحدة في العملية الأم ومشاركة الذاكرة مع العمال
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+# مهلة إكمال الطلبات الجارية عند إعادة النشر
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# إعادة تدوير العمال دورياً للحد من تراكم الذاكرة
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '5000'))
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+def post_fork(server, worker):
+    from src.serve import init_worker
+    init_worker()
+
+def post_worker_init(worker):
+    from src.serve import install_graceful_shutdown
+    install_graceful_shutdown(worker)
+
+def worker_exit(server, worker):
+    from src.serve import shutdown_worker
+    shutdown_worker()
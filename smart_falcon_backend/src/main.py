@@ -1,18 +1,28 @@
 import os
 import sys
+import json
+import click
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
-from src.models.smart_falcon import Wallet, Signal, SignalWalletLink, TelegramMessage, SystemConfig
+from src.models.smart_falcon import Wallet, Signal, SignalWalletLink, TelegramMessage, SystemConfig, DataVersion, QuantileSketch
 from src.models.notifications import NotificationMessage
 from src.routes.user import user_bp
 from src.routes.smart_falcon import smart_falcon_bp
 from src.routes.data_import import data_import_bp
 from src.routes.analytics import analytics_bp
 from src.routes.notifications import notifications_bp
+from src.routes.stream import stream_bp
+from src.routes.metrics import metrics_bp
+from src.routes.debug import debug_bp
+from src.services.data_version import data_versions
+from src.services.ingestion_writer import ingestion_writer
+from src.services.query_profiler import query_profiler
+from src.migrations import run_migrations
+from src.storage import configure_storage, tune_engine
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'smart_falcon_secret_key_2024'
@@ -25,13 +35,82 @@ app.register_blueprint(smart_falcon_bp, url_prefix='/')
 app.register_blueprint(data_import_bp, url_prefix='/')
 app.register_blueprint(analytics_bp, url_prefix='/')
 app.register_blueprint(notifications_bp, url_prefix='/')
+app.register_blueprint(stream_bp, url_prefix='/')
+app.register_blueprint(metrics_bp, url_prefix='/')
+app.register_blueprint(debug_bp, url_prefix='/')
 
-# إعداد قاعدة البيانات
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# إعداد قاعدة البيانات (DATABASE_URL أو SQLite المحلي، انظر src/storage.py)
+configure_storage(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
-    db.create_all()
+    tune_engine(db.engine)
+data_versions.init_app(app)
+ingestion_writer.init_app(app)
+query_profiler.init_app(app)
+
+def init_db():
+    """
+    إنشاء الجداول وتطبيق الترحيلات
+    تُستدعى صراحة (flask --app src.main init-db أو عند التشغيل) وليس عند الاستيراد
+    """
+    with app.app_context():
+        db.create_all()
+        run_migrations()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """إنشاء الجداول وتطبيق ترحيلات قاعدة البيانات"""
+    init_db()
+
+@app.cli.command('rebuild-wallet-stats')
+@click.option('--since', type=click.DateTime(), default=None, help='إعادة حساب المحافظ النشطة منذ هذا الوقت فقط')
+@click.option('--chunk-size', type=int, default=5000, show_default=True, help='عدد المحافظ في كل معاملة')
+def rebuild_wallet_stats_command(since, chunk_size):
+    """إعادة بناء إحصائيات المحافظ من الإشارات والروابط"""
+    from src.services.wallet_stats import rebuild_wallet_stats
+    with app.app_context():
+        summary = rebuild_wallet_stats(since, chunk_size)
+    click.echo(json.dumps(summary, ensure_ascii=False))
+
+@app.cli.command('rebuild-profit-sketches')
+def rebuild_profit_sketches_command():
+    """إعادة بناء ملخصات مئينات مضاعف الربح من الإشارات المُقيَّمة"""
+    from src.services.analyzer import SmartFalconAnalyzer
+    from src.services.profit_quantiles import rebuild_profit_sketches
+    with app.app_context():
+        summary = rebuild_profit_sketches(SmartFalconAnalyzer().golden_clusters())
+    click.echo(json.dumps(summary, ensure_ascii=False))
+
+@app.cli.command('replay')
+@click.option('--source', required=True, help='قاعدة البيانات المصدر (مسار ملف SQLite أو عنوان SQLAlchemy)')
+@click.option('--target', required=True, help='قاعدة البيانات الهدف الفارغة، نفس DATABASE_URL (مسار ملف SQLite أو عنوان SQLAlchemy)')
+@click.option('--speed', default='max', show_default=True, help='realtime أو max أو مضاعف مثل 10x')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='عدد الرسائل في كل قراءة من المصدر')
+@click.option('--since', type=click.DateTime(), default=None, help='من وقت الاستقبال هذا (UTC)')
+@click.option('--until', type=click.DateTime(), default=None, help='حتى وقت الاستقبال هذا (UTC)')
+@click.option('--limit', type=int, default=None, help='أقصى عدد رسائل')
+@click.option('--no-compare', is_flag=True, help='دون مقارنة النتائج بـ processing_result المخزنة')
+def replay_command(source, target, speed, batch_size, since, until, limit, no_compare):
+    """إعادة تشغيل رسائل telegram_messages المخزنة عبر خط الإدخال في قاعدة جديدة (--target = DATABASE_URL)"""
+    from src.services.replay import ReplayEngine, parse_speed
+    try:
+        engine = ReplayEngine(
+            source, speed=parse_speed(speed), batch_size=batch_size,
+            since=since, until=until, limit=limit, compare=not no_compare
+        )
+        # قبل init_db حتى لا تُنشأ جداول أو تُطبق ترحيلات في قاعدة خاطئة
+        with app.app_context():
+            engine.check_target(target, db.engine)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    init_db()
+    with app.app_context():
+        try:
+            summary = engine.run()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    click.echo(json.dumps(summary, ensure_ascii=False, indent=2))
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -51,4 +130,6 @@ def serve(path):
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # خادم التطوير فقط؛ في الإنتاج استخدم python src/serve.py
+    init_db()
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG') == '1')
@@ -0,0 +1,123 @@
+"""
+ترحيلات مخطط قاعدة البيانات
+db.create_all لا يعدّل الجداول الموجودة، لذلك تُطبَّق التعديلات اللاحقة (فهارس، أعمدة)
+هنا بالترتيب مرة واحدة لكل قاعدة بيانات، ويُسجَّل ما طُبِّق في جدول schema_migrations
+"""
+import uuid
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import inspect, text
+from src.models.user import db
+
+logging.basicConfig(level=logging.INFO)
+
+def add_column(table: str, column: str, ddl: str):
+    """
+    خطوة ترحيل تضيف عموداً إن لم يكن موجوداً (القواعد الجديدة تنشئه عبر db.create_all)
+    """
+    def step(connection):
+        columns = {c['name'] for c in inspect(connection).get_columns(table)}
+        if column not in columns:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+def seed_data_versions(connection):
+    """
+    خطوة ترحيل تزرع صفوف data_versions لكل الجداول المتتبعة، فلا تضيفها أول معاملة كتابة
+    """
+    from src.services.data_version import TRACKED_TABLES, insert_missing_versions
+    insert_missing_versions(connection, TRACKED_TABLES, datetime.now(timezone.utc))
+
+def seed_database_id(connection):
+    """
+    خطوة ترحيل تزرع معرفاً عشوائياً لقاعدة البيانات في system_config (database_id)
+    يميز القواعد التي تتطابق إصدارات بياناتها (نسخة مستعادة، قاعدة اختبار، هدف replay)
+    """
+    if connection.execute(text("SELECT 1 FROM system_config WHERE config_key = 'database_id'")).first():
+        return
+    connection.execute(
+        text(
+            "INSERT INTO system_config (config_key, config_value, description, updated_at) "
+            "VALUES ('database_id', :value, :description, :at)"
+        ),
+        {
+            'value': uuid.uuid4().hex,
+            'description': 'معرف عشوائي لقاعدة البيانات (يُزرع مرة واحدة)',
+            'at': datetime.now(timezone.utc).replace(tzinfo=None).isoformat(sep=' ')
+        }
+    )
+
+# (معرف الترحيل، قائمة أوامر SQL أو دوال تستقبل الاتصال) — لا تعدّل ترحيلاً بعد نشره، أضف ترحيلاً جديداً
+MIGRATIONS = [
+    ('0001_pagination_indexes', [
+        "CREATE INDEX IF NOT EXISTS ix_signals_signal_time_id ON signals (signal_time, id)",
+        "CREATE INDEX IF NOT EXISTS ix_signals_status_time_id ON signals (performance_status, signal_time, id)",
+        "CREATE INDEX IF NOT EXISTS ix_wallets_success_rate_id ON wallets (success_rate, id)",
+        "CREATE INDEX IF NOT EXISTS ix_wallets_total_calls_id ON wallets (total_calls, id)",
+        "CREATE INDEX IF NOT EXISTS ix_wallets_last_seen_id ON wallets (last_seen, id)",
+    ]),
+    ('0002_telegram_message_ids', [
+        add_column('telegram_messages', 'channel_id', 'BIGINT'),
+        add_column('telegram_messages', 'telegram_message_id', 'BIGINT'),
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_telegram_messages_channel_message "
+        "ON telegram_messages (channel_id, telegram_message_id)",
+    ]),
+    ('0003_signal_wallet_links_indexes', [
+        "CREATE INDEX IF NOT EXISTS ix_signal_wallet_links_wallet_signal "
+        "ON signal_wallet_links (wallet_unique_id, signal_id)",
+        "CREATE INDEX IF NOT EXISTS ix_signal_wallet_links_signal ON signal_wallet_links (signal_id)",
+    ]),
+    # القيم الأولية تُحسب من التاريخ عبر rebuild-wallet-stats
+    ('0004_wallet_decayed_stats', [
+        add_column('wallets', 'decayed_calls', 'FLOAT DEFAULT 0.0'),
+        add_column('wallets', 'decayed_successes', 'FLOAT DEFAULT 0.0'),
+        add_column('wallets', 'decayed_success_rate', 'FLOAT DEFAULT 0.0'),
+        add_column('wallets', 'decay_updated_ts', 'FLOAT'),
+    ]),
+    ('0005_signals_open_contract_index', [
+        "CREATE INDEX IF NOT EXISTS ix_signals_open_contract ON signals (evaluation_complete, contract_address)",
+    ]),
+    ('0006_seed_data_versions', [
+        seed_data_versions,
+    ]),
+    ('0007_database_id', [
+        seed_database_id,
+    ]),
+]
+
+def run_migrations(engine=None) -> list:
+    """
+    تطبيق الترحيلات غير المطبقة وإرجاع معرفاتها
+    """
+    engine = engine or db.engine
+    applied_now = []
+
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "migration_id VARCHAR(100) PRIMARY KEY, "
+            "applied_at VARCHAR(40) NOT NULL)"
+        ))
+        applied = {
+            row[0] for row in connection.execute(text("SELECT migration_id FROM schema_migrations"))
+        }
+
+    for migration_id, statements in MIGRATIONS:
+        if migration_id in applied:
+            continue
+
+        with engine.begin() as connection:
+            for statement in statements:
+                if callable(statement):
+                    statement(connection)
+                else:
+                    connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO schema_migrations (migration_id, applied_at) VALUES (:id, :at)"),
+                {'id': migration_id, 'at': datetime.now(timezone.utc).isoformat()}
+            )
+
+        applied_now.append(migration_id)
+        logging.info(f"تم تطبيق الترحيل {migration_id}")
+
+    return applied_now
@@ -15,6 +15,26 @@ class Wallet(db.Model):
     successful_calls = db.Column(db.Integer, default=0)
     success_rate = db.Column(db.Float, default=0.0)
     status = db.Column(db.String(20), default='ACTIVE')
+    # عدادات متناقصة زمنياً (EWMA بنصف عمر ثابت، انظر src/services/wallet_stats.py)
+    # النسبة بينها لا تتغير بين التحديثات لأن العدادين يتناقصان بنفس المعامل
+    decayed_calls = db.Column(db.Float, default=0.0)
+    decayed_successes = db.Column(db.Float, default=0.0)
+    decayed_success_rate = db.Column(db.Float, default=0.0)
+    decay_updated_ts = db.Column(db.Float)  # epoch بالثواني
+    
+    # الحقول المتاحة لقوائم API (نفس مفاتيح to_dict)
+    SERIALIZED_FIELDS = (
+        'id', 'wallet_unique_id', 'wallet_type', 'wallet_number', 'date_added', 'last_seen',
+        'total_calls', 'successful_calls', 'success_rate', 'status',
+        'decayed_calls', 'decayed_successes', 'decayed_success_rate', 'decay_updated_ts'
+    )
+    
+    # فهارس الترقيم بالمؤشر (انظر src/migrations.py لقواعد البيانات الموجودة)
+    __table_args__ = (
+        db.Index('ix_wallets_success_rate_id', 'success_rate', 'id'),
+        db.Index('ix_wallets_total_calls_id', 'total_calls', 'id'),
+        db.Index('ix_wallets_last_seen_id', 'last_seen', 'id'),
+    )
     
     def __repr__(self):
         return f'<Wallet {self.wallet_unique_id}>'
@@ -30,7 +50,11 @@ class Wallet(db.Model):
             'total_calls': self.total_calls,
             'successful_calls': self.successful_calls,
             'success_rate': self.success_rate,
-            'status': self.status
+            'status': self.status,
+            'decayed_calls': self.decayed_calls,
+            'decayed_successes': self.decayed_successes,
+            'decayed_success_rate': self.decayed_success_rate,
+            'decay_updated_ts': self.decay_updated_ts
         }
 
 class Signal(db.Model):
@@ -52,6 +76,22 @@ class Signal(db.Model):
     confidence_score = db.Column(db.Float, default=0.0)
     decision_reasons = db.Column(db.Text)  # JSON string
     
+    # الحقول المتاحة لقوائم API (نفس مفاتيح to_dict)، وأعمدة JSON المخزنة كنص
+    SERIALIZED_FIELDS = (
+        'id', 'signal_id', 'contract_address', 'signal_time', 'token_name', 'total_wallets_involved',
+        'wallets_details', 'initial_ath_usd', 'final_ath_usd', 'profit_multiplier', 'performance_status',
+        'evaluation_complete', 'decision', 'confidence_score', 'decision_reasons'
+    )
+    JSON_FIELDS = ('wallets_details', 'decision_reasons')
+    
+    # فهارس الترقيم بالمؤشر (انظر src/migrations.py لقواعد البيانات الموجودة)
+    __table_args__ = (
+        db.Index('ix_signals_signal_time_id', 'signal_time', 'id'),
+        db.Index('ix_signals_status_time_id', 'performance_status', 'signal_time', 'id'),
+        # الإشارات المفتوحة حسب العقد (بحث تحديثات Phanes ومرشح المستمع)
+        db.Index('ix_signals_open_contract', 'evaluation_complete', 'contract_address'),
+    )
+    
     def __repr__(self):
         return f'<Signal {self.signal_id}>'
     
@@ -87,6 +127,12 @@ class SignalWalletLink(db.Model):
     signal = db.relationship('Signal', backref=db.backref('wallet_links', lazy=True))
     wallet = db.relationship('Wallet', backref=db.backref('signal_links', lazy=True))
     
+    # فهارس التجميع حسب المحفظة والبحث حسب الإشارة (انظر src/migrations.py لقواعد البيانات الموجودة)
+    __table_args__ = (
+        db.Index('ix_signal_wallet_links_wallet_signal', 'wallet_unique_id', 'signal_id'),
+        db.Index('ix_signal_wallet_links_signal', 'signal_id'),
+    )
+    
     def __repr__(self):
         return f'<SignalWalletLink {self.link_id}>'
     
@@ -109,6 +155,13 @@ class TelegramMessage(db.Model):
     received_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     processed = db.Column(db.Boolean, default=False)
     processing_result = db.Column(db.Text)  # JSON string for processing results
+    # معرفات تيليجرام الأصلية (يرسلها المستمع) لمنع معالجة الرسالة نفسها مرتين
+    channel_id = db.Column(db.BigInteger)
+    telegram_message_id = db.Column(db.BigInteger)
+    
+    __table_args__ = (
+        db.Index('ux_telegram_messages_channel_message', 'channel_id', 'telegram_message_id', unique=True),
+    )
     
     def __repr__(self):
         return f'<TelegramMessage {self.message_id}>'
@@ -121,7 +174,9 @@ class TelegramMessage(db.Model):
             'message_text': self.message_text,
             'received_time': self.received_time.isoformat() if self.received_time else None,
             'processed': self.processed,
-            'processing_result': json.loads(self.processing_result) if self.processing_result else {}
+            'processing_result': json.loads(self.processing_result) if self.processing_result else {},
+            'channel_id': self.channel_id,
+            'telegram_message_id': self.telegram_message_id
         }
 
 class SystemConfig(db.Model):
@@ -145,3 +200,48 @@ class SystemConfig(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), unique=True, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.table_name}={self.version}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'table_name': self.table_name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class QuantileSketch(db.Model):
+    __tablename__ = 'quantile_sketches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sketch_key = db.Column(db.String(200), unique=True, nullable=False)  # metric:subject_type:subject_id
+    metric = db.Column(db.String(50), nullable=False)  # profit_multiplier
+    subject_type = db.Column(db.String(20), nullable=False)  # wallet or cluster
+    subject_id = db.Column(db.String(150), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    data = db.Column(db.Text)  # TDigest JSON (src/services/sketches.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<QuantileSketch {self.sketch_key}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'metric': self.metric,
+            'subject_type': self.subject_type,
+            'subject_id': self.subject_id,
+            'count': self.count,
+            'data': json.loads(self.data) if self.data else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,26 +1,89 @@
 from flask import Blueprint, request, jsonify
-from src.services.pattern_analyzer import AdvancedPatternAnalyzer
+from src.services.http_cache import conditional_get
 from src.models.user import db
 from src.models.smart_falcon import Wallet, Signal, SignalWalletLink
+from src.services.wallet_stats import current_decayed_calls, DECAY_HALF_LIFE_HOURS
+from src.services.profit_quantiles import merged_digest, load_digests, summarize, cluster_id, DEFAULT_PERCENTILES
 import logging
+import os
+import threading
 
 analytics_bp = Blueprint('analytics', __name__)
-analyzer = AdvancedPatternAnalyzer()
+
+# الجداول التي تقرأها التحليلات (نفس جداول اللقطة العمودية)
+ANALYTICS_TABLES = ('signals', 'signal_wallet_links', 'wallets')
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_analyzer():
+    """
+    إنشاء المحلل عند أول طلب تحليلات، فهو يستورد numpy ويهيئ مخزن اللقطات
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                from src.services.pattern_analyzer import AdvancedPatternAnalyzer
+                from src.services.analytics_snapshot import AnalyticsSnapshotStore
+                
+                # اللقطات العمودية للتحليلات (يمكن تعطيلها بـ ANALYTICS_SNAPSHOT_ENABLED=0)
+                snapshot_store = None
+                if os.getenv('ANALYTICS_SNAPSHOT_ENABLED', '1') == '1':
+                    snapshot_store = AnalyticsSnapshotStore(
+                        os.getenv(
+                            'ANALYTICS_SNAPSHOT_DIR',
+                            os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'analytics_snapshots')
+                        ),
+                        min_refresh_interval=float(os.getenv('ANALYTICS_SNAPSHOT_REFRESH_SECONDS', '30'))
+                    )
+                _analyzer = AdvancedPatternAnalyzer(snapshot_store=snapshot_store)
+    return _analyzer
+
+def snapshot_version() -> str:
+    """
+    نتائج التحليل قد تأتي من لقطة أقدم من إصدار البيانات، فيدخل إصدارها في الـ ETag
+    """
+    if _analyzer is None or _analyzer.snapshot_store is None:
+        return ''
+    return _analyzer.snapshot_store.current_version
 
 @analytics_bp.route('/api/analytics/patterns', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES, key_func=snapshot_version)
 def get_pattern_insights():
     """
     الحصول على رؤى شاملة للأنماط
     """
     try:
-        insights = analyzer.get_pattern_insights()
+        insights = get_analyzer().get_pattern_insights()
         return jsonify(insights)
         
     except Exception as e:
         logging.error(f"خطأ في جلب رؤى الأنماط: {e}")
         return jsonify({'error': str(e)}), 500
 
+def parse_include_signals(value):
+    """
+    تحليل معامل ?include_signals=: غير محدد أو true لمعاينة مختصرة، all للكل،
+    false أو 0 بدون إشارات، أو عدد أقصى لكل مجموعة
+    """
+    from src.services.pattern_analyzer import CLUSTER_SIGNALS_PREVIEW
+    if value is None or value.lower() in ('true', 'yes'):
+        return CLUSTER_SIGNALS_PREVIEW
+    if value.lower() == 'all':
+        return None
+    if value.lower() in ('false', 'no', 'none'):
+        return 0
+    try:
+        signals_limit = int(value)
+    except ValueError:
+        raise ValueError('include_signals يجب أن يكون true أو false أو all أو عدداً')
+    if signals_limit < 0:
+        raise ValueError('include_signals لا يمكن أن يكون سالباً')
+    return signals_limit
+
 @analytics_bp.route('/api/analytics/clusters', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES, key_func=snapshot_version)
 def analyze_clusters():
     """
     تحليل مجموعات المحافظ
@@ -31,20 +94,57 @@ def analyze_clusters():
         if cluster_size < 2 or cluster_size > 5:
             return jsonify({'error': 'حجم المجموعة يجب أن يكون بين 2 و 5'}), 400
         
-        analysis = analyzer.analyze_wallet_clusters(cluster_size)
+        from src.services.pattern_analyzer import CLUSTER_MODES
+        mode = request.args.get('mode', 'auto')
+        if mode not in CLUSTER_MODES:
+            return jsonify({'error': f"وضع التحليل يجب أن يكون أحد: {', '.join(CLUSTER_MODES)}"}), 400
+        
+        limit = request.args.get('limit', 10, type=int)
+        if limit < 1 or limit > 100:
+            return jsonify({'error': 'limit يجب أن يكون بين 1 و 100'}), 400
+        
+        signals_limit = parse_include_signals(request.args.get('include_signals'))
+        
+        analysis = get_analyzer().analyze_wallet_clusters(cluster_size, mode, limit, signals_limit)
         return jsonify(analysis)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logging.error(f"خطأ في تحليل المجموعات: {e}")
         return jsonify({'error': str(e)}), 500
 
+@analytics_bp.route('/api/analytics/clusters/signals', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES)
+def get_cluster_signals():
+    """
+    كل الإشارات المقيّمة لمجموعة محافظ واحدة (?wallets=KOL_15,KOL_22)، لجلب ما اقتُطع من نتائج المجموعات
+    """
+    try:
+        wallets = [w.strip() for w in request.args.get('wallets', '').split(',') if w.strip()]
+        if len(wallets) < 2:
+            return jsonify({'error': 'حدد محفظتين على الأقل عبر ?wallets='}), 400
+        
+        signals = get_analyzer().get_cluster_signals(wallets)
+        return jsonify({
+            'cluster': sorted(set(wallets)),
+            'total_calls': len(signals),
+            'successful_calls': sum(1 for s in signals if s['performance_status'] == 'SUCCESS'),
+            'signals': signals
+        })
+        
+    except Exception as e:
+        logging.error(f"خطأ في جلب إشارات المجموعة: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @analytics_bp.route('/api/analytics/performance', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES, key_func=snapshot_version)
 def analyze_performance():
     """
     تحليل أداء المحافظ الفردية
     """
     try:
-        analysis = analyzer.analyze_individual_performance()
+        analysis = get_analyzer().analyze_individual_performance()
         return jsonify(analysis)
         
     except Exception as e:
@@ -52,12 +152,13 @@ def analyze_performance():
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/api/analytics/time-patterns', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES, key_func=snapshot_version)
 def analyze_time_patterns():
     """
     تحليل الأنماط الزمنية
     """
     try:
-        analysis = analyzer.analyze_time_patterns()
+        analysis = get_analyzer().analyze_time_patterns()
         return jsonify(analysis)
         
     except Exception as e:
@@ -65,12 +166,13 @@ def analyze_time_patterns():
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/api/analytics/rules', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES, key_func=snapshot_version)
 def get_smart_rules():
     """
     الحصول على القواعد الذكية
     """
     try:
-        rules = analyzer.generate_smart_rules()
+        rules = get_analyzer().generate_smart_rules()
         return jsonify(rules)
         
     except Exception as e:
@@ -78,6 +180,7 @@ def get_smart_rules():
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/api/analytics/wallet/<wallet_id>', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES, key_func=snapshot_version)
 def get_wallet_analysis(wallet_id):
     """
     تحليل مفصل لمحفظة معينة
@@ -92,25 +195,29 @@ def get_wallet_analysis(wallet_id):
         links = SignalWalletLink.query.filter_by(wallet_unique_id=wallet_id).all()
         signal_ids = [link.signal_id for link in links]
         
-        signals = Signal.query.filter(Signal.signal_id.in_(signal_ids)).all()
+        # مرتبة زمنياً حتى تكون recent_signals (آخر 10) هي الأحدث فعلاً
+        signals = Signal.query.filter(Signal.signal_id.in_(signal_ids)).order_by(Signal.signal_time, Signal.id).all()
         
         # تحليل الأداء
         successful_signals = [s for s in signals if s.performance_status == 'SUCCESS']
         failed_signals = [s for s in signals if s.performance_status == 'FAILURE']
         pending_signals = [s for s in signals if s.performance_status == 'PENDING']
         
-        # تحليل الشركاء المتكررين
+        # تحليل الشركاء المتكررين: روابط كل إشارات المحفظة باستعلام واحد بدل استعلام لكل إشارة
+        status_by_signal = {signal.signal_id: signal.performance_status for signal in signals}
+        partner_links = db.session.query(SignalWalletLink.signal_id, SignalWalletLink.wallet_unique_id).filter(
+            SignalWalletLink.signal_id.in_(list(status_by_signal)),
+            SignalWalletLink.wallet_unique_id != wallet_id
+        ).all()
+        
         partner_analysis = {}
-        for signal in signals:
-            signal_links = SignalWalletLink.query.filter_by(signal_id=signal.signal_id).all()
-            partners = [link.wallet_unique_id for link in signal_links if link.wallet_unique_id != wallet_id]
-            
-            for partner in partners:
-                if partner not in partner_analysis:
-                    partner_analysis[partner] = {'total': 0, 'successful': 0}
-                partner_analysis[partner]['total'] += 1
-                if signal.performance_status == 'SUCCESS':
-                    partner_analysis[partner]['successful'] += 1
+        for link in partner_links:
+            partner = link.wallet_unique_id
+            if partner not in partner_analysis:
+                partner_analysis[partner] = {'total': 0, 'successful': 0}
+            partner_analysis[partner]['total'] += 1
+            if status_by_signal[link.signal_id] == 'SUCCESS':
+                partner_analysis[partner]['successful'] += 1
         
         # حساب معدلات النجاح للشركاء
         for partner_data in partner_analysis.values():
@@ -143,7 +250,10 @@ def get_wallet_analysis(wallet_id):
                 for partner, data in top_partners
             ],
             'performance_trend': {
-                'recent_success_rate': len([s for s in signals[-20:] if s.performance_status == 'SUCCESS']) / min(20, len(signals)) if signals else 0,
+                # معدل متناقص زمنياً يُحدَّث مع كل إشارة وتقييم دون مسح التاريخ
+                'recent_success_rate': wallet.decayed_success_rate or 0.0,
+                'recent_calls_weight': current_decayed_calls(wallet.decayed_calls, wallet.decay_updated_ts),
+                'half_life_hours': DECAY_HALF_LIFE_HOURS,
                 'overall_success_rate': wallet.success_rate
             }
         }
@@ -155,6 +265,7 @@ def get_wallet_analysis(wallet_id):
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/api/analytics/signal/<signal_id>', methods=['GET'])
+@conditional_get(*ANALYTICS_TABLES, key_func=snapshot_version)
 def get_signal_analysis(signal_id):
     """
     تحليل مفصل لإشارة معينة
@@ -208,3 +319,80 @@ def get_signal_analysis(signal_id):
         logging.error(f"خطأ في تحليل الإشارة {signal_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
+def parse_percentiles(value):
+    """
+    تحليل معامل ?q=0.5,0.9 (قيم بين 0 و 1)
+    """
+    if not value:
+        return DEFAULT_PERCENTILES
+    percentiles = tuple(float(q) for q in value.split(',') if q.strip())
+    if not percentiles or any(q < 0 or q > 1 for q in percentiles):
+        raise ValueError('قيم المئينات يجب أن تكون بين 0 و 1')
+    return percentiles
+
+@analytics_bp.route('/api/analytics/quantiles/wallet/<wallet_id>', methods=['GET'])
+@conditional_get('quantile_sketches')
+def get_wallet_quantiles(wallet_id):
+    """
+    مئينات مضاعف الربح لمحفظة من ملخصها المخزن (دون قراءة إشاراتها)
+    """
+    try:
+        percentiles = parse_percentiles(request.args.get('q'))
+        digest = load_digests('wallet', [wallet_id]).get(wallet_id)
+        if digest is None:
+            return jsonify({'error': 'لا يوجد ملخص لهذه المحفظة'}), 404
+        return jsonify({'wallet_id': wallet_id, 'metric': 'profit_multiplier', **summarize(digest, percentiles)})
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"خطأ في جلب مئينات المحفظة {wallet_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/api/analytics/quantiles/merge', methods=['GET'])
+@conditional_get('quantile_sketches')
+def get_merged_quantiles():
+    """
+    مئينات مضاعف الربح لمجموعة محافظ عبر دمج ملخصاتها (?wallets=KOL_1,KOL_15)
+    ملاحظة: الإشارة المشتركة بين عدة محافظ تُحسب مرة لكل محفظة
+    """
+    try:
+        wallets = [w.strip() for w in request.args.get('wallets', '').split(',') if w.strip()]
+        if not wallets:
+            return jsonify({'error': 'حدد المحافظ عبر ?wallets='}), 400
+        percentiles = parse_percentiles(request.args.get('q'))
+        return jsonify({
+            'wallets': wallets,
+            'metric': 'profit_multiplier',
+            **summarize(merged_digest('wallet', wallets), percentiles)
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"خطأ في دمج المئينات: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/api/analytics/quantiles/clusters', methods=['GET'])
+@conditional_get('quantile_sketches')
+def get_cluster_quantiles():
+    """
+    مئينات مضاعف الربح للمجموعات الذهبية (للإشارات التي شاركت فيها المجموعة كاملة)
+    """
+    try:
+        percentiles = parse_percentiles(request.args.get('q'))
+        clusters = [cluster_id(c) for c in get_analyzer().golden_clusters()]
+        digests = load_digests('cluster', clusters)
+        return jsonify({
+            'metric': 'profit_multiplier',
+            'clusters': [
+                {'cluster': cluster, 'wallets': cluster.split('+'), **summarize(digests[cluster], percentiles)}
+                for cluster in clusters if cluster in digests
+            ]
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"خطأ في جلب مئينات المجموعات: {e}")
+        return jsonify({'error': str(e)}), 500
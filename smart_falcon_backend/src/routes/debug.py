@@ -0,0 +1,23 @@
+from flask import Blueprint, request, jsonify
+from src.services.query_profiler import query_profiler
+import logging
+
+debug_bp = Blueprint('debug', __name__)
+
+@debug_bp.route('/debug/queries', methods=['GET', 'DELETE'])
+def get_query_report():
+    """
+    تقرير محلل الاستعلامات: إجماليات كل نقطة وأنماط N+1 وآخر الطلبات (SQL_PROFILER_ENABLED=1)
+    DELETE لتصفير التقرير
+    """
+    if not query_profiler.enabled:
+        return jsonify({'error': 'محلل الاستعلامات معطل (SQL_PROFILER_ENABLED=1 لتفعيله)'}), 404
+    try:
+        if request.method == 'DELETE':
+            query_profiler.reset()
+            return jsonify({'status': 'success'})
+        return jsonify(query_profiler.report())
+        
+    except Exception as e:
+        logging.error(f"خطأ في تقرير الاستعلامات: {e}")
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,18 @@
+from flask import Blueprint, Response, jsonify
+from src.services.metrics import metrics
+import logging
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def export_metrics():
+    """
+    مقاييس خط الإدخال بصيغة Prometheus النصية
+    """
+    if not metrics.enabled:
+        return jsonify({'error': 'المقاييس معطلة (METRICS_ENABLED=0)'}), 404
+    try:
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        logging.error(f"خطأ في تصدير المقاييس: {e}")
+        return jsonify({'error': str(e)}), 500
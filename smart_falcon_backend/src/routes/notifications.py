@@ -3,6 +3,7 @@ from src.models.user import db
 from src.models.smart_falcon import SystemConfig
 from src.models.notifications import NotificationMessage
 from src.services.telegram_service import telegram_service
+from src.services.pagination import clamp_per_page
 from datetime import datetime, timezone
 import json
 import logging
@@ -54,7 +55,7 @@ def get_notification_history():
     """
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = clamp_per_page(request.args.get('per_page', 20, type=int))
         
         notifications = NotificationMessage.query.order_by(
             NotificationMessage.timestamp.desc()
@@ -1,10 +1,28 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from src.models.user import db
 from src.models.smart_falcon import Wallet, Signal, SignalWalletLink, TelegramMessage, SystemConfig
 from src.services.analyzer import SmartFalconAnalyzer
 from src.services.telegram_service import telegram_service
+from src.services.pagination import keyset_page, clamp_per_page, cached_count, page_info, InvalidCursor
+from src.services.data_version import data_versions
+from src.services.cache import TTLCache
+from src.services.http_cache import conditional_get
+from src.services.event_bus import event_bus
+from src.services.ingestion_writer import ingestion_writer
+from src.services.clock import clock
+from src.services.metrics import span, webhook_messages, decisions
+from src.services.profit_quantiles import record_profit_multiplier
+from src.services.wallet_stats import (
+    wallet_unique_id, fetch_wallet_performance, record_wallet_calls, record_signal_success, rebuild_wallet_stats
+)
+from src.services.serialization import parse_fields, project_columns, rows_to_dicts, json_response, InvalidFields
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Tuple
+import os
 import json
+import hashlib
 import uuid
 import logging
 import asyncio
@@ -15,134 +33,402 @@ logging.basicConfig(level=logging.INFO)
 smart_falcon_bp = Blueprint('smart_falcon', __name__)
 analyzer = SmartFalconAnalyzer()
 
+# ذاكرة مؤقتة قصيرة العمر لإحصائيات لوحة التحكم
+dashboard_cache = TTLCache(maxsize=4, ttl=5)
+
+# آخر الرسائل المعالجة: (channel_id, telegram_message_id) -> استجابة webhook
+# تجعل إعادة الإرسال من المستمع مجانية دون الوصول لقاعدة البيانات أو الكاتب
+recent_messages = TTLCache(maxsize=10000, ttl=3600)
+
+# أقصى عدد رسائل في طلب /webhook/telegram/batch الواحد
+WEBHOOK_BATCH_MAX = int(os.getenv('WEBHOOK_BATCH_MAX', '500'))
+
 @smart_falcon_bp.route('/webhook/telegram', methods=['POST'])
 def telegram_webhook():
     """
     نقطة استقبال الرسائل من خدمة المستمع الحي
     """
+    with span('webhook'):
+        return handle_webhook()
+
+def handle_webhook():
+    signal_type = None
     try:
         data = request.get_json()
         if not data:
+            webhook_messages.inc('unknown', 'invalid')
             return jsonify({'error': 'لا توجد بيانات'}), 400
         
         signal_type = data.get('signal_type')
         message_text = data.get('message_text')
         
         if not signal_type or not message_text:
+            webhook_messages.inc(signal_type or 'unknown', 'invalid')
             return jsonify({'error': 'بيانات ناقصة'}), 400
         
-        # حفظ الرسالة في قاعدة البيانات
-        message_id = str(uuid.uuid4())
-        telegram_message = TelegramMessage(
-            message_id=message_id,
-            channel_type=signal_type,
-            message_text=message_text,
-            received_time=datetime.now(timezone.utc)
-        )
-        db.session.add(telegram_message)
+        # معرفات تيليجرام الأصلية تجعل الاستقبال idempotent عند إعادة الإرسال
+        try:
+            channel_id, telegram_message_id = parse_telegram_ids(data)
+        except ValueError:
+            webhook_messages.inc(signal_type, 'invalid')
+            return jsonify({'error': 'معرفات رسالة غير صالحة'}), 400
+        
+        key = (channel_id, telegram_message_id) if telegram_message_id is not None else None
+        if key is not None:
+            cached = recent_messages.get(key)
+            if cached is not None:
+                webhook_messages.inc(signal_type, 'duplicate')
+                return jsonify({**cached, 'duplicate': True})
+        
+        # الكتابة عبر الكاتب الوحيد: ننتظر حفظ الدفعة التي تضم الرسالة ثم نكمل الآثار الجانبية
+        try:
+            with span('ingest'):
+                outcome = ingestion_writer.run(
+                    ingest_message, signal_type, message_text, str(uuid.uuid4()),
+                    datetime.now(timezone.utc), channel_id, telegram_message_id
+                )
+        except IntegrityError:
+            # عامل آخر حفظ الرسالة نفسها أولاً
+            if key is None:
+                raise
+            outcome = find_ingested_message(channel_id, telegram_message_id)
+            if outcome is None:
+                raise
+        
+        if not outcome.duplicate:
+            with span('side_effects'):
+                dispatch_side_effects(outcome.message_id, outcome.result, outcome.effects)
+        
+        response = {
+            'status': 'success',
+            'message_id': outcome.message_id,
+            'processing_result': outcome.result
+        }
+        if key is not None:
+            recent_messages.set(key, response)
+        if outcome.duplicate:
+            webhook_messages.inc(signal_type, 'duplicate')
+            return jsonify({**response, 'duplicate': True})
+        webhook_messages.inc(signal_type, 'processed')
+        return jsonify(response)
         
-        # معالجة الرسالة حسب النوع
-        if signal_type == 'kol_track':
-            result = process_kol_track_signal(message_text, message_id)
-        elif signal_type in ['phanes_nf', 'phanes_15m']:
-            result = process_phanes_update(message_text, signal_type)
-        else:
-            result = {'error': 'نوع إشارة غير معروف'}
+    except Exception as e:
+        webhook_messages.inc(signal_type or 'unknown', 'error')
+        logging.error(f"خطأ في معالجة webhook: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@smart_falcon_bp.route('/webhook/telegram/batch', methods=['POST'])
+def telegram_webhook_batch():
+    """
+    استقبال دفعة رسائل من وضع التعبئة في المستمع (رسائل فاتته أثناء التوقف)
+    """
+    with span('webhook_batch'):
+        return handle_webhook_batch()
+
+def handle_webhook_batch():
+    """
+    كل الرسائل تُرسل للكاتب دفعة واحدة بترتيبها ثم تُنتظر نتائجها، فتُحفظ بعدد قليل من المعاملات
+    الرسائل المكررة (داخل الدفعة أو في recent_messages أو في قاعدة البيانات) تُرجع نتيجتها الأصلية
+    الرسالة التي تحمل message_date تُعالج بوقت نشرها الأصلي (الساعة الافتراضية) حتى تُقيَّم الإشارات
+    بمهلتها الأصلية، و notify=false يمنع إرسال توصيات متأخرة إلى تيليجرام
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        messages = data.get('messages')
+        if not isinstance(messages, list) or not messages:
+            return jsonify({'error': 'لا توجد رسائل'}), 400
+        if len(messages) > WEBHOOK_BATCH_MAX:
+            return jsonify({'error': f'الحد الأقصى للدفعة {WEBHOOK_BATCH_MAX} رسالة'}), 413
+        notify = bool(data.get('notify', True))
+        
+        results = [None] * len(messages)
+        pending = []
+        # مفتاح الرسالة -> موضع أول ظهور لها في الدفعة، و (موضع التكرار، موضع الأصل)
+        batch_keys = {}
+        repeats = []
+        for index, item in enumerate(messages):
+            item = item if isinstance(item, dict) else {}
+            signal_type = item.get('signal_type')
+            message_text = item.get('message_text')
+            if not signal_type or not message_text:
+                webhook_messages.inc(signal_type or 'unknown', 'invalid')
+                results[index] = {'status': 'invalid', 'error': 'بيانات ناقصة'}
+                continue
+            try:
+                channel_id, telegram_message_id = parse_telegram_ids(item)
+                received_time = parse_message_date(item)
+            except ValueError:
+                webhook_messages.inc(signal_type, 'invalid')
+                results[index] = {'status': 'invalid', 'error': 'معرفات رسالة غير صالحة'}
+                continue
+            
+            key = (channel_id, telegram_message_id) if telegram_message_id is not None else None
+            if key is not None:
+                if key in batch_keys:
+                    repeats.append((index, batch_keys[key]))
+                    webhook_messages.inc(signal_type, 'duplicate')
+                    continue
+                cached = recent_messages.get(key)
+                if cached is not None:
+                    results[index] = {**cached, 'duplicate': True}
+                    webhook_messages.inc(signal_type, 'duplicate')
+                    continue
+                batch_keys[key] = index
+            
+            if received_time is None:
+                future = ingestion_writer.submit(
+                    ingest_message, signal_type, message_text, str(uuid.uuid4()),
+                    datetime.now(timezone.utc), channel_id, telegram_message_id
+                )
+            else:
+                future = ingestion_writer.submit(
+                    ingest_message_at, received_time, signal_type, message_text, str(uuid.uuid4()),
+                    channel_id, telegram_message_id
+                )
+            pending.append((index, signal_type, key, future))
         
-        # تحديث نتيجة المعالجة
-        telegram_message.processed = True
-        telegram_message.processing_result = json.dumps(result)
+        # انتظار النتائج بترتيب الإرسال ثم الآثار الجانبية لكل رسالة جديدة
+        with span('ingest'):
+            for index, signal_type, key, future in pending:
+                results[index] = collect_batch_outcome(signal_type, key, future, notify)
         
-        db.session.commit()
+        # التكرار داخل الدفعة يأخذ نتيجة أول ظهور
+        for index, original in repeats:
+            results[index] = {**results[original], 'duplicate': True} if 'message_id' in results[original] else results[original]
         
-        return jsonify({
-            'status': 'success',
-            'message_id': message_id,
-            'processing_result': result
-        })
+        summary = {}
+        for result in results:
+            status = 'duplicate' if result.get('duplicate') else result['status']
+            summary[status] = summary.get(status, 0) + 1
+        
+        return jsonify({'status': 'success', 'results': results, 'summary': summary})
         
     except Exception as e:
-        db.session.rollback()
-        logging.error(f"خطأ في معالجة webhook: {e}")
+        logging.error(f"خطأ في معالجة دفعة webhook: {e}")
         return jsonify({'error': str(e)}), 500
 
-def process_kol_track_signal(message_text: str, message_id: str) -> dict:
+def collect_batch_outcome(signal_type: str, key: Optional[Tuple], future, notify: bool) -> dict:
+    """
+    نتيجة رسالة واحدة من الدفعة بنفس شكل استجابة webhook الفردي
+    """
+    try:
+        try:
+            outcome = future.result(timeout=30)
+        except IntegrityError:
+            # عامل آخر حفظ الرسالة نفسها أولاً
+            outcome = find_ingested_message(*key) if key is not None else None
+            if outcome is None:
+                raise
+        
+        if not outcome.duplicate:
+            with span('side_effects'):
+                dispatch_side_effects(outcome.message_id, outcome.result, outcome.effects, notify=notify)
+        
+        response = {
+            'status': 'success',
+            'message_id': outcome.message_id,
+            'processing_result': outcome.result
+        }
+        if key is not None:
+            recent_messages.set(key, response)
+        webhook_messages.inc(signal_type, 'duplicate' if outcome.duplicate else 'processed')
+        return {**response, 'duplicate': True} if outcome.duplicate else response
+    
+    except Exception as e:
+        webhook_messages.inc(signal_type, 'error')
+        logging.error(f"خطأ في معالجة رسالة من دفعة webhook: {e}")
+        return {'status': 'error', 'error': str(e)}
+
+class IngestOutcome(NamedTuple):
+    message_id: str
+    result: dict
+    effects: list
+    duplicate: bool = False
+
+def parse_telegram_ids(data: dict) -> Tuple[Optional[int], Optional[int]]:
+    """
+    قراءة channel_id و message_id من حمولة المستمع (اختيارية للتوافق مع المرسلين القدامى)
+    """
+    channel_id = data.get('channel_id')
+    telegram_message_id = data.get('message_id')
+    if telegram_message_id is None:
+        return None, None
+    return (int(channel_id) if channel_id is not None else None), int(telegram_message_id)
+
+def parse_message_date(data: dict) -> Optional[datetime]:
+    """
+    وقت نشر الرسالة في تيليجرام (ISO 8601) إن أرسله المستمع، والوقت دون منطقة زمنية يُعامل كـ UTC
+    """
+    value = data.get('message_date')
+    if not value:
+        return None
+    message_date = datetime.fromisoformat(str(value))
+    return message_date.replace(tzinfo=timezone.utc) if message_date.tzinfo is None else message_date
+
+def find_ingested_message(channel_id: Optional[int], telegram_message_id: int) -> Optional[IngestOutcome]:
+    """
+    البحث عن رسالة سبق حفظها بنفس معرفات تيليجرام وإرجاع نتيجتها الأصلية
+    """
+    existing = TelegramMessage.query.filter_by(
+        channel_id=channel_id,
+        telegram_message_id=telegram_message_id
+    ).first()
+    if not existing:
+        return None
+    result = json.loads(existing.processing_result) if existing.processing_result else {}
+    return IngestOutcome(existing.message_id, result, [], duplicate=True)
+
+def ingest_message(signal_type: str, message_text: str, message_id: str, received_time: datetime,
+                   channel_id: Optional[int] = None, telegram_message_id: Optional[int] = None) -> IngestOutcome:
+    """
+    تطبيق رسالة واحدة على الجلسة دون حفظ (يحفظها كاتب الإدخال ضمن دفعته)
+    تُرجع النتيجة وقائمة الأحداث التي تُبث بعد الحفظ، أو النتيجة الأصلية إن كانت الرسالة مكررة
+    """
+    if telegram_message_id is not None:
+        existing = find_ingested_message(channel_id, telegram_message_id)
+        if existing:
+            return existing
+    
+    effects = []
+    telegram_message = TelegramMessage(
+        message_id=message_id,
+        channel_type=signal_type,
+        message_text=message_text,
+        received_time=received_time,
+        channel_id=channel_id,
+        telegram_message_id=telegram_message_id
+    )
+    db.session.add(telegram_message)
+    
+    # معالجة الرسالة حسب النوع
+    if signal_type == 'kol_track':
+        result = process_kol_track_signal(message_text, message_id, effects)
+    elif signal_type in ['phanes_nf', 'phanes_15m']:
+        result = process_phanes_update(message_text, signal_type, effects)
+    else:
+        result = {'error': 'نوع إشارة غير معروف'}
+    
+    # تحديث نتيجة المعالجة
+    telegram_message.processed = True
+    telegram_message.processing_result = json.dumps(result)
+    
+    return IngestOutcome(message_id, result, effects)
+
+def ingest_message_at(received_time: datetime, signal_type: str, message_text: str, message_id: str,
+                      channel_id: Optional[int] = None, telegram_message_id: Optional[int] = None) -> IngestOutcome:
+    """
+    تطبيق رسالة فائتة كأنها وصلت في وقت نشرها الأصلي
+    """
+    with clock.frozen(received_time):
+        return ingest_message(signal_type, message_text, message_id, received_time, channel_id, telegram_message_id)
+
+def dispatch_side_effects(message_id: str, result: dict, effects: list, notify: bool = True):
+    """
+    الآثار الجانبية بعد حفظ الرسالة: البث للعملاء وإرسال التوصية إلى تيليجرام
+    لا تُنفذ قبل الحفظ حتى لا يُعلن عن إشارة قد تُلغى معاملتها
+    نتيجة الإرسال (recommendation_sent و message) تُضاف للنتيجة ثم تُكتب في processing_result المحفوظ
+    """
+    # بث الإشارات والتقييمات الجديدة للعملاء المتصلين بـ /api/stream
+    for event_type, data in effects:
+        event_bus.publish(event_type, data)
+    
+    # إرسال التوصية إذا كان القرار إيجابياً
+    if notify and result.get('decision') in ['BUY', 'STRONG_BUY']:
+        try:
+            message = analyzer.format_decision_message(
+                result['decision'], result['token_name'],
+                result['contract_address'], result['score'], result['reasons']
+            )
+            with span('telegram_send'):
+                result['recommendation_sent'] = telegram_service.send_message_sync(message)
+            result['message'] = message
+        except Exception as e:
+            logging.error(f"خطأ في إرسال الإشعار: {e}")
+            result['recommendation_sent'] = False
+        
+        try:
+            ingestion_writer.run(store_processing_result, message_id, dict(result))
+        except Exception as e:
+            logging.error(f"خطأ في حفظ نتيجة إرسال التوصية للرسالة {message_id}: {e}")
+
+def store_processing_result(message_id: str, result: dict):
+    """
+    إعادة كتابة processing_result لرسالة محفوظة (بعد أن تضيف الآثار الجانبية حقولها)
+    """
+    db.session.execute(
+        update(TelegramMessage.__table__)
+        .where(TelegramMessage.__table__.c.message_id == message_id)
+        .values(processing_result=json.dumps(result))
+    )
+
+def process_kol_track_signal(message_text: str, message_id: str, effects: list = None) -> dict:
     """
     معالجة إشارة شراء جديدة من KOL Track
     """
     try:
         # استخلاص بيانات الإشارة
-        signal_data = analyzer.extract_kol_track_data(message_text)
+        with span('kol_extract'):
+            signal_data = analyzer.extract_kol_track_data(message_text)
         if not signal_data:
             return {'error': 'فشل في استخلاص بيانات الإشارة'}
         
         # إنشاء معرف فريد للإشارة
-        signal_id = f"signal_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{message_id[:8]}"
+        signal_id = f"signal_{clock.now().strftime('%Y%m%d_%H%M%S')}_{message_id[:8]}"
         
-        # جلب بيانات أداء المحافظ
-        wallets_performance = []
-        for wallet_info in signal_data['wallets_details']:
-            wallet_unique_id = f"{wallet_info['type']}_{wallet_info['id']}"
-            wallet = Wallet.query.filter_by(wallet_unique_id=wallet_unique_id).first()
-            if wallet:
-                wallets_performance.append(wallet.to_dict())
+        # جلب بيانات أداء المحافظ باستعلام واحد
+        participating_wallets = [wallet_unique_id(w) for w in signal_data['wallets_details']]
+        with span('wallet_lookup'):
+            wallets_performance = fetch_wallet_performance(participating_wallets)
         
         # حساب درجة الثقة
-        participating_wallets = [f"{w['type']}_{w['id']}" for w in signal_data['wallets_details']]
-        score, decision, reasons = analyzer.calculate_confidence_score(participating_wallets, wallets_performance)
-        
-        # حفظ الإشارة في قاعدة البيانات
-        signal = Signal(
-            signal_id=signal_id,
-            contract_address=signal_data['contract_address'],
-            signal_time=datetime.now(timezone.utc),
-            token_name=signal_data['token_name'],
-            total_wallets_involved=signal_data['total_wallets_involved'],
-            wallets_details=json.dumps(signal_data['wallets_details']),
-            decision=decision,
-            confidence_score=score,
-            decision_reasons=json.dumps(reasons),
-            performance_status='PENDING',
-            evaluation_complete=False
-        )
-        db.session.add(signal)
+        with span('scoring'):
+            score, decision, reasons = analyzer.calculate_confidence_score(participating_wallets, wallets_performance)
+        decisions.inc(decision)
         
-        # حفظ روابط المحافظ
-        for wallet_info in signal_data['wallets_details']:
-            wallet_unique_id = f"{wallet_info['type']}_{wallet_info['id']}"
-            link_id = f"link_{signal_id}_{wallet_unique_id}"
-            
-            link = SignalWalletLink(
-                link_id=link_id,
+        with span('signal_write'):
+            # حفظ الإشارة في قاعدة البيانات
+            signal = Signal(
                 signal_id=signal_id,
-                wallet_unique_id=wallet_unique_id,
-                mc_at_buy=wallet_info['mc_at_buy']
+                contract_address=signal_data['contract_address'],
+                signal_time=clock.now(),
+                token_name=signal_data['token_name'],
+                total_wallets_involved=signal_data['total_wallets_involved'],
+                wallets_details=json.dumps(signal_data['wallets_details']),
+                decision=decision,
+                confidence_score=score,
+                decision_reasons=json.dumps(reasons),
+                performance_status='PENDING',
+                evaluation_complete=False
             )
-            db.session.add(link)
+            db.session.add(signal)
             
-            # تحديث إحصائيات المحفظة
-            wallet = Wallet.query.filter_by(wallet_unique_id=wallet_unique_id).first()
-            if wallet:
-                wallet.total_calls += 1
-                wallet.last_seen = datetime.now(timezone.utc)
-            else:
-                # إنشاء محفظة جديدة
-                new_wallet = Wallet(
-                    wallet_unique_id=wallet_unique_id,
-                    wallet_type=wallet_info['type'],
-                    wallet_number=wallet_info['id'],
-                    date_added=datetime.now(timezone.utc),
-                    last_seen=datetime.now(timezone.utc),
-                    total_calls=1,
-                    successful_calls=0,
-                    success_rate=0.0
-                )
-                db.session.add(new_wallet)
-        
-        db.session.commit()
-        
-        # إرسال التوصية إذا كان القرار إيجابياً
-        result = {
+            # حفظ روابط المحافظ بأمر INSERT جماعي واحد (executemany) بدل أمر لكل رابط
+            links = [
+                {
+                    'link_id': f"link_{signal_id}_{wallet_unique_id(wallet_info)}",
+                    'signal_id': signal_id,
+                    'wallet_unique_id': wallet_unique_id(wallet_info),
+                    'mc_at_buy': wallet_info['mc_at_buy']
+                }
+                for wallet_info in signal_data['wallets_details']
+            ]
+            if links:
+                db.session.execute(insert(SignalWalletLink), links)
+            
+            # تحديث إحصائيات المحافظ (وإنشاء الجديدة منها) بأوامر جماعية ذرية
+            record_wallet_calls(signal_data['wallets_details'], clock.now())
+        
+        if effects is not None:
+            effects.append(('signal', {
+                'signal_id': signal_id,
+                'decision': decision,
+                'score': score,
+                'contract_address': signal_data['contract_address'],
+                'token_name': signal_data['token_name']
+            }))
+        
+        # الحفظ والبث وإرسال التوصية تتم بعد حفظ الدفعة (انظر dispatch_side_effects)
+        return {
             'signal_id': signal_id,
             'decision': decision,
             'score': score,
@@ -151,37 +437,18 @@ def process_kol_track_signal(message_text: str, message_id: str) -> dict:
             'token_name': signal_data['token_name']
         }
         
-        if decision in ['BUY', 'STRONG_BUY']:
-            # إرسال الرسالة إلى تيليجرام
-            try:
-                success = telegram_service.send_message_sync(
-                    analyzer.format_decision_message(
-                        decision, signal_data['token_name'], 
-                        signal_data['contract_address'], score, reasons
-                    )
-                )
-                result['recommendation_sent'] = success
-                result['message'] = analyzer.format_decision_message(
-                    decision, signal_data['token_name'], 
-                    signal_data['contract_address'], score, reasons
-                )
-            except Exception as e:
-                logging.error(f"خطأ في إرسال الإشعار: {e}")
-                result['recommendation_sent'] = False
-        
-        return result
-        
     except Exception as e:
         logging.error(f"خطأ في معالجة إشارة KOL Track: {e}")
         return {'error': str(e)}
 
-def process_phanes_update(message_text: str, signal_type: str) -> dict:
+def process_phanes_update(message_text: str, signal_type: str, effects: list = None) -> dict:
     """
     معالجة تحديث Phanes لتقييم أداء الإشارات
     """
     try:
         # استخلاص بيانات Phanes
-        phanes_data = analyzer.extract_phanes_data(message_text)
+        with span('phanes_extract'):
+            phanes_data = analyzer.extract_phanes_data(message_text)
         if not phanes_data:
             return {'error': 'فشل في استخلاص بيانات Phanes'}
         
@@ -189,10 +456,11 @@ def process_phanes_update(message_text: str, signal_type: str) -> dict:
         current_ath = phanes_data['ath_usd']
         
         # البحث عن الإشارة الأصلية
-        signal = Signal.query.filter_by(
-            contract_address=contract_address,
-            evaluation_complete=False
-        ).first()
+        with span('signal_lookup'):
+            signal = Signal.query.filter_by(
+                contract_address=contract_address,
+                evaluation_complete=False
+            ).first()
         
         if not signal:
             return {'message': 'لم يتم العثور على إشارة مطابقة'}
@@ -200,7 +468,6 @@ def process_phanes_update(message_text: str, signal_type: str) -> dict:
         # تحديث ATH الأولي إذا لم يكن محدداً
         if signal.initial_ath_usd == 0.0:
             signal.initial_ath_usd = current_ath
-            db.session.commit()
             return {'message': 'تم تحديث ATH الأولي', 'initial_ath': current_ath}
         
         # تقييم الأداء
@@ -216,18 +483,20 @@ def process_phanes_update(message_text: str, signal_type: str) -> dict:
         if signal.initial_ath_usd > 0:
             signal.profit_multiplier = current_ath / signal.initial_ath_usd
         
-        # تحديث إحصائيات المحافظ في حالة النجاح
-        if performance_status == 'SUCCESS' and evaluation_complete:
-            links = SignalWalletLink.query.filter_by(signal_id=signal.signal_id).all()
-            for link in links:
-                wallet = Wallet.query.filter_by(wallet_unique_id=link.wallet_unique_id).first()
-                if wallet:
-                    wallet.successful_calls += 1
-                    wallet.success_rate = wallet.successful_calls / wallet.total_calls if wallet.total_calls > 0 else 0
-        
-        db.session.commit()
+        with span('evaluation_write'):
+            # تحديث إحصائيات المحافظ في حالة النجاح
+            if performance_status == 'SUCCESS' and evaluation_complete:
+                record_signal_success(signal.signal_id)
+            
+            # ملخصات مئينات مضاعف الربح للمحافظ والمجموعات الذهبية
+            if evaluation_complete and signal.profit_multiplier:
+                wallet_ids = [
+                    row.wallet_unique_id for row in
+                    db.session.query(SignalWalletLink.wallet_unique_id).filter_by(signal_id=signal.signal_id)
+                ]
+                record_profit_multiplier(signal.profit_multiplier, wallet_ids, analyzer.golden_clusters())
         
-        return {
+        result = {
             'signal_id': signal.signal_id,
             'performance_status': performance_status,
             'evaluation_complete': evaluation_complete,
@@ -236,106 +505,211 @@ def process_phanes_update(message_text: str, signal_type: str) -> dict:
             'profit_multiplier': signal.profit_multiplier
         }
         
+        if effects is not None:
+            effects.append(('evaluation', {**result, 'contract_address': contract_address}))
+        
+        return result
+        
     except Exception as e:
         logging.error(f"خطأ في معالجة تحديث Phanes: {e}")
         return {'error': str(e)}
 
 @smart_falcon_bp.route('/api/signals', methods=['GET'])
+@conditional_get('signals')
 def get_signals():
     """
     جلب قائمة الإشارات
+    يدعم الترقيم بالمؤشر (?cursor=) والترقيم التقليدي بالصفحات (?page=)
+    وتحديد الحقول المطلوبة (?fields=signal_id,decision,...)
     """
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        per_page = clamp_per_page(request.args.get('per_page', 20, type=int))
         status = request.args.get('status')
+        cursor = request.args.get('cursor')
+        fields = parse_fields(request.args.get('fields'), Signal.SERIALIZED_FIELDS)
         
-        query = Signal.query
+        # استعلام أعمدة فقط: لا كائنات ORM ولا فك ترميز لأعمدة JSON
+        query = db.session.query(*project_columns(Signal, fields, required=('id', 'signal_time')))
+        count_query = Signal.query
         if status:
-            query = query.filter_by(performance_status=status)
-        
-        signals = query.order_by(Signal.signal_time.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        return jsonify({
-            'signals': [signal.to_dict() for signal in signals.items],
-            'total': signals.total,
-            'pages': signals.pages,
+            query = query.filter(Signal.performance_status == status)
+            count_query = count_query.filter_by(performance_status=status)
+        
+        # الترقيم بالمؤشر: مفتاح (signal_time, id) دون OFFSET أو COUNT
+        if cursor is not None:
+            signals, next_cursor = keyset_page(query, Signal.signal_time, Signal.id, cursor, per_page)
+            response = {
+                'signals': rows_to_dicts(signals, fields, Signal.JSON_FIELDS),
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if request.args.get('include_total', 0, type=int):
+                response['total'] = cached_count('signals', ('status', status), count_query)
+            return json_response(response)
+        
+        # القيم الفارغة في النهاية كما في keyset_page (ترتيب SQLite الطبيعي، وليس ترتيب PostgreSQL)
+        signals = query.order_by(Signal.signal_time.desc().nulls_last(), Signal.id.desc()).limit(per_page).offset(
+            (max(page, 1) - 1) * per_page
+        ).all()
+        
+        return json_response({
+            'signals': rows_to_dicts(signals, fields, Signal.JSON_FIELDS),
+            **page_info(cached_count('signals', ('status', status), count_query), per_page),
             'current_page': page
         })
         
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@smart_falcon_bp.route('/api/signals/open-contracts', methods=['GET'])
+def get_open_contracts():
+    """
+    عناوين عقود الإشارات التي لم يكتمل تقييمها (مرشح تحديثات Phanes في المستمع)
+    الـ ETag مشتق من قائمة العناوين نفسها لا من إصدار جدول signals الذي يتغير مع كل تحديث ATH،
+    فيرد 304 للمزامنة الدورية ما لم تُفتح إشارة أو تُغلق
+    """
+    try:
+        rows = db.session.query(Signal.contract_address).filter_by(
+            evaluation_complete=False
+        ).distinct().order_by(Signal.contract_address).all()
+        contract_addresses = [row.contract_address for row in rows]
+        etag = hashlib.sha1('\n'.join(contract_addresses).encode()).hexdigest()
+        
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = json_response({'contract_addresses': contract_addresses, 'count': len(contract_addresses)})
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @smart_falcon_bp.route('/api/wallets', methods=['GET'])
+@conditional_get('wallets')
 def get_wallets():
     """
     جلب قائمة المحافظ
+    يدعم الترقيم بالمؤشر (?cursor=) والترقيم التقليدي بالصفحات (?page=)
+    وتحديد الحقول المطلوبة (?fields=wallet_unique_id,success_rate,...)
     """
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        per_page = clamp_per_page(request.args.get('per_page', 50, type=int))
         sort_by = request.args.get('sort_by', 'success_rate')
+        cursor = request.args.get('cursor')
+        fields = parse_fields(request.args.get('fields'), Wallet.SERIALIZED_FIELDS)
         
         if sort_by == 'success_rate':
-            query = Wallet.query.order_by(Wallet.success_rate.desc())
+            sort_column = Wallet.success_rate
         elif sort_by == 'total_calls':
-            query = Wallet.query.order_by(Wallet.total_calls.desc())
+            sort_column = Wallet.total_calls
         else:
-            query = Wallet.query.order_by(Wallet.last_seen.desc())
-        
-        wallets = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        return jsonify({
-            'wallets': [wallet.to_dict() for wallet in wallets.items],
-            'total': wallets.total,
-            'pages': wallets.pages,
+            sort_column = Wallet.last_seen
+        
+        query = db.session.query(*project_columns(Wallet, fields, required=('id', sort_column.key)))
+        
+        # الترقيم بالمؤشر: مفتاح (عمود الترتيب, id) دون OFFSET أو COUNT
+        if cursor is not None:
+            wallets, next_cursor = keyset_page(query, sort_column, Wallet.id, cursor, per_page)
+            response = {
+                'wallets': rows_to_dicts(wallets, fields),
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if request.args.get('include_total', 0, type=int):
+                response['total'] = cached_count('wallets', 'all', Wallet.query)
+            return json_response(response)
+        
+        wallets = query.order_by(sort_column.desc().nulls_last(), Wallet.id.desc()).limit(per_page).offset(
+            (max(page, 1) - 1) * per_page
+        ).all()
+        
+        return json_response({
+            'wallets': rows_to_dicts(wallets, fields),
+            **page_info(cached_count('wallets', 'all', Wallet.query), per_page),
             'current_page': page
         })
         
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@smart_falcon_bp.route('/api/wallets/rebuild-stats', methods=['POST'])
+def rebuild_wallets_stats():
+    """
+    إعادة حساب إحصائيات المحافظ من الإشارات والروابط
+    {"since": "2024-01-01T00:00:00"} لإعادة حساب المحافظ النشطة منذ ذلك الوقت فقط
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        since = data.get('since')
+        try:
+            since = datetime.fromisoformat(since) if since else None
+        except ValueError:
+            return jsonify({'error': 'قيمة since غير صالحة'}), 400
+        
+        summary = rebuild_wallet_stats(since, int(data.get('chunk_size', 5000)))
+        return jsonify({'status': 'success', **summary})
+        
+    except Exception as e:
+        logging.error(f"خطأ في إعادة بناء إحصائيات المحافظ: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @smart_falcon_bp.route('/api/dashboard/stats', methods=['GET'])
+@conditional_get('signals', 'wallets')
 def get_dashboard_stats():
     """
     جلب إحصائيات لوحة التحكم
     """
     try:
-        # إحصائيات عامة
-        total_signals = Signal.query.count()
-        successful_signals = Signal.query.filter_by(performance_status='SUCCESS').count()
-        pending_signals = Signal.query.filter_by(performance_status='PENDING').count()
-        total_wallets = Wallet.query.count()
-        
-        # أفضل المحافظ
-        top_wallets = Wallet.query.filter(Wallet.total_calls >= 5).order_by(
-            Wallet.success_rate.desc()
-        ).limit(10).all()
-        
-        # الإشارات الأخيرة
-        recent_signals = Signal.query.order_by(
-            Signal.signal_time.desc()
-        ).limit(5).all()
-        
-        return jsonify({
-            'stats': {
-                'total_signals': total_signals,
-                'successful_signals': successful_signals,
-                'pending_signals': pending_signals,
-                'total_wallets': total_wallets,
-                'success_rate': (successful_signals / total_signals * 100) if total_signals > 0 else 0
-            },
-            'top_wallets': [wallet.to_dict() for wallet in top_wallets],
-            'recent_signals': [signal.to_dict() for signal in recent_signals]
-        })
+        # الاستجابة مخزنة لفترة قصيرة وتُبطل فور تغير إصدار الإشارات أو المحافظ
+        cache_key = data_versions.token('signals', 'wallets')
+        return jsonify(dashboard_cache.get_or_set(cache_key, build_dashboard_stats))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_dashboard_stats() -> dict:
+    """
+    حساب إحصائيات لوحة التحكم باستعلام تجميعي واحد للعدادات
+    """
+    # إحصائيات عامة
+    total_signals, successful_signals, pending_signals, total_wallets = db.session.query(
+        db.func.count(Signal.id),
+        db.func.sum(db.case((Signal.performance_status == 'SUCCESS', 1), else_=0)),
+        db.func.sum(db.case((Signal.performance_status == 'PENDING', 1), else_=0)),
+        db.select(db.func.count(Wallet.id)).scalar_subquery()
+    ).one()
+    successful_signals = successful_signals or 0
+    pending_signals = pending_signals or 0
+    
+    # أفضل المحافظ
+    top_wallets = Wallet.query.filter(Wallet.total_calls >= 5).order_by(
+        Wallet.success_rate.desc()
+    ).limit(10).all()
+    
+    # الإشارات الأخيرة
+    recent_signals = Signal.query.order_by(
+        Signal.signal_time.desc()
+    ).limit(5).all()
+    
+    return {
+        'stats': {
+            'total_signals': total_signals,
+            'successful_signals': successful_signals,
+            'pending_signals': pending_signals,
+            'total_wallets': total_wallets,
+            'success_rate': (successful_signals / total_signals * 100) if total_signals > 0 else 0
+        },
+        'top_wallets': [wallet.to_dict() for wallet in top_wallets],
+        'recent_signals': [signal.to_dict() for signal in recent_signals]
+    }
+
 @smart_falcon_bp.route('/api/config', methods=['GET', 'POST'])
 def system_config():
     """
@@ -0,0 +1,68 @@
+from flask import Blueprint, Response, request, jsonify
+from src.services.event_bus import event_bus
+import json
+import logging
+
+stream_bp = Blueprint('stream', __name__)
+
+# فترة إرسال نبضة الإبقاء على الاتصال بالثواني
+HEARTBEAT_SECONDS = 15
+
+def format_sse(event_type: str, data: dict, event_id=None) -> str:
+    """
+    تنسيق حدث بصيغة Server-Sent Events
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+@stream_bp.route('/api/stream', methods=['GET'])
+def stream_events():
+    """
+    بث مباشر للإشارات الجديدة وتقييمات الأداء (SSE)
+    ?types=signal,evaluation لتحديد أنواع الأحداث
+    """
+    types = request.args.get('types')
+    event_types = [t.strip() for t in types.split(',') if t.strip()] if types else None
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+
+    try:
+        subscription = event_bus.subscribe(event_types, last_event_id)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+
+    def generate():
+        reported_drops = 0
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.closed:
+                event = subscription.get(timeout=HEARTBEAT_SECONDS)
+
+                # إبلاغ العميل البطيء بأنه فقد أحداثاً ليعيد جلب الحالة
+                if subscription.dropped > reported_drops:
+                    yield format_sse('lagged', {'dropped': subscription.dropped - reported_drops})
+                    reported_drops = subscription.dropped
+
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+
+                yield format_sse(event['type'], event['data'], event['id'])
+        except GeneratorExit:
+            pass
+        except Exception as e:
+            logging.error(f"خطأ في بث الأحداث: {e}")
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -0,0 +1,90 @@
+"""
+نقطة تشغيل الخادم في بيئة الإنتاج عبر gunicorn
+الاستخدام: python src/serve.py (الإعدادات في gunicorn.conf.py ومتغيرات البيئة)
+"""
+import os
+import sys
+import signal
+import logging
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - [%(levelname)s] - %(message)s')
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def init_worker():
+    """
+    تهيئة موارد العامل بعد fork: اتصالات قاعدة البيانات الموروثة من العملية الأم
+    لا يجوز مشاركتها، والذاكرات المؤقتة تبدأ فارغة لكل عامل
+    """
+    from src.main import app
+    from src.models.user import db
+    from src.services.data_version import data_versions
+    from src.services.http_cache import response_cache
+    from src.services.pagination import count_cache
+    from src.services.ingestion_writer import ingestion_writer
+    from src.services.metrics import metrics
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    data_versions.invalidate()
+    response_cache.clear()
+    count_cache.clear()
+    metrics.reset()
+    metrics.start_exporter()
+
+    # كاتب إدخال واحد لكل عامل (الخيوط لا تنتقل عبر fork)
+    ingestion_writer.start()
+
+def shutdown_worker():
+    """
+    تطبيق الرسائل المتبقية في طابور الكاتب قبل خروج العامل
+    """
+    from src.services.ingestion_writer import ingestion_writer
+    from src.services.metrics import metrics
+
+    ingestion_writer.stop()
+    metrics.remove_state()
+
+def install_graceful_shutdown(worker):
+    """
+    عند SIGTERM تُغلق اتصالات البث (SSE) أولاً حتى لا تؤخر الإيقاف،
+    ثم يكمل gunicorn الطلبات الجارية (webhooks) خلال graceful_timeout
+    """
+    from src.services.event_bus import event_bus
+
+    original_handler = worker.handle_exit
+
+    def handle_exit(sig, frame):
+        event_bus.close_all()
+        original_handler(sig, frame)
+
+    signal.signal(signal.SIGTERM, handle_exit)
+
+def serve():
+    """
+    تشغيل gunicorn بملف الإعدادات المرافق
+    """
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        logging.error("❌ gunicorn غير مثبت: pip install -r requirements.txt")
+        sys.exit(1)
+
+    os.chdir(BACKEND_DIR)
+
+    # تهيئة المخطط مرة واحدة في العملية الأم قبل تشغيل العمال
+    from src.main import init_db
+    init_db()
+
+    sys.argv = [
+        'gunicorn',
+        '--config', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+        'src.main:app'
+    ]
+    run()
+
+if __name__ == '__main__':
+    serve()
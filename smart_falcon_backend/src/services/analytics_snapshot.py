@@ -0,0 +1,284 @@
+import os
+import json
+import hashlib
+import time
+import shutil
+import calendar
+import tempfile
+import threading
+import logging
+from typing import Dict, Optional
+from sqlalchemy import func, select
+from src.models.user import db
+from src.models.smart_falcon import Wallet, Signal, SignalWalletLink, SystemConfig
+from src.services.data_version import data_versions
+
+try:
+    import numpy as np
+except ImportError:  # numpy اختياري، يعود المحلل إلى الاستعلامات العادية بدونه
+    np = None
+
+logging.basicConfig(level=logging.INFO)
+
+SNAPSHOT_TABLES = ('signals', 'signal_wallet_links', 'wallets')
+
+# يُرفع عند تغيير المصفوفات المخزنة حتى لا تُحمّل لقطات بصيغة قديمة
+SNAPSHOT_FORMAT = 2
+
+# ترميز حالات الأداء في مصفوفة int8
+STATUS_CODES = {'PENDING': 0, 'SUCCESS': 1, 'FAILURE': 2}
+UNKNOWN_STATUS = 3
+
+WALLET_STRING_COLUMNS = ('wallet_unique_id', 'wallet_type', 'date_added', 'last_seen', 'status')
+WALLET_NUMERIC_COLUMNS = {
+    'id': 'int64',
+    'wallet_number': 'int64',
+    'total_calls': 'int64',
+    'successful_calls': 'int64',
+    'success_rate': 'float64',
+    'decayed_calls': 'float64',
+    'decayed_successes': 'float64',
+    'decayed_success_rate': 'float64',
+    'decay_updated_ts': 'float64'
+}
+
+class AnalyticsSnapshot:
+    """
+    لقطة عمودية للإشارات والروابط والمحافظ مقروءة عبر memory-map
+    """
+
+    def __init__(self, path: str, meta: Dict, arrays: Dict):
+        self.path = path
+        self.meta = meta
+        self.version = meta['version']
+        self.arrays = arrays
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['arrays'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def wallet_dict(self, index: int) -> Dict:
+        """
+        إعادة بناء قاموس المحفظة بنفس شكل Wallet.to_dict
+        """
+        data = {}
+        for column in WALLET_NUMERIC_COLUMNS:
+            data[column] = self.arrays[f'wallet_{column}'][index].item()
+        for column in WALLET_STRING_COLUMNS:
+            value = str(self.arrays[f'wallet_{column}'][index])
+            data[column] = value if value else None
+        return {
+            'id': data['id'],
+            'wallet_unique_id': data['wallet_unique_id'],
+            'wallet_type': data['wallet_type'],
+            'wallet_number': data['wallet_number'],
+            'date_added': data['date_added'],
+            'last_seen': data['last_seen'],
+            'total_calls': data['total_calls'],
+            'successful_calls': data['successful_calls'],
+            'success_rate': data['success_rate'],
+            'status': data['status'],
+            'decayed_calls': data['decayed_calls'],
+            'decayed_successes': data['decayed_successes'],
+            'decayed_success_rate': data['decayed_success_rate'],
+            'decay_updated_ts': data['decay_updated_ts'] or None
+        }
+
+class AnalyticsSnapshotStore:
+    """
+    إدارة اللقطات العمودية: بناؤها عند تغير إصدار البيانات وتحميلها عبر memory-map
+    كل لقطة مجلد يحوي ملفات .npy وملف meta.json، ويُنشر المجلد بإعادة تسمية ذرية
+    """
+
+    def __init__(self, base_dir: str, min_refresh_interval: float = 30.0, keep: int = 2):
+        self.base_dir = base_dir
+        self.min_refresh_interval = min_refresh_interval
+        self.keep = keep
+        self._snapshot: Optional[AnalyticsSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    @property
+    def current_version(self) -> str:
+        """
+        إصدار اللقطة المحملة حالياً دون التحقق من تحديثها
+        """
+        return self._snapshot.version if self._snapshot is not None else ''
+
+    def get(self) -> Optional[AnalyticsSnapshot]:
+        """
+        إرجاع اللقطة الحالية، مع إعادة بنائها إذا تغير إصدار البيانات
+        لا يُعاد البناء أكثر من مرة كل min_refresh_interval ثانية
+        """
+        if not self.available:
+            return None
+
+        current = self._snapshot
+        if current is not None and time.monotonic() - self._checked_at < self.min_refresh_interval:
+            return current
+
+        with self._lock:
+            current = self._snapshot
+            if current is not None and time.monotonic() - self._checked_at < self.min_refresh_interval:
+                return current
+
+            version = f'{self._database_identity()}_{data_versions.token(*SNAPSHOT_TABLES)}'
+            if current is None or current.version != version:
+                path = self._snapshot_path(version)
+                if not os.path.exists(os.path.join(path, 'meta.json')):
+                    self.build(version)
+                self._snapshot = self.load(path)
+                self._cleanup()
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def build(self, version: str) -> str:
+        """
+        تحويل الجداول إلى ملفات عمودية
+        """
+        started = time.perf_counter()
+        os.makedirs(self.base_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix='.building_', dir=self.base_dir)
+
+        try:
+            arrays = self._collect_arrays()
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), array, allow_pickle=False)
+
+            meta = {
+                'version': version,
+                'created_at': time.time(),
+                'signals': int(len(arrays['signal_ids'])),
+                'links': int(len(arrays['link_signal'])),
+                'wallets': int(len(arrays['wallet_id'])),
+                'arrays': sorted(arrays)
+            }
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+
+            path = self._snapshot_path(version)
+            try:
+                os.rename(tmp_dir, path)
+            except OSError:
+                # عملية أخرى نشرت نفس الإصدار قبلنا
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            logging.info(
+                f"تم بناء لقطة التحليلات {version} "
+                f"({meta['signals']} إشارة، {meta['links']} رابط) خلال {time.perf_counter() - started:.2f} ثانية"
+            )
+            return path
+
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def load(self, path: str) -> AnalyticsSnapshot:
+        """
+        تحميل لقطة موجودة عبر memory-map دون نسخها للذاكرة
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        arrays = {}
+        for name in meta['arrays']:
+            file_path = os.path.join(path, f'{name}.npy')
+            # لا يمكن عمل memory-map لمصفوفة فارغة
+            if os.path.getsize(file_path) <= 128:
+                arrays[name] = np.load(file_path, allow_pickle=False)
+            else:
+                arrays[name] = np.load(file_path, mmap_mode='r', allow_pickle=False)
+
+        return AnalyticsSnapshot(path, meta, arrays)
+
+    def _collect_arrays(self) -> Dict:
+        signal_rows = db.session.query(
+            Signal.signal_id,
+            Signal.performance_status,
+            Signal.evaluation_complete,
+            Signal.signal_time
+        ).order_by(Signal.id).all()
+
+        signal_index = {row.signal_id: i for i, row in enumerate(signal_rows)}
+        signal_ids = np.array([row.signal_id for row in signal_rows], dtype=str)
+        signal_status = np.array(
+            [STATUS_CODES.get(row.performance_status, UNKNOWN_STATUS) for row in signal_rows],
+            dtype=np.int8
+        )
+        signal_evaluated = np.array([bool(row.evaluation_complete) for row in signal_rows], dtype=bool)
+        # التواريخ مخزنة بدون منطقة زمنية وتعامل كتوقيت UTC
+        signal_time = np.array(
+            [calendar.timegm(row.signal_time.timetuple()) if row.signal_time else -1 for row in signal_rows],
+            dtype=np.int64
+        )
+
+        link_rows = db.session.query(
+            SignalWalletLink.signal_id,
+            SignalWalletLink.wallet_unique_id
+        ).order_by(SignalWalletLink.id).all()
+
+        link_rows = [row for row in link_rows if row.signal_id in signal_index]
+        # ترتيب المعرفات أبجدياً يجعل ترتيب الفهارس مطابقاً لترتيب الأسماء
+        cluster_wallet_ids = sorted({row.wallet_unique_id for row in link_rows})
+        wallet_index = {wallet_id: i for i, wallet_id in enumerate(cluster_wallet_ids)}
+        link_signal = np.array([signal_index[row.signal_id] for row in link_rows], dtype=np.int32)
+        link_wallet = np.array([wallet_index[row.wallet_unique_id] for row in link_rows], dtype=np.int32)
+
+        wallets = [wallet.to_dict() for wallet in Wallet.query.order_by(Wallet.id).all()]
+
+        arrays = {
+            'signal_ids': signal_ids,
+            'signal_status': signal_status,
+            'signal_evaluated': signal_evaluated,
+            'signal_time': signal_time,
+            'link_signal': link_signal,
+            'link_wallet': link_wallet,
+            'cluster_wallet_ids': np.array(cluster_wallet_ids, dtype=str)
+        }
+        for column, dtype in WALLET_NUMERIC_COLUMNS.items():
+            arrays[f'wallet_{column}'] = np.array([w[column] or 0 for w in wallets], dtype=dtype)
+        for column in WALLET_STRING_COLUMNS:
+            arrays[f'wallet_{column}'] = np.array([w[column] or '' for w in wallets], dtype=str)
+
+        return arrays
+
+    def _database_identity(self) -> str:
+        """
+        بصمة قاعدة البيانات في مفتاح اللقطة: إصدارات البيانات وحدها تتكرر بين قاعدتين تشتركان في
+        ANALYTICS_SNAPSHOT_DIR فتُحمَّل لقطة قاعدة أخرى. تجمع معرف القاعدة العشوائي (الترحيل 0007)
+        وأعلى معرف في جداول اللقطة (يميز نسخاً من نفس الملف تفرعت كتاباتها) في استعلام واحد
+        """
+        row = db.session.execute(select(
+            select(SystemConfig.config_value)
+            .where(SystemConfig.config_key == 'database_id').scalar_subquery(),
+            select(func.max(Signal.id)).scalar_subquery(),
+            select(func.max(SignalWalletLink.id)).scalar_subquery(),
+            select(func.max(Wallet.id)).scalar_subquery()
+        )).one()
+        return hashlib.sha1('|'.join(str(value) for value in row).encode()).hexdigest()[:12]
+
+    def _snapshot_path(self, version: str) -> str:
+        return os.path.join(self.base_dir, f'snapshot_v{SNAPSHOT_FORMAT}_{version}')
+
+    def _cleanup(self):
+        """
+        حذف اللقطات القديمة مع الاحتفاظ بآخر keep لقطات
+        """
+        try:
+            entries = [
+                os.path.join(self.base_dir, name)
+                for name in os.listdir(self.base_dir)
+                if name.startswith('snapshot_')
+            ]
+            entries.sort(key=os.path.getmtime, reverse=True)
+            for path in entries[self.keep:]:
+                if self._snapshot is None or path != self._snapshot.path:
+                    shutil.rmtree(path, ignore_errors=True)
+        except OSError as e:
+            logging.warning(f"تعذر تنظيف اللقطات القديمة: {e}")
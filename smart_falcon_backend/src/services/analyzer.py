@@ -1,9 +1,10 @@
+import os
 import re
 import json
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple
-from dateutil.parser import parse
 import logging
+from src.services.clock import clock
 
 # إعداد التسجيل
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [%(levelname)s] - %(message)s')
@@ -26,6 +27,15 @@ class SmartFalconAnalyzer:
         self.STRONG_BUY_THRESHOLD = 45
         self.BUY_THRESHOLD = 20
         
+        # استخدام معدل النجاح المتناقص زمنياً (الأداء الحديث) بدلاً من معدل العمر كاملاً
+        self.use_decayed_rate = os.getenv('SCORING_USE_DECAYED_RATE', '0') == '1'
+        
+    def golden_clusters(self) -> List[List[str]]:
+        """
+        المجموعات الذهبية المتتبعة (الثلاثية والأزواج)
+        """
+        return [self.golden_trio] + self.golden_pairs
+    
     def extract_kol_track_data(self, message_text: str) -> Optional[Dict]:
         """
         استخلاص بيانات إشارة KOL Track من نص الرسالة
@@ -129,6 +139,8 @@ class SmartFalconAnalyzer:
             if wallet_id in performance_dict:
                 wallet_data = performance_dict[wallet_id]
                 success_rate = wallet_data.get('success_rate', 0)
+                if self.use_decayed_rate and wallet_data.get('decayed_calls'):
+                    success_rate = wallet_data.get('decayed_success_rate') or 0
                 total_calls = wallet_data.get('total_calls', 0)
                 
                 if success_rate >= 0.70:
@@ -166,7 +178,10 @@ class SmartFalconAnalyzer:
         """
         تقييم أداء الإشارة بناءً على تغير ATH
         """
-        current_time = datetime.now(timezone.utc)
+        current_time = clock.now()
+        # SQLite يعيد الأوقات دون منطقة زمنية (مخزنة بتوقيت UTC)
+        if signal_time.tzinfo is None:
+            signal_time = signal_time.replace(tzinfo=timezone.utc)
         time_limit = signal_time + timedelta(minutes=evaluation_time_limit_minutes)
         
         if current_ath > initial_ath:
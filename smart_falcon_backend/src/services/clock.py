@@ -0,0 +1,42 @@
+"""
+الوقت الحالي لمعالجة الرسائل
+وقت النظام افتراضياً، أو وقت افتراضي مثبت داخل الخيط الحالي (إعادة تشغيل الرسائل المخزنة)
+حتى تعمل حدود الوقت (مهلة تقييم الإشارة، تناقص العدادات) كما عملت وقت الاستقبال الأصلي
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+class Clock:
+    def __init__(self):
+        self._local = threading.local()
+
+    def now(self) -> datetime:
+        """
+        الوقت الحالي بتوقيت UTC (مع منطقة زمنية)
+        """
+        frozen = getattr(self._local, 'now', None)
+        return frozen if frozen is not None else datetime.now(timezone.utc)
+
+    def time(self) -> float:
+        """
+        الوقت الحالي بالثواني منذ epoch (بديل time.time())
+        """
+        return self.now().timestamp()
+
+    @contextmanager
+    def frozen(self, at: datetime):
+        """
+        تثبيت الوقت في الخيط الحالي داخل الكتلة (الأوقات دون منطقة زمنية تُعامل كـ UTC)
+        """
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        previous = getattr(self._local, 'now', None)
+        self._local.now = at
+        try:
+            yield at
+        finally:
+            self._local.now = previous
+
+# إنشاء مثيل عام للساعة
+clock = Clock()
@@ -1,13 +1,18 @@
-import pandas as pd
 import json
 from datetime import datetime, timezone
 from src.models.user import db
 from src.models.smart_falcon import Wallet, Signal, SignalWalletLink
-from dateutil.parser import parse
 import logging
 
 logging.basicConfig(level=logging.INFO)
 
+def _pandas():
+    """
+    استيراد pandas عند أول استخدام فقط، فهو مكلف عند بدء تشغيل كل عامل
+    """
+    import pandas as pd
+    return pd
+
 class DataImporter:
     """
     خدمة استيراد البيانات التاريخية إلى قاعدة البيانات
@@ -54,6 +59,7 @@ class DataImporter:
         """
         استيراد بيانات المحافظ
         """
+        pd = _pandas()
         df = pd.read_csv(file_path)
         
         for _, row in df.iterrows():
@@ -83,6 +89,7 @@ class DataImporter:
         """
         استيراد بيانات الإشارات
         """
+        pd = _pandas()
         df = pd.read_csv(file_path)
         
         for _, row in df.iterrows():
@@ -122,6 +129,7 @@ class DataImporter:
         """
         استيراد روابط الإشارات والمحافظ
         """
+        pd = _pandas()
         df = pd.read_csv(file_path)
         
         for _, row in df.iterrows():
@@ -147,7 +155,9 @@ class DataImporter:
         """
         تحويل النص إلى تاريخ ووقت
         """
-        if pd.isna(date_str):
+        from dateutil.parser import parse
+        
+        if _pandas().isna(date_str):
             return datetime.now(timezone.utc)
         
         try:
@@ -0,0 +1,201 @@
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.models.smart_falcon import DataVersion
+
+logging.basicConfig(level=logging.INFO)
+
+# الجداول التي نتتبع إصدار بياناتها
+TRACKED_TABLES = (
+    'signals',
+    'wallets',
+    'signal_wallet_links',
+    'telegram_messages',
+    'system_config',
+    'notification_messages',
+    'quantile_sketches'
+)
+
+def insert_missing_versions(executor, tables: Iterable[str], now: datetime):
+    """
+    إضافة صفوف الإصدار (بالقيمة 0) للجداول التي ليس لها صف، دون خطأ عند التعارض
+    (INSERT ... ON CONFLICT DO NOTHING) حتى لا تفشل معاملتان تضيفان نفس الجدول معاً
+    executor: جلسة أو اتصال
+    """
+    values = [{'table_name': t, 'version': 0, 'updated_at': now} for t in sorted(set(tables))]
+    if not values:
+        return
+    bind = executor.get_bind() if hasattr(executor, 'get_bind') else executor
+    dialect = bind.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        # قواعد أخرى: إضافة ما ليس موجوداً فقط
+        existing = set(executor.execute(
+            select(DataVersion.__table__.c.table_name)
+            .where(DataVersion.__table__.c.table_name.in_([v['table_name'] for v in values]))
+        ).scalars())
+        missing = [v for v in values if v['table_name'] not in existing]
+        if missing:
+            executor.execute(insert(DataVersion.__table__), missing)
+        return
+
+    statement = dialect_insert(DataVersion.__table__).on_conflict_do_nothing(index_elements=['table_name'])
+    executor.execute(statement, values)
+
+class DataVersionTracker:
+    """
+    عداد إصدار البيانات لكل جدول
+    يزداد العداد في نفس معاملة الكتابة حتى تراه كل العمليات (workers) المشتركة في قاعدة البيانات،
+    وتحتفظ كل عملية بنسخة محلية تُحدَّث فوراً بعد كتاباتها وكل refresh_interval ثانية لكتابات غيرها
+    """
+
+    def __init__(self, refresh_interval: float = 1.0):
+        self.refresh_interval = refresh_interval
+        self._versions: Dict[str, int] = {}
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._registered = False
+
+    def init_app(self, app):
+        """
+        تسجيل أحداث جلسة SQLAlchemy
+        """
+        if self._registered:
+            return
+        event.listen(Session, 'after_flush', self._after_flush)
+        event.listen(Session, 'do_orm_execute', self._do_orm_execute)
+        event.listen(Session, 'before_commit', self._before_commit)
+        event.listen(Session, 'after_commit', self._after_commit)
+        event.listen(Session, 'after_soft_rollback', self._after_rollback)
+        self._registered = True
+
+    def touch(self, session: Session, *tables: str):
+        """
+        تعليم جداول كمعدّلة يدوياً (للكتابات عبر SQL نصي لا تمر بأحداث ORM)
+        """
+        session.info.setdefault('dirty_tables', set()).update(
+            t for t in tables if t in TRACKED_TABLES
+        )
+
+    def get(self, *tables: str, fresh: bool = False) -> Tuple[int, ...]:
+        """
+        إرجاع إصدارات الجداول المطلوبة (أو كل الجداول المتتبعة)
+        fresh: قراءة صفوف هذه الجداول من قاعدة البيانات الآن بدل النسخة المحلية التي قد تتأخر
+        حتى refresh_interval عن كتابات العمليات الأخرى
+        """
+        names = tables or TRACKED_TABLES
+        versions = self._read_versions(names) if fresh else self._current_versions()
+        return tuple(versions.get(name, 0) for name in names)
+
+    def token(self, *tables: str, fresh: bool = False) -> str:
+        """
+        تمثيل نصي مختصر للإصدارات يصلح كمفتاح للتخزين المؤقت
+        """
+        return '-'.join(str(v) for v in self.get(*tables, fresh=fresh))
+
+    def invalidate(self):
+        """
+        إجبار إعادة قراءة الإصدارات من قاعدة البيانات عند الطلب التالي
+        """
+        self._refreshed_at = 0.0
+
+    def _current_versions(self) -> Dict[str, int]:
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return self._versions
+
+        with self._lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_interval:
+                return self._versions
+            try:
+                with db.engine.connect() as connection:
+                    rows = connection.execute(
+                        select(DataVersion.table_name, DataVersion.version)
+                    ).all()
+                self._versions = {row.table_name: row.version for row in rows}
+                self._refreshed_at = time.monotonic()
+            except Exception as e:
+                logging.warning(f"تعذر قراءة إصدارات البيانات: {e}")
+
+        return self._versions
+
+    def _read_versions(self, tables: Tuple[str, ...]) -> Dict[str, int]:
+        try:
+            with db.engine.connect() as connection:
+                rows = connection.execute(
+                    select(DataVersion.table_name, DataVersion.version)
+                    .where(DataVersion.table_name.in_(tables))
+                ).all()
+        except Exception as e:
+            logging.warning(f"تعذر قراءة إصدارات البيانات: {e}")
+            return self._current_versions()
+        versions = {row.table_name: row.version for row in rows}
+        with self._lock:
+            self._versions = {**self._versions, **versions}
+        return versions
+
+    def _after_flush(self, session, flush_context):
+        dirty = session.info.setdefault('dirty_tables', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            table = getattr(obj, '__tablename__', None)
+            if table in TRACKED_TABLES:
+                dirty.add(table)
+
+    def _do_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+            return
+        table = getattr(orm_execute_state.statement, 'table', None)
+        name = getattr(table, 'name', None)
+        if name in TRACKED_TABLES:
+            orm_execute_state.session.info.setdefault('dirty_tables', set()).add(name)
+
+    def _before_commit(self, session):
+        # الكائنات المعلّقة لم تُدفع بعد عند هذا الحدث
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            table = getattr(obj, '__tablename__', None)
+            if table in TRACKED_TABLES:
+                session.info.setdefault('dirty_tables', set()).add(table)
+
+        tables = session.info.get('dirty_tables')
+        if not tables:
+            return
+
+        now = datetime.now(timezone.utc)
+        result = session.execute(
+            update(DataVersion.__table__)
+            .where(DataVersion.__table__.c.table_name.in_(sorted(tables)))
+            .values(version=DataVersion.__table__.c.version + 1, updated_at=now)
+        )
+        if result.rowcount < len(tables):
+            # الصفوف تُزرع في الترحيل 0006؛ هذا لجداول أضيفت للتتبع بعده
+            # الإضافة بالقيمة 0 ثم الزيادة، فلا تضيع زيادة معاملة متزامنة أضافت نفس الصف
+            existing = set(session.execute(
+                select(DataVersion.__table__.c.table_name)
+                .where(DataVersion.__table__.c.table_name.in_(sorted(tables)))
+            ).scalars())
+            missing = sorted(t for t in tables if t not in existing)
+            if missing:
+                insert_missing_versions(session, missing, now)
+                session.execute(
+                    update(DataVersion.__table__)
+                    .where(DataVersion.__table__.c.table_name.in_(missing))
+                    .values(version=DataVersion.__table__.c.version + 1, updated_at=now)
+                )
+
+    def _after_commit(self, session):
+        if session.info.pop('dirty_tables', None):
+            self.invalidate()
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.parent is None:
+            session.info.pop('dirty_tables', None)
+
+# إنشاء مثيل عام للمتتبع
+data_versions = DataVersionTracker()
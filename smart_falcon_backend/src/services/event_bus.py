@@ -0,0 +1,116 @@
+import itertools
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+
+class Subscription:
+    """
+    اشتراك عميل واحد: طابور محدود الحجم يُسقط أقدم حدث عند امتلائه
+    حتى لا يؤخر عميل بطيء الناشرين أو يستهلك ذاكرة بلا حد
+    """
+
+    def __init__(self, maxsize: int, event_types: Optional[Iterable[str]] = None):
+        self.queue = deque(maxlen=maxsize)
+        self.event_types = set(event_types) if event_types else None
+        self.dropped = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def put(self, event: Dict):
+        if self.event_types is not None and event['type'] not in self.event_types:
+            return
+        with self._condition:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append(event)
+            self._condition.notify()
+
+    def get(self, timeout: float) -> Optional[Dict]:
+        """
+        انتظار الحدث التالي، أو None عند انتهاء المهلة أو إغلاق الاشتراك
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.queue or self.closed, timeout)
+            if self.queue:
+                return self.queue.popleft()
+            return None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+class EventBus:
+    """
+    ناقل أحداث داخل العملية (pub/sub) لبث الإشارات والتقييمات الجديدة للعملاء
+    لا يعبر العمليات: مع أكثر من عامل gunicorn (قاعدة خادم، gunicorn.conf.py) يرى العميل أحداث عامله فقط
+    يحتفظ بآخر الأحداث ليتمكن العميل العائد (Last-Event-ID) من استكمال ما فاته
+    """
+
+    def __init__(self, queue_size: int = 100, history_size: int = 200, max_subscribers: int = 500):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: List[Subscription] = []
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, event_type: str, data: Dict) -> Dict:
+        event = {
+            'id': next(self._ids),
+            'type': event_type,
+            'data': data,
+            'published_at': time.time()
+        }
+        with self._lock:
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+            self.published += 1
+
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def subscribe(self, event_types: Optional[Iterable[str]] = None, last_event_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self.queue_size, event_types)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise RuntimeError('تم الوصول للحد الأقصى من المشتركين')
+            if last_event_id is not None:
+                for event in self._history:
+                    if event['id'] > last_event_id:
+                        subscription.put(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def close_all(self):
+        """
+        إغلاق كل الاشتراكات (عند إيقاف العملية) لتنتهي اتصالات البث المفتوحة
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscription in subscribers:
+            subscription.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'dropped': sum(s.dropped for s in self._subscribers)
+            }
+
+# إنشاء مثيل عام للناقل
+event_bus = EventBus()
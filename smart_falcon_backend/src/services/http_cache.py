@@ -0,0 +1,57 @@
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+from flask import request, make_response, Response
+from src.services.cache import TTLCache
+from src.services.data_version import data_versions
+
+# أجسام JSON المولدة مسبقاً مفهرسة بالـ ETag، محدودة العدد (LRU)
+response_cache = TTLCache(maxsize=512, ttl=None)
+
+def compute_etag(tables, key_func: Optional[Callable[[], str]] = None) -> str:
+    """
+    اشتقاق ETag قوي من المسار ومعاملات الطلب وإصدارات الجداول المقروءة
+    الإصدارات تُقرأ من قاعدة البيانات عند كل طلب (استعلام بالمفتاح الأساسي) لا من النسخة المحلية
+    المحدثة كل ثانية، حتى لا يرد عامل بـ 304 أو جسم مخزن لبيانات حفظها عامل آخر للتو
+    """
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    extra = key_func() if key_func else ''
+    raw = f'{request.path}?{args}|{data_versions.token(*tables, fresh=True)}|{extra}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def conditional_get(*tables: str, key_func: Optional[Callable[[], str]] = None):
+    """
+    مزخرف لنقاط القراءة: يرد 304 على If-None-Match قبل تنفيذ أي استعلام،
+    ويعيد الجسم المخزن إن وُجد لنفس الإصدار، وإلا ينفذ الدالة ويخزن نتيجتها
+    key_func يضيف مكوناً للمفتاح عندما تعتمد النتيجة على حالة أخرى غير إصدار الجداول
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            etag = compute_etag(tables, key_func)
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+
+            cached = response_cache.get(etag)
+            if cached is not None:
+                body, mimetype = cached
+                response = Response(body, mimetype=mimetype)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response_cache.set(etag, (response.get_data(), response.mimetype))
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        return wrapper
+    return decorator
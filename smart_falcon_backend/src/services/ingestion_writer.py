@@ -0,0 +1,198 @@
+import os
+import atexit
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+from src.models.user import db
+from src.services.metrics import span, writer_batch_size
+from src.services.query_profiler import query_profiler
+
+logging.basicConfig(level=logging.INFO)
+
+_STOP = object()
+
+class _Job:
+    __slots__ = ('fn', 'args', 'kwargs', 'future', 'query_profile')
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        # استعلامات المهمة تُنسب للطلب الذي أرسلها (محلل الاستعلامات)
+        self.query_profile = query_profiler.current()
+
+class IngestionWriter:
+    """
+    كاتب وحيد لقاعدة البيانات: طلبات webhook تضع رسائلها في طابور ويطبقها خيط واحد
+    على دفعات بمعاملة واحدة (group commit) بدلاً من تنافس عدة معاملات على قفل SQLite
+    كل مهمة تُطبق داخل savepoint حتى لا يُفسد فشلها باقي الدفعة، ويحصل كل طلب على نتيجته عبر Future
+    الكاتب واحد لكل عملية، لذلك يعمل الخادم مع SQLite بعامل gunicorn واحد (gunicorn.conf.py)
+    """
+
+    def __init__(self, max_batch: int = 64, max_wait: float = 0.005, queue_size: int = 10000):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue_size = queue_size
+        self.app = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.jobs = 0
+
+    def init_app(self, app):
+        self.app = app
+        # تطبيق ما تبقى في الطابور قبل خروج العملية
+        atexit.register(self.stop)
+
+    def start(self):
+        """
+        تشغيل خيط الكاتب في العملية الحالية (يُستدعى بعد fork في كل عامل، أو تلقائياً عند أول رسالة)
+        """
+        self._ensure_started()
+
+    @property
+    def enabled(self) -> bool:
+        return os.getenv('INGESTION_WRITER_ENABLED', '1') == '1'
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        جدولة دالة كتابة على خيط الكاتب وإرجاع Future بنتيجتها
+        (إذا كان الكاتب معطلاً تُنفذ مباشرة ويُرجع Future مكتمل)
+        """
+        if not self.enabled:
+            future = Future()
+            try:
+                future.set_result(self.run(fn, *args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._ensure_started()
+        job = _Job(fn, args, kwargs)
+        self._queue.put(job)
+        return job.future
+
+    def run(self, fn: Callable, *args, timeout: float = 30.0, **kwargs):
+        """
+        تنفيذ دالة كتابة والانتظار حتى تُحفظ دفعتها، أو تنفيذها مباشرة إذا كان الكاتب معطلاً
+        """
+        if not self.enabled:
+            try:
+                value = fn(*args, **kwargs)
+                db.session.commit()
+                return value
+            except Exception:
+                db.session.rollback()
+                raise
+        return self.submit(fn, *args, **kwargs).result(timeout=timeout)
+
+    def stop(self, timeout: float = 30.0):
+        """
+        إيقاف الكاتب بعد تطبيق كل ما في الطابور
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive() or self._pid != os.getpid():
+                return
+            self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive() and self._pid == os.getpid(),
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'batches': self.batches,
+            'jobs': self.jobs
+        }
+
+    def _ensure_started(self):
+        # الخيوط لا تنتقل عبر fork، فكل عملية (عامل gunicorn) تبدأ كاتبها الخاص
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self.app is None:
+                raise RuntimeError('IngestionWriter غير مهيأ: استدعِ init_app أولاً')
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='ingestion-writer', daemon=True)
+            self._thread.start()
+
+    def _next_batch(self) -> Tuple[List[_Job], bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(job)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                with self.app.app_context():
+                    try:
+                        outcomes = self._apply_batch(batch)
+                    finally:
+                        db.session.remove()
+                for job, value, error in outcomes:
+                    if error is not None:
+                        job.future.set_exception(error)
+                    else:
+                        job.future.set_result(value)
+            if stopping:
+                break
+
+    def _apply_batch(self, batch: List[_Job]) -> List[Tuple]:
+        outcomes = []
+        with span('writer_apply'):
+            for job in batch:
+                try:
+                    with query_profiler.activate(job.query_profile), db.session.begin_nested():
+                        value = job.fn(*job.args, **job.kwargs)
+                    outcomes.append((job, value, None))
+                except Exception as e:
+                    outcomes.append((job, None, e))
+
+        try:
+            # حفظ واحد (fsync واحد) لكل الدفعة
+            with span('db_commit'):
+                db.session.commit()
+            writer_batch_size.observe(len(batch))
+            self.batches += 1
+            self.jobs += len(batch)
+            return outcomes
+        except Exception as e:
+            db.session.rollback()
+            logging.warning(f"فشل حفظ دفعة من {len(batch)} رسالة، سيعاد تطبيقها فردياً: {e}")
+
+        outcomes = []
+        for job in batch:
+            try:
+                value = job.fn(*job.args, **job.kwargs)
+                db.session.commit()
+                outcomes.append((job, value, None))
+            except Exception as e:
+                db.session.rollback()
+                outcomes.append((job, None, e))
+        return outcomes
+
+# إنشاء مثيل عام للكاتب
+ingestion_writer = IngestionWriter()
@@ -0,0 +1,316 @@
+"""
+مقاييس الأداء بصيغة Prometheus النصية (بايثون خالص دون prometheus_client)
+- Histogram و Counter بتسميات (labels) ثابتة الترتيب
+- span(stage): قياس زمن مرحلة من مراحل الإدخال في مدرج smart_falcon_stage_duration_seconds
+المقاييس لكل عملية؛ مع عدة عمال gunicorn يكتب كل عامل حالته دورياً في METRICS_SHARED_DIR
+وتجمع /metrics كل الملفات. METRICS_ENABLED=0 يجعل كل القياسات عمليات فارغة
+"""
+import os
+import bisect
+import json
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logging.basicConfig(level=logging.INFO)
+
+# حدود المدرج بالثواني: من أجزاء الملي ثانية (regex) حتى ثوانٍ (إرسال تيليجرام)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels_text(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Counter:
+    """
+    عداد تراكمي لكل مجموعة قيم تسميات
+    """
+    type_name = 'counter'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        if not self.registry.enabled:
+            return
+        labels = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def state(self) -> Dict:
+        with self._lock:
+            return {'|'.join(labels): value for labels, value in self._values.items()}
+
+    @staticmethod
+    def merge_state(target: Dict, state: Dict):
+        for key, value in state.items():
+            target[key] = target.get(key, 0.0) + value
+
+    def render(self, state: Dict) -> List[str]:
+        lines = []
+        for key, value in sorted(state.items()):
+            labels = key.split('|') if self.labelnames else []
+            lines.append(f'{self.name}_total{_labels_text(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+class Histogram:
+    """
+    مدرج تراكمي بحدود ثابتة: عدد القياسات في كل حد ومجموعها وعددها
+    """
+    type_name = 'histogram'
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # لكل مجموعة تسميات: [عدادات الحدود (+Inf آخرها)، المجموع، العدد]
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        if not self.registry.enabled:
+            return
+        labels = tuple(str(label) for label in labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def state(self) -> Dict:
+        with self._lock:
+            return {'|'.join(labels): [list(counts), total, count] for labels, (counts, total, count) in self._values.items()}
+
+    @staticmethod
+    def merge_state(target: Dict, state: Dict):
+        for key, (counts, total, count) in state.items():
+            entry = target.get(key)
+            if entry is None or len(entry[0]) != len(counts):
+                target[key] = [list(counts), total, count]
+                continue
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+            entry[2] += count
+
+    def render(self, state: Dict) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(state.items()):
+            labels = key.split('|') if self.labelnames else []
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{_labels_text(self.labelnames, labels, ("le", _format_value(bound)))} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{_labels_text(self.labelnames, labels)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_labels_text(self.labelnames, labels)} {count}')
+        return lines
+
+class _Span:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class MetricsRegistry:
+    """
+    سجل المقاييس وتصديرها بصيغة Prometheus
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('METRICS_ENABLED', '1') == '1'
+        self.shared_dir = os.getenv('METRICS_SHARED_DIR') or None
+        self.export_interval = float(os.getenv('METRICS_EXPORT_INTERVAL', '5'))
+        self._metrics: List = []
+        self._exporter: Optional[threading.Thread] = None
+        self._exporter_pid = None
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(self, name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(self, name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def span(self, histogram: Histogram, *labels):
+        """
+        مدير سياق يقيس زمن الكتلة في المدرج (كائن فارغ مشترك عند التعطيل)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(histogram, labels)
+
+    def reset(self):
+        """
+        تصفير القيم (بعد fork حتى لا يرث العامل قياسات العملية الأم)
+        """
+        for metric in self._metrics:
+            with metric._lock:
+                metric._values.clear()
+
+    def state(self) -> Dict:
+        return {metric.name: metric.state() for metric in self._metrics}
+
+    def collect(self) -> Dict:
+        """
+        حالة هذه العملية مدموجة مع حالات العمال الآخرين من METRICS_SHARED_DIR إن وُجد
+        """
+        merged = self.state()
+        for state in self._read_shared_states():
+            for metric in self._metrics:
+                if metric.name in state:
+                    metric.merge_state(merged.setdefault(metric.name, {}), state[metric.name])
+        return merged
+
+    def render(self) -> str:
+        merged = self.collect()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type_name}')
+            lines.extend(metric.render(merged.get(metric.name, {})))
+        return '\n'.join(lines) + '\n'
+
+    def start_exporter(self):
+        """
+        كتابة حالة العامل دورياً في METRICS_SHARED_DIR ليجمعها أي عامل يخدم /metrics
+        """
+        if not self.enabled or not self.shared_dir:
+            return
+        if self._exporter is not None and self._exporter.is_alive() and self._exporter_pid == os.getpid():
+            return
+        os.makedirs(self.shared_dir, exist_ok=True)
+        self._exporter_pid = os.getpid()
+        self._exporter = threading.Thread(target=self._export_loop, name='metrics-exporter', daemon=True)
+        self._exporter.start()
+
+    def write_state(self):
+        if not self.shared_dir:
+            return
+        path = os.path.join(self.shared_dir, f'{os.getpid()}.json')
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.state(), f)
+        os.replace(temp_path, path)
+
+    def remove_state(self):
+        if not self.shared_dir:
+            return
+        try:
+            os.remove(os.path.join(self.shared_dir, f'{os.getpid()}.json'))
+        except FileNotFoundError:
+            pass
+
+    def _export_loop(self):
+        while True:
+            time.sleep(self.export_interval)
+            try:
+                self.write_state()
+            except Exception as e:
+                logging.warning(f"تعذر كتابة حالة المقاييس: {e}")
+
+    def _read_shared_states(self) -> List[Dict]:
+        if not self.enabled or not self.shared_dir or not os.path.isdir(self.shared_dir):
+            return []
+        states = []
+        for filename in os.listdir(self.shared_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                pid = int(filename[:-5])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            path = os.path.join(self.shared_dir, filename)
+            try:
+                # ملف عامل انتهى دون تنظيف (لم يُحدَّث منذ عدة دورات)
+                if time.time() - os.path.getmtime(path) > max(60.0, 10 * self.export_interval):
+                    continue
+                with open(path) as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return states
+
+# إنشاء سجل عام ومقاييس خط الإدخال
+metrics = MetricsRegistry()
+
+stage_duration = metrics.histogram(
+    'smart_falcon_stage_duration_seconds',
+    'Duration of each ingestion pipeline stage',
+    ('stage',)
+)
+webhook_messages = metrics.counter(
+    'smart_falcon_webhook_messages',
+    'Webhook messages by signal type and outcome',
+    ('signal_type', 'outcome')
+)
+decisions = metrics.counter(
+    'smart_falcon_decisions',
+    'Scoring decisions for KOL track signals',
+    ('decision',)
+)
+telegram_requests = metrics.counter(
+    'smart_falcon_telegram_requests',
+    'Telegram Bot API sendMessage attempts by result',
+    ('result',)
+)
+writer_batch_size = metrics.histogram(
+    'smart_falcon_writer_batch_size',
+    'Messages per ingestion writer commit',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+def span(stage: str):
+    """
+    قياس زمن مرحلة: with span('wallet_lookup'): ...
+    """
+    return metrics.span(stage_duration, stage)
@@ -0,0 +1,93 @@
+import os
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import tuple_
+from src.services.cache import TTLCache
+from src.services.data_version import data_versions
+
+# عدد السجلات مخزن حسب (الاستعلام، إصدار الجدول) فلا يعاد حسابه إلا بعد كتابة جديدة
+count_cache = TTLCache(maxsize=128, ttl=300)
+
+# أقصى عدد سجلات في الصفحة الواحدة (per_page خارج [1, MAX_PER_PAGE] يُقصّ إليه)
+MAX_PER_PAGE = int(os.getenv('PAGINATION_MAX_PER_PAGE', '500'))
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """
+    ترميز موضع آخر سجل في الصفحة كمؤشر نصي
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str, is_datetime: bool = False) -> Tuple:
+    """
+    فك ترميز المؤشر إلى (قيمة الترتيب، المعرف)
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if is_datetime and sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except Exception:
+        raise InvalidCursor('مؤشر الترقيم غير صالح')
+
+def clamp_per_page(per_page: int) -> int:
+    """
+    قص حجم الصفحة إلى [1, MAX_PER_PAGE]
+    """
+    return min(max(per_page, 1), MAX_PER_PAGE)
+
+def keyset_page(query, sort_column, id_column, cursor: Optional[str], per_page: int) -> Tuple[List, Optional[str]]:
+    """
+    جلب صفحة مرتبة تنازلياً حسب (sort_column, id_column) بدءاً بعد المؤشر، والقيم الفارغة (NULL) في النهاية
+    تستخدم مقارنة الصفوف بدلاً من OFFSET فتبقى كلفة الصفحات العميقة ثابتة
+    مقارنة الصفوف مع NULL لا تتحقق أبداً، لذلك تُجلب الصفوف ذات القيمة الفارغة باستعلام ثانٍ
+    (مرتبة حسب id فقط) عند انتهاء الصفوف ذات القيمة، فيبقى كل استعلام بحثاً في الفهرس (sort_column, id)
+    """
+    per_page = clamp_per_page(per_page)
+    is_datetime = getattr(sort_column.type, 'python_type', None) is datetime
+    sort_value = row_id = None
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, is_datetime)
+
+    rows = []
+    if row_id is None or sort_value is not None:
+        valued = query.filter(sort_column.isnot(None))
+        if row_id is not None:
+            valued = valued.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+        rows = valued.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+
+    if len(rows) <= per_page:
+        empty = query.filter(sort_column.is_(None))
+        if row_id is not None and sort_value is None:
+            empty = empty.filter(id_column < row_id)
+        rows += empty.order_by(id_column.desc()).limit(per_page + 1 - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
+
+def cached_count(table: str, key, query) -> int:
+    """
+    عدد سجلات الاستعلام مع تخزينه مؤقتاً حتى تتغير بيانات الجدول
+    """
+    cache_key = (table, key, data_versions.token(table))
+    return count_cache.get_or_set(cache_key, query.order_by(None).count)
+
+def page_info(total: int, per_page: int) -> Dict:
+    return {
+        'total': total,
+        'pages': int(math.ceil(total / per_page)) if per_page > 0 else 0
+    }
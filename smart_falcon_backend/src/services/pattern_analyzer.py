@@ -1,21 +1,38 @@
-import pandas as pd
+import os
+import heapq
 import itertools
 import logging
+from sqlalchemy import distinct, func
 from typing import Dict, List, Tuple, Optional
 from src.models.user import db
 from src.models.smart_falcon import Wallet, Signal, SignalWalletLink
+from src.services.sketches import CountMinSketch, HeavyHitters
 from datetime import datetime, timedelta
 import json
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logging.basicConfig(level=logging.INFO)
 
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+CLUSTER_MODES = ('exact', 'approximate', 'auto')
+# عدد معرفات الإشارات الافتراضي لكل مجموعة في النتائج (الباقي عبر get_cluster_signals)
+CLUSTER_SIGNALS_PREVIEW = 20
+
 class AdvancedPatternAnalyzer:
     """
     محلل الأنماط المتقدم لنظام الصقر الذكي
     يقوم بتحليل الأنماط التاريخية واستخلاص القواعد الذكية
     """
     
-    def __init__(self):
+    def __init__(self, snapshot_store=None):
+        # مخزن اللقطات العمودية (اختياري) لتسريع التحليلات
+        self.snapshot_store = snapshot_store
+        
         self.golden_patterns = {
             'trio': ["KOL_1", "KOL_15", "KOL_22"],
             'pairs': [
@@ -29,66 +46,77 @@ class AdvancedPatternAnalyzer:
         self.MIN_SUCCESS_RATE = 0.6
         self.HIGH_PERFORMANCE_THRESHOLD = 0.7
         self.LOW_PERFORMANCE_THRESHOLD = 0.15
+        
+        # الوضع التقريبي للمجموعات (Count-Min + أعلى K): يُفعَّل تلقائياً فوق هذا العدد من المحافظ
+        self.CLUSTER_APPROX_WALLET_THRESHOLD = int(os.getenv('CLUSTER_APPROX_WALLET_THRESHOLD', '5000'))
+        self.CLUSTER_SKETCH_EPSILON = float(os.getenv('CLUSTER_SKETCH_EPSILON', '0.0001'))
+        self.CLUSTER_SKETCH_DELTA = float(os.getenv('CLUSTER_SKETCH_DELTA', '0.01'))
+        self.CLUSTER_CANDIDATES = int(os.getenv('CLUSTER_CANDIDATES', '1000'))
     
-    def analyze_wallet_clusters(self, cluster_size: int = 2) -> Dict:
+    def golden_clusters(self) -> List[List[str]]:
+        """
+        المجموعات الذهبية المتتبعة (الثلاثية والأزواج)، نفس مجموعات SmartFalconAnalyzer
+        """
+        return [self.golden_patterns['trio']] + self.golden_patterns['pairs']
+    
+    def analyze_wallet_clusters(self, cluster_size: int = 2, mode: str = 'auto', limit: int = 10,
+                                signals_limit: Optional[int] = CLUSTER_SIGNALS_PREVIEW) -> Dict:
         """
         تحليل مجموعات المحافظ التي تشتري معاً
+        mode: exact (عد كامل) أو approximate (Count-Min بذاكرة ثابتة ثم عد دقيق للمرشحين)
+        أو auto (تقريبي فقط عندما يتجاوز عدد المحافظ CLUSTER_APPROX_WALLET_THRESHOLD)
+        limit: عدد المجموعات المعادة (تُختار بـ heapq دون ترتيب كل المجموعات)
+        signals_limit: أقصى عدد لمعرفات الإشارات لكل مجموعة (None للكل، 0 بدونها)
         """
         try:
+            snapshot = self._get_snapshot()
+            if mode == 'approximate' or (
+                mode != 'exact' and self._cluster_wallet_count(snapshot) > self.CLUSTER_APPROX_WALLET_THRESHOLD
+            ):
+                signals_data = self._get_cluster_signals(snapshot)
+                return self._analyze_wallet_clusters_approximate(signals_data, cluster_size, limit, signals_limit)
+            
+            if snapshot is not None:
+                return self._analyze_wallet_clusters_columnar(snapshot, cluster_size, limit, signals_limit)
+            
             # جلب البيانات من قاعدة البيانات
             signals_data = self._get_signals_with_wallets()
             
             if not signals_data:
                 return {'error': 'لا توجد بيانات كافية للتحليل'}
             
+            # عدادات فقط (دون قوائم الإشارات) لكل مجموعة: [المرات، النجاحات]
             cluster_performance = {}
             
             # تحليل كل إشارة
             for signal in signals_data:
                 wallets = sorted(signal['wallets'])
-                if len(wallets) >= cluster_size:
-                    # إنشاء كل التوافيق الممكنة
-                    for cluster in itertools.combinations(wallets, cluster_size):
-                        cluster_key = tuple(sorted(cluster))
-                        
-                        if cluster_key not in cluster_performance:
-                            cluster_performance[cluster_key] = {
-                                'total_calls': 0,
-                                'successful_calls': 0,
-                                'signals': []
-                            }
-                        
-                        cluster_performance[cluster_key]['total_calls'] += 1
-                        cluster_performance[cluster_key]['signals'].append(signal['signal_id'])
-                        
-                        if signal['performance_status'] == 'SUCCESS':
-                            cluster_performance[cluster_key]['successful_calls'] += 1
-            
-            # تحليل النتائج
-            promising_clusters = []
-            for cluster, data in cluster_performance.items():
-                if data['total_calls'] >= self.MIN_OCCURRENCES:
-                    success_rate = data['successful_calls'] / data['total_calls']
-                    if success_rate >= self.MIN_SUCCESS_RATE:
-                        promising_clusters.append({
-                            'cluster': list(cluster),
-                            'cluster_name': ' & '.join(cluster),
-                            'total_calls': data['total_calls'],
-                            'successful_calls': data['successful_calls'],
-                            'success_rate': success_rate,
-                            'signals': data['signals']
-                        })
+                successful = signal['performance_status'] == 'SUCCESS'
+                # إنشاء كل التوافيق الممكنة
+                for cluster in itertools.combinations(wallets, cluster_size):
+                    counts = cluster_performance.get(cluster)
+                    if counts is None:
+                        counts = cluster_performance[cluster] = [0, 0]
+                    counts[0] += 1
+                    if successful:
+                        counts[1] += 1
             
-            # ترتيب حسب الأداء
-            promising_clusters.sort(key=lambda x: (x['success_rate'], x['total_calls']), reverse=True)
+            top, frequent, promising = self._select_top_clusters(
+                ((cluster, total, successes) for cluster, (total, successes) in cluster_performance.items()), limit
+            )
+            signals = self._collect_cluster_signals(signals_data, cluster_size, [item[2] for item in top], signals_limit)
             
             return {
                 'cluster_size': cluster_size,
+                'mode': 'exact',
                 'total_clusters_analyzed': len(cluster_performance),
-                'promising_clusters': promising_clusters[:10],  # أفضل 10
+                'promising_clusters': [
+                    self._cluster_entry(cluster, total, successes, rate, signals.get(cluster), signals_limit)
+                    for rate, total, cluster, successes in top
+                ],
                 'analysis_summary': {
-                    'clusters_with_min_occurrences': len([c for c in cluster_performance.values() if c['total_calls'] >= self.MIN_OCCURRENCES]),
-                    'high_performance_clusters': len(promising_clusters)
+                    'clusters_with_min_occurrences': frequent,
+                    'high_performance_clusters': promising
                 }
             }
             
@@ -96,11 +124,91 @@ class AdvancedPatternAnalyzer:
             logging.error(f"خطأ في تحليل مجموعات المحافظ: {e}")
             return {'error': str(e)}
     
+    def get_cluster_signals(self, wallets: List[str]) -> List[Dict]:
+        """
+        الإشارات المقيّمة التي شاركت فيها كل محافظ المجموعة (للجلب الكسول لقائمة إشارات مجموعة واحدة)
+        """
+        wallets = sorted(set(wallets))
+        members = db.session.query(SignalWalletLink.signal_id).filter(
+            SignalWalletLink.wallet_unique_id.in_(wallets)
+        ).group_by(SignalWalletLink.signal_id).having(
+            func.count(distinct(SignalWalletLink.wallet_unique_id)) == len(wallets)
+        )
+        rows = db.session.query(Signal.signal_id, Signal.signal_time, Signal.performance_status).filter(
+            Signal.signal_id.in_(members), Signal.evaluation_complete == True
+        ).order_by(Signal.signal_time, Signal.id).all()
+        return [
+            {
+                'signal_id': row.signal_id,
+                'signal_time': row.signal_time.isoformat() if row.signal_time else None,
+                'performance_status': row.performance_status
+            }
+            for row in rows
+        ]
+    
+    def _select_top_clusters(self, counts, limit: int) -> Tuple[List[Tuple], int, int]:
+        """
+        اختيار أفضل limit مجموعة واعدة بـ heapq.nsmallest (ذاكرة O(limit)) بنفس ترتيب الفرز الكامل
+        الترتيب: نسبة النجاح ثم عدد المرات تنازلياً، ثم معرفات المحافظ المرتبة تصاعدياً لفض التعادل
+        (نفس ترتيب النسخة العمودية، فلا يتغير الناتج بحسب ترتيب ظهور الإشارات)
+        counts: تدفق (المجموعة، المرات، النجاحات)؛ يعيد [(النسبة، المرات، المجموعة، النجاحات)]
+        مع عدد المجموعات المتكررة وعدد الواعدة
+        """
+        tally = {'frequent': 0, 'promising': 0}
+        
+        def qualifying():
+            for cluster, total, successes in counts:
+                if total < self.MIN_OCCURRENCES:
+                    continue
+                tally['frequent'] += 1
+                success_rate = successes / total
+                if success_rate >= self.MIN_SUCCESS_RATE:
+                    tally['promising'] += 1
+                    yield success_rate, total, cluster, successes
+        
+        top = heapq.nsmallest(limit, qualifying(), key=lambda item: (-item[0], -item[1], item[2]))
+        return top, tally['frequent'], tally['promising']
+    
+    def _collect_cluster_signals(self, signals_data: List[Dict], cluster_size: int, clusters: List[Tuple],
+                                 signals_limit: Optional[int]) -> Dict[Tuple, List[str]]:
+        """
+        مرور ثانٍ يجمع معرفات الإشارات للمجموعات المختارة فقط (حتى signals_limit لكل مجموعة)
+        """
+        if signals_limit == 0 or not clusters:
+            return {}
+        cap = signals_limit
+        selected = {cluster: [] for cluster in clusters}
+        for signal in signals_data:
+            for cluster in itertools.combinations(sorted(signal['wallets']), cluster_size):
+                signals = selected.get(cluster)
+                if signals is not None and (cap is None or len(signals) < cap):
+                    signals.append(signal['signal_id'])
+        return selected
+    
+    def _cluster_entry(self, cluster, total: int, successes: int, success_rate: float,
+                       signals: Optional[List[str]], signals_limit: Optional[int]) -> Dict:
+        entry = {
+            'cluster': list(cluster),
+            'cluster_name': ' & '.join(cluster),
+            'total_calls': total,
+            'successful_calls': successes,
+            'success_rate': success_rate
+        }
+        if signals_limit != 0:
+            signals = signals or []
+            entry['signals'] = signals if signals_limit is None else signals[:signals_limit]
+            entry['signals_truncated'] = len(entry['signals']) < total
+        return entry
+    
     def analyze_individual_performance(self) -> Dict:
         """
         تحليل أداء المحافظ الفردية
         """
         try:
+            snapshot = self._get_snapshot()
+            if snapshot is not None:
+                return self._analyze_individual_performance_columnar(snapshot)
+            
             wallets = Wallet.query.filter(Wallet.total_calls >= 5).all()
             
             performance_categories = {
@@ -149,6 +257,10 @@ class AdvancedPatternAnalyzer:
         تحليل الأنماط الزمنية للإشارات
         """
         try:
+            snapshot = self._get_snapshot()
+            if snapshot is not None:
+                return self._analyze_time_patterns_columnar(snapshot)
+            
             signals = Signal.query.filter(Signal.evaluation_complete == True).all()
             
             time_analysis = {
@@ -208,9 +320,9 @@ class AdvancedPatternAnalyzer:
             }
             
             # قواعد المجموعات
-            cluster_analysis = self.analyze_wallet_clusters(2)
+            cluster_analysis = self.analyze_wallet_clusters(2, limit=5, signals_limit=0)
             if 'promising_clusters' in cluster_analysis:
-                for cluster in cluster_analysis['promising_clusters'][:5]:
+                for cluster in cluster_analysis['promising_clusters']:
                     rules['cluster_rules'].append({
                         'rule_type': 'cluster_bonus',
                         'wallets': cluster['cluster'],
@@ -260,9 +372,280 @@ class AdvancedPatternAnalyzer:
             logging.error(f"خطأ في توليد القواعد الذكية: {e}")
             return {'error': str(e)}
     
+    def _get_snapshot(self):
+        """
+        جلب اللقطة العمودية إن كانت مفعلة، أو None للعودة إلى الاستعلامات العادية
+        """
+        if self.snapshot_store is None or np is None:
+            return None
+        try:
+            return self.snapshot_store.get()
+        except Exception as e:
+            logging.warning(f"تعذر تحميل لقطة التحليلات، سيتم استخدام قاعدة البيانات: {e}")
+            return None
+    
+    def _analyze_wallet_clusters_columnar(self, snapshot, cluster_size: int, limit: int = 10,
+                                          signals_limit: Optional[int] = CLUSTER_SIGNALS_PREVIEW) -> Dict:
+        """
+        نسخة متجهة من analyze_wallet_clusters تعمل على اللقطة العمودية
+        كل مجموعة تُمثَّل كصف من فهارس المحافظ ويُعدّ تكرارها عبر np.unique
+        """
+        evaluated = snapshot.signal_evaluated[snapshot.link_signal]
+        link_signal = np.asarray(snapshot.link_signal[evaluated])
+        link_wallet = np.asarray(snapshot.link_wallet[evaluated])
+        
+        if len(link_signal) == 0:
+            return {'error': 'لا توجد بيانات كافية للتحليل'}
+        
+        # تجميع الروابط حسب الإشارة مع ترتيب المحافظ داخل كل إشارة
+        order = np.lexsort((link_wallet, link_signal))
+        link_signal = link_signal[order]
+        link_wallet = link_wallet[order]
+        signal_idx, starts, counts = np.unique(link_signal, return_index=True, return_counts=True)
+        
+        cluster_rows = []
+        cluster_signals = []
+        for wallet_count in np.unique(counts[counts >= cluster_size]):
+            selected = counts == wallet_count
+            # مصفوفة (عدد الإشارات × عدد المحافظ) لكل الإشارات ذات نفس عدد المحافظ
+            matrix = link_wallet[starts[selected][:, None] + np.arange(wallet_count)]
+            combos = np.array(list(itertools.combinations(range(wallet_count), cluster_size)))
+            cluster_rows.append(matrix[:, combos].reshape(-1, cluster_size))
+            cluster_signals.append(np.repeat(signal_idx[selected], len(combos)))
+        
+        if not cluster_rows:
+            clusters = np.empty((0, cluster_size), dtype=np.int32)
+            inverse = np.empty(0, dtype=np.int64)
+            totals = np.empty(0, dtype=np.int64)
+            row_signals = np.empty(0, dtype=np.int64)
+        else:
+            row_signals = np.concatenate(cluster_signals)
+            clusters, inverse, totals = np.unique(
+                np.concatenate(cluster_rows), axis=0, return_inverse=True, return_counts=True
+            )
+            inverse = inverse.reshape(-1)
+        
+        row_success = snapshot.signal_status[row_signals] == 1
+        successes = np.bincount(inverse, weights=row_success, minlength=len(clusters)).astype(np.int64)
+        
+        frequent = totals >= self.MIN_OCCURRENCES
+        rates = np.divide(successes, totals, out=np.zeros(len(totals)), where=totals > 0)
+        promising = np.flatnonzero(frequent & (rates >= self.MIN_SUCCESS_RATE))
+        # ترتيب حسب الأداء (نسبة النجاح ثم عدد المرات) ثم معرفات المحافظ لفض التعادل كما في _select_top_clusters
+        # فهارس المحافظ مرتبة كمعرفاتها (cluster_wallet_ids مرتبة)، فترتيب الصفوف = ترتيب معرفات المحافظ
+        promising = promising[np.lexsort(
+            tuple(clusters[promising, k] for k in reversed(range(cluster_size)))
+            + (-totals[promising], -rates[promising])
+        )]
+        
+        wallet_ids = snapshot.cluster_wallet_ids
+        promising_clusters = []
+        for cluster_idx in promising[:limit]:
+            cluster = [str(wallet_ids[w]) for w in clusters[cluster_idx]]
+            signals = None
+            if signals_limit != 0:
+                signals = snapshot.signal_ids[np.sort(row_signals[inverse == cluster_idx])[:signals_limit]]
+                signals = [str(s) for s in signals]
+            promising_clusters.append(self._cluster_entry(
+                cluster, int(totals[cluster_idx]), int(successes[cluster_idx]), float(rates[cluster_idx]),
+                signals, signals_limit
+            ))
+        
+        return {
+            'cluster_size': cluster_size,
+            'mode': 'exact',
+            'total_clusters_analyzed': int(len(clusters)),
+            'promising_clusters': promising_clusters,
+            'analysis_summary': {
+                'clusters_with_min_occurrences': int(frequent.sum()),
+                'high_performance_clusters': int(len(promising))
+            }
+        }
+    
+    def _analyze_wallet_clusters_approximate(self, signals_data: List[Dict], cluster_size: int, limit: int = 10,
+                                             signals_limit: Optional[int] = CLUSTER_SIGNALS_PREVIEW) -> Dict:
+        """
+        تحليل المجموعات بذاكرة ثابتة لعدد كبير من المحافظ، على مرورين:
+        1) Count-Min لعدد مرات كل مجموعة ولنجاحاتها، وأعلى K مجموعة حسب تقدير النجاحات
+           (المجموعة الواعدة تحتاج MIN_OCCURRENCES × MIN_SUCCESS_RATE نجاحات على الأقل)
+        2) عد دقيق (المرات والنجاحات والإشارات) للمرشحين الباقين فقط
+        تقدير Count-Min لا يقل عن القيمة الحقيقية، فلا تُستبعد مجموعة بسبب خطأ التقدير،
+        ويتجاوزها بأكثر من ε·N (N عدد ظهور كل المجموعات) باحتمال لا يزيد عن δ.
+        الأرقام المعادة دقيقة؛ التقريب يمس فقط اختيار المرشحين عندما يتجاوز عددهم سعة أعلى K
+        """
+        if not signals_data:
+            return {'error': 'لا توجد بيانات كافية للتحليل'}
+        
+        totals = CountMinSketch(self.CLUSTER_SKETCH_EPSILON, self.CLUSTER_SKETCH_DELTA)
+        successes = CountMinSketch(self.CLUSTER_SKETCH_EPSILON, self.CLUSTER_SKETCH_DELTA)
+        heavy_hitters = HeavyHitters(self.CLUSTER_CANDIDATES)
+        min_successes = self.MIN_OCCURRENCES * self.MIN_SUCCESS_RATE
+        
+        # المرور الأول: تقديرات بذاكرة ثابتة
+        for signal in signals_data:
+            wallets = sorted(signal['wallets'])
+            successful = signal['performance_status'] == 'SUCCESS'
+            for cluster in itertools.combinations(wallets, cluster_size):
+                total_estimate = totals.add(cluster)
+                success_estimate = successes.add(cluster) if successful else successes.estimate(cluster)
+                # العرض عند كل ظهور لا عند النجاح فقط، فقد يكتمل MIN_OCCURRENCES بإشارة فاشلة
+                if total_estimate >= self.MIN_OCCURRENCES and success_estimate >= min_successes:
+                    heavy_hitters.offer(cluster, success_estimate)
+        
+        # المرور الثاني: عد دقيق للمرشحين فقط
+        candidates = {}
+        for signal in signals_data:
+            wallets = sorted(signal['wallets'])
+            for cluster in itertools.combinations(wallets, cluster_size):
+                if cluster not in heavy_hitters:
+                    continue
+                counts = candidates.setdefault(cluster, [0, 0])
+                counts[0] += 1
+                if signal['performance_status'] == 'SUCCESS':
+                    counts[1] += 1
+        
+        top, frequent, promising = self._select_top_clusters(
+            ((cluster, total, wins) for cluster, (total, wins) in candidates.items()), limit
+        )
+        signals = self._collect_cluster_signals(signals_data, cluster_size, [item[2] for item in top], signals_limit)
+        
+        return {
+            'cluster_size': cluster_size,
+            'mode': 'approximate',
+            # عدد المجموعات المختلفة غير معروف بذاكرة ثابتة
+            'total_clusters_analyzed': None,
+            'promising_clusters': [
+                self._cluster_entry(cluster, total, wins, rate, signals.get(cluster), signals_limit)
+                for rate, total, cluster, wins in top
+            ],
+            'analysis_summary': {
+                # بين المرشحين فقط (حد أدنى للقيمة الدقيقة)
+                'clusters_with_min_occurrences': frequent,
+                'high_performance_clusters': promising
+            },
+            'approximation': {
+                'epsilon': totals.epsilon,
+                'delta': totals.delta,
+                'width': totals.width,
+                'depth': totals.depth,
+                'cluster_occurrences': totals.total,
+                'error_bound': totals.error_bound,
+                'candidates_capacity': heavy_hitters.capacity,
+                'candidates': len(heavy_hitters),
+                'candidates_saturated': len(heavy_hitters) >= heavy_hitters.capacity
+            }
+        }
+    
+    def _analyze_individual_performance_columnar(self, snapshot) -> Dict:
+        """
+        نسخة متجهة من analyze_individual_performance تعمل على اللقطة العمودية
+        """
+        total_calls = np.asarray(snapshot.wallet_total_calls)
+        success_rate = np.asarray(snapshot.wallet_success_rate)
+        analyzed = total_calls >= 5
+        
+        category_names = ['high_performers', 'consistent_performers', 'low_performers', 'new_promising']
+        # نفس ترتيب الشروط في النسخة العادية: أول شرط يتحقق يحدد الفئة
+        categories = np.select(
+            [
+                success_rate >= self.HIGH_PERFORMANCE_THRESHOLD,
+                (success_rate >= 0.4) & (total_calls >= 10),
+                (success_rate <= self.LOW_PERFORMANCE_THRESHOLD) & (total_calls > 5),
+                (total_calls <= 10) & (success_rate >= 0.5)
+            ],
+            [0, 1, 2, 3],
+            default=-1
+        )
+        
+        performance_categories = {}
+        for code, category in enumerate(category_names):
+            members = np.flatnonzero(analyzed & (categories == code))
+            members = members[np.lexsort((-total_calls[members], -success_rate[members]))]
+            performance_categories[category] = [snapshot.wallet_dict(i) for i in members]
+        
+        return {
+            'total_wallets_analyzed': int(analyzed.sum()),
+            'performance_categories': performance_categories,
+            'summary': {
+                'high_performers_count': len(performance_categories['high_performers']),
+                'consistent_performers_count': len(performance_categories['consistent_performers']),
+                'low_performers_count': len(performance_categories['low_performers']),
+                'new_promising_count': len(performance_categories['new_promising'])
+            }
+        }
+    
+    def _analyze_time_patterns_columnar(self, snapshot) -> Dict:
+        """
+        نسخة متجهة من analyze_time_patterns تعمل على اللقطة العمودية
+        """
+        selected = np.asarray(snapshot.signal_evaluated) & (np.asarray(snapshot.signal_time) >= 0)
+        signal_time = np.asarray(snapshot.signal_time)[selected]
+        successful = np.asarray(snapshot.signal_status)[selected] == 1
+        
+        hours = (signal_time // 3600) % 24
+        # 1970-01-01 كان يوم خميس
+        weekdays = (signal_time // 86400 + 3) % 7
+        
+        def summarize(keys, size, labels):
+            totals = np.bincount(keys, minlength=size)
+            wins = np.bincount(keys, weights=successful, minlength=size).astype(np.int64)
+            return {
+                labels[k]: {
+                    'total': int(totals[k]),
+                    'successful': int(wins[k]),
+                    'success_rate': wins[k] / totals[k]
+                }
+                for k in np.flatnonzero(totals)
+            }
+        
+        return {
+            'hourly_performance': summarize(hours, 24, list(range(24))),
+            'daily_performance': summarize(weekdays, 7, WEEKDAY_NAMES),
+            'success_time_distribution': []
+        }
+    
+    def _cluster_wallet_count(self, snapshot) -> int:
+        """
+        عدد المحافظ المشاركة في إشارات مقيّمة (لاختيار الوضع التقريبي) دون تحميل الإشارات
+        """
+        if snapshot is None:
+            return db.session.query(func.count(distinct(SignalWalletLink.wallet_unique_id))).join(
+                Signal, Signal.signal_id == SignalWalletLink.signal_id
+            ).filter(Signal.evaluation_complete == True).scalar() or 0
+        
+        evaluated = snapshot.signal_evaluated[snapshot.link_signal]
+        return int(np.unique(snapshot.link_wallet[evaluated]).size)
+    
+    def _get_cluster_signals(self, snapshot) -> List[Dict]:
+        """
+        الإشارات المقيّمة مع محافظها بنفس شكل _get_signals_with_wallets، من اللقطة إن وُجدت
+        """
+        if snapshot is None:
+            return self._get_signals_with_wallets()
+        
+        evaluated = snapshot.signal_evaluated[snapshot.link_signal]
+        link_signal = np.asarray(snapshot.link_signal[evaluated])
+        link_wallet = np.asarray(snapshot.link_wallet[evaluated])
+        order = np.argsort(link_signal, kind='stable')
+        link_signal = link_signal[order]
+        link_wallet = link_wallet[order]
+        signal_idx, starts = np.unique(link_signal, return_index=True)
+        
+        wallet_ids = snapshot.cluster_wallet_ids
+        successful = snapshot.signal_status[signal_idx] == 1
+        return [
+            {
+                'signal_id': str(snapshot.signal_ids[signal]),
+                'performance_status': 'SUCCESS' if success else 'FAILURE',
+                'wallets': [str(wallet_ids[w]) for w in wallets]
+            }
+            for signal, success, wallets in zip(signal_idx, successful, np.split(link_wallet, starts[1:]))
+        ]
+    
     def _get_signals_with_wallets(self) -> List[Dict]:
         """
         جلب الإشارات مع المحافظ المرتبطة بها
+        بترتيب الإدراج (كترتيب فهارس اللقطة العمودية) حتى تتطابق قوائم إشارات المجموعات في المسارين
         """
         try:
             query = db.session.query(
@@ -273,7 +656,7 @@ class AdvancedPatternAnalyzer:
                 SignalWalletLink, Signal.signal_id == SignalWalletLink.signal_id
             ).filter(
                 Signal.evaluation_complete == True
-            ).all()
+            ).order_by(Signal.id, SignalWalletLink.id).all()
             
             # تجميع البيانات
             signals_dict = {}
@@ -0,0 +1,156 @@
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Sequence
+from sqlalchemy import delete, select
+from src.models.user import db
+from src.models.smart_falcon import Signal, SignalWalletLink, QuantileSketch
+from src.services.sketches import TDigest
+from src.services.clock import clock
+
+logging.basicConfig(level=logging.INFO)
+
+PROFIT_METRIC = 'profit_multiplier'
+DEFAULT_PERCENTILES = (0.5, 0.9)
+COMPRESSION = 100
+
+def sketch_key(subject_type: str, subject_id: str, metric: str = PROFIT_METRIC) -> str:
+    return f"{metric}:{subject_type}:{subject_id}"
+
+def cluster_id(wallets: Iterable[str]) -> str:
+    return '+'.join(sorted(wallets))
+
+def tracked_clusters(wallet_ids: Iterable[str], clusters: Sequence[Sequence[str]]) -> List[str]:
+    """
+    المجموعات المتتبعة (الذهبية) الموجودة بالكامل ضمن محافظ الإشارة
+    """
+    wallet_ids = set(wallet_ids)
+    return [cluster_id(cluster) for cluster in clusters if set(cluster) <= wallet_ids]
+
+def record_profit_multiplier(multiplier: float, wallet_ids: Iterable[str], clusters: Sequence[Sequence[str]] = ()):
+    """
+    إضافة مضاعف ربح إشارة مُقيَّمة إلى ملخصات محافظها ومجموعاتها المتتبعة
+    تحديث كل ملخص O(حجم الملخص) مهما بلغ عدد الإشارات السابقة
+    """
+    wallet_ids = list(dict.fromkeys(wallet_ids))
+    subjects = {sketch_key('wallet', w): ('wallet', w) for w in wallet_ids}
+    subjects.update({sketch_key('cluster', c): ('cluster', c) for c in tracked_clusters(wallet_ids, clusters)})
+    if not subjects:
+        return
+
+    # FOR UPDATE يمنع فقدان التحديثات بين العمال على PostgreSQL (SQLite يسلسل الكتابة أصلاً)
+    rows = QuantileSketch.query.filter(
+        QuantileSketch.sketch_key.in_(list(subjects))
+    ).with_for_update().all()
+    existing = {row.sketch_key: row for row in rows}
+    now = clock.now()
+
+    for key, (subject_type, subject_id) in subjects.items():
+        row = existing.get(key)
+        if row is None:
+            row = QuantileSketch(
+                sketch_key=key,
+                metric=PROFIT_METRIC,
+                subject_type=subject_type,
+                subject_id=subject_id
+            )
+            db.session.add(row)
+        digest = TDigest.from_json(row.data, COMPRESSION)
+        digest.add(multiplier)
+        row.data = digest.to_json()
+        row.count = int(digest.count)
+        row.updated_at = now
+
+def load_digests(subject_type: str, subject_ids: Iterable[str]) -> Dict[str, TDigest]:
+    rows = db.session.query(QuantileSketch.subject_id, QuantileSketch.data).filter(
+        QuantileSketch.sketch_key.in_([sketch_key(subject_type, s) for s in subject_ids])
+    ).all()
+    return {row.subject_id: TDigest.from_json(row.data, COMPRESSION) for row in rows}
+
+def merged_digest(subject_type: str, subject_ids: Iterable[str]) -> TDigest:
+    """
+    دمج ملخصات عدة محافظ (أو مجموعات) في ملخص واحد
+    """
+    merged = TDigest(COMPRESSION)
+    for digest in load_digests(subject_type, subject_ids).values():
+        merged.merge(digest)
+    return merged
+
+def summarize(digest: TDigest, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict:
+    return {
+        'count': int(digest.count),
+        'min': digest.min if digest.count else None,
+        'max': digest.max if digest.count else None,
+        'percentiles': digest.percentiles(percentiles)
+    }
+
+def rebuild_profit_sketches(clusters: Sequence[Sequence[str]] = (), batch_size: int = 5000) -> Dict:
+    """
+    إعادة بناء كل الملخصات من الإشارات المُقيَّمة (للبيانات السابقة لهذه الميزة أو بعد الاستيراد)
+    """
+    started = time.perf_counter()
+    digests: Dict[str, TDigest] = {}
+    subjects: Dict[str, tuple] = {}
+
+    def add(subject_type: str, subject_id: str, value: float):
+        key = sketch_key(subject_type, subject_id)
+        if key not in digests:
+            digests[key] = TDigest(COMPRESSION)
+            subjects[key] = (subject_type, subject_id)
+        digests[key].add(value)
+
+    rows = db.session.execute(
+        select(Signal.signal_id, Signal.profit_multiplier, SignalWalletLink.wallet_unique_id)
+        .join(SignalWalletLink, SignalWalletLink.signal_id == Signal.signal_id)
+        .where(Signal.evaluation_complete.is_(True), Signal.profit_multiplier > 0)
+        .order_by(Signal.signal_id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    signals = 0
+    current_signal, current_value, current_wallets = None, None, []
+
+    def flush_signal():
+        for wallet_id in current_wallets:
+            add('wallet', wallet_id, current_value)
+        for cluster in tracked_clusters(current_wallets, clusters):
+            add('cluster', cluster, current_value)
+
+    for signal_id, multiplier, wallet_id in rows:
+        if signal_id != current_signal:
+            if current_signal is not None:
+                flush_signal()
+                signals += 1
+            current_signal, current_value, current_wallets = signal_id, multiplier, []
+        current_wallets.append(wallet_id)
+    if current_signal is not None:
+        flush_signal()
+        signals += 1
+
+    now = datetime.now(timezone.utc)
+    try:
+        db.session.execute(delete(QuantileSketch).where(QuantileSketch.metric == PROFIT_METRIC))
+        db.session.add_all([
+            QuantileSketch(
+                sketch_key=key,
+                metric=PROFIT_METRIC,
+                subject_type=subjects[key][0],
+                subject_id=subjects[key][1],
+                count=int(digest.count),
+                data=digest.to_json(),
+                updated_at=now
+            )
+            for key, digest in digests.items()
+        ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    summary = {
+        'signals': signals,
+        'sketches': len(digests),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    logging.info(f"تمت إعادة بناء ملخصات مضاعف الربح: {summary}")
+    return summary
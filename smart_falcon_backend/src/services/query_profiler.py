@@ -0,0 +1,266 @@
+"""
+محلل استعلامات SQL لكل طلب عبر أحداث before/after_cursor_execute
+- عدد الاستعلامات وزمنها لكل طلب في ترويسات X-Query-* و Server-Timing
+- كشف أنماط N+1: نفس شكل الاستعلام (بعد إزالة القيم) يتكرر N_PLUS_ONE_THRESHOLD مرة أو أكثر
+- تقرير /debug/queries لكل نقطة وآخر الطلبات
+- query_budget: حد أقصى لعدد الاستعلامات داخل كتلة (للاختبارات)
+يُفعَّل بـ SQL_PROFILER_ENABLED=1؛ عند التعطيل لا تُسجل أي أحداث على المحرك
+"""
+import os
+import re
+import threading
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Optional
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logging.basicConfig(level=logging.INFO)
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """
+    شكل الاستعلام دون القيم: مسافات موحدة، القيم الحرفية ?، وقوائم IN الموسعة (?, ?, ...) كـ (?...)
+    """
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _STRING_LITERAL.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = re.sub(r'%\(\w+\)s|:\w+|\$\d+', '?', shape)
+    return _PLACEHOLDER_LIST.sub('(?...)', shape)
+
+class QueryProfile:
+    """
+    استعلامات كتلة واحدة (طلب أو query_budget)، وتنتقل كل تسجيلة إلى الملف الأب إن وُجد
+    """
+    __slots__ = ('parent', 'queries', 'total_time', 'shapes')
+
+    def __init__(self, parent: Optional['QueryProfile'] = None):
+        self.parent = parent
+        self.queries = 0
+        self.total_time = 0.0
+        # شكل الاستعلام -> [العدد، الزمن]
+        self.shapes: Dict[str, list] = {}
+
+    def record(self, statement: str, duration: float):
+        shape = statement_shape(statement)
+        profile = self
+        while profile is not None:
+            profile.queries += 1
+            profile.total_time += duration
+            entry = profile.shapes.get(shape)
+            if entry is None:
+                profile.shapes[shape] = [1, duration]
+            else:
+                entry[0] += 1
+                entry[1] += duration
+            profile = profile.parent
+
+    def repeated(self, threshold: int) -> List[Dict]:
+        """
+        الأشكال المتكررة threshold مرة أو أكثر (مرشحة لـ N+1)، الأكثر تكراراً أولاً
+        """
+        return [
+            {'statement': shape, 'count': count, 'time_ms': round(duration * 1000, 2)}
+            for shape, (count, duration) in sorted(self.shapes.items(), key=lambda item: -item[1][0])
+            if count >= threshold
+        ]
+
+    def summary(self, threshold: int) -> Dict:
+        return {
+            'queries': self.queries,
+            'time_ms': round(self.total_time * 1000, 2),
+            'distinct_statements': len(self.shapes),
+            'repeated': self.repeated(threshold)
+        }
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryProfiler:
+    """
+    يربط الاستعلامات بالطلب الجاري (أو بكتلة query_budget) في نفس الخيط
+    """
+
+    def __init__(self, history: int = 100):
+        self.enabled = os.getenv('SQL_PROFILER_ENABLED', '0') == '1'
+        self.n_plus_one_threshold = int(os.getenv('SQL_PROFILER_N_PLUS_ONE_THRESHOLD', '5'))
+        self._local = threading.local()
+        self._installed = False
+        self._install_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=history)
+        # نقطة -> إجماليات الطلبات
+        self._endpoints: Dict[str, Dict] = {}
+
+    def init_app(self, app):
+        if not self.enabled:
+            return
+        self.install()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def install(self):
+        """
+        تسجيل أحداث المؤشر على كل المحركات (مرة واحدة)
+        """
+        if self._installed:
+            return
+        with self._install_lock:
+            if self._installed:
+                return
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._installed = True
+
+    def current(self) -> Optional[QueryProfile]:
+        return getattr(self._local, 'profile', None)
+
+    @contextmanager
+    def activate(self, profile: Optional[QueryProfile]):
+        """
+        جعل ملف استعلامات نشطاً في الخيط الحالي (مثلاً في خيط كاتب الإدخال نيابة عن الطلب)
+        """
+        previous = self.current()
+        self._local.profile = profile
+        try:
+            yield profile
+        finally:
+            self._local.profile = previous
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.current() is not None:
+            conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = self.current()
+        if profile is None:
+            return
+        started = conn.info.get('query_started')
+        if not started:
+            return
+        profile.record(statement, time.perf_counter() - started.pop())
+
+    def _start_request(self):
+        g.query_profile = QueryProfile(parent=self.current())
+        g.query_profile_previous = self.current()
+        self._local.profile = g.query_profile
+
+    def _finish_request(self, response):
+        profile = g.get('query_profile')
+        if profile is None:
+            return response
+        summary = profile.summary(self.n_plus_one_threshold)
+        response.headers['X-Query-Count'] = str(summary['queries'])
+        response.headers['X-Query-Time-Ms'] = str(summary['time_ms'])
+        response.headers['X-Query-Repeated'] = str(len(summary['repeated']))
+        response.headers['Server-Timing'] = f'db;dur={summary["time_ms"]};desc="{summary["queries"]} queries"'
+        if request.path != '/debug/queries':
+            self._store(request.endpoint or request.path, request.method, request.path, response.status_code, summary)
+        if summary['repeated']:
+            logging.warning(
+                f"نمط N+1 محتمل في {request.method} {request.path}: "
+                f"{summary['repeated'][0]['count']}× {summary['repeated'][0]['statement'][:120]}"
+            )
+        return response
+
+    def _teardown_request(self, exc):
+        if 'query_profile' in g:
+            self._local.profile = g.pop('query_profile_previous', None)
+            g.pop('query_profile', None)
+
+    def _store(self, endpoint: str, method: str, path: str, status: int, summary: Dict):
+        with self._lock:
+            self._recent.append({
+                'endpoint': endpoint,
+                'method': method,
+                'path': path,
+                'status': status,
+                'at': time.time(),
+                **summary
+            })
+            totals = self._endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'max_queries': 0, 'time_ms': 0.0, 'n_plus_one_requests': 0,
+                'repeated_statements': {}
+            })
+            totals['requests'] += 1
+            totals['queries'] += summary['queries']
+            totals['max_queries'] = max(totals['max_queries'], summary['queries'])
+            totals['time_ms'] += summary['time_ms']
+            if summary['repeated']:
+                totals['n_plus_one_requests'] += 1
+                for item in summary['repeated']:
+                    totals['repeated_statements'][item['statement']] = max(
+                        totals['repeated_statements'].get(item['statement'], 0), item['count']
+                    )
+
+    def report(self) -> Dict:
+        """
+        إجماليات كل نقطة (الأكثر استعلامات أولاً) وآخر الطلبات
+        """
+        with self._lock:
+            endpoints = []
+            for endpoint, totals in self._endpoints.items():
+                endpoints.append({
+                    'endpoint': endpoint,
+                    'requests': totals['requests'],
+                    'avg_queries': round(totals['queries'] / totals['requests'], 2),
+                    'max_queries': totals['max_queries'],
+                    'avg_time_ms': round(totals['time_ms'] / totals['requests'], 2),
+                    'n_plus_one_requests': totals['n_plus_one_requests'],
+                    'repeated_statements': [
+                        {'statement': statement, 'max_count': count}
+                        for statement, count in sorted(totals['repeated_statements'].items(), key=lambda item: -item[1])
+                    ]
+                })
+            recent = list(self._recent)
+        endpoints.sort(key=lambda item: (-item['n_plus_one_requests'], -item['avg_queries']))
+        return {
+            'n_plus_one_threshold': self.n_plus_one_threshold,
+            'endpoints': endpoints,
+            'recent_requests': recent[::-1]
+        }
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._endpoints.clear()
+
+# إنشاء مثيل عام للمحلل
+query_profiler = QueryProfiler()
+
+@contextmanager
+def query_budget(max_queries: int, max_repeated: Optional[int] = None):
+    """
+    التحقق من أن الكتلة لا تتجاوز max_queries استعلاماً (ولا يتكرر شكل واحد أكثر من max_repeated مرة)
+    مثال في اختبار:
+        with query_budget(5):
+            client.get('/api/wallets')
+    يرفع QueryBudgetExceeded (AssertionError) مع أكثر الأشكال تكراراً
+    """
+    query_profiler.install()
+    profile = QueryProfile(parent=query_profiler.current())
+    with query_profiler.activate(profile):
+        yield profile
+
+    problems = []
+    if profile.queries > max_queries:
+        problems.append(f'{profile.queries} استعلاماً (الحد {max_queries})')
+    if max_repeated is not None:
+        worst = profile.repeated(max_repeated + 1)
+        if worst:
+            problems.append(f"تكرر شكل واحد {worst[0]['count']} مرة (الحد {max_repeated})")
+    if problems:
+        top = '\n'.join(
+            f"  {item['count']}× {item['statement']}" for item in profile.repeated(1)[:5]
+        )
+        raise QueryBudgetExceeded(f"تجاوز ميزانية الاستعلامات: {'، '.join(problems)}\n{top}")
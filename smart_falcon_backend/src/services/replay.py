@@ -0,0 +1,266 @@
+"""
+إعادة تشغيل رسائل telegram_messages المخزنة عبر خط الإدخال نفسه (ingest_message وكاتب الإدخال)
+في قاعدة بيانات جديدة، بترتيب received_time
+- القراءة من المصدر على دفعات (yield_per) دون تحميل السجل كاملاً في الذاكرة
+- ساعة افتراضية: كل رسالة تُعالج ووقت المعالجة = وقت استقبالها الأصلي، فتعمل مهلة تقييم الإشارات
+  وتناقص العدادات كما عملت أصلاً مهما كانت سرعة التشغيل
+- السرعات: realtime، مضاعف (10x)، أو max دون انتظار
+- مقارنة processing_result الجديدة بالمخزنة (اختبار انحدار على حركة حقيقية)؛ رسائل وصلت متزامنة
+  بفارق أجزاء من الثانية ربما طُبقت أصلاً بترتيب مختلف (ترتيب id) فتظهر كاختلافات
+لا تُنفذ الآثار الجانبية (بث الأحداث وإرسال التوصيات إلى تيليجرام)، فتُستثنى حقولها من المقارنة
+"""
+import os
+import json
+import time
+import logging
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.engine import make_url
+from src.models.user import db
+from src.models.smart_falcon import TelegramMessage
+from src.storage import DEFAULT_SQLITE_PATH
+from src.services.clock import clock
+from src.services.ingestion_writer import ingestion_writer
+
+logging.basicConfig(level=logging.INFO)
+
+# معرف الإشارة يتضمن ثانية المعالجة، وقد تختلف عن ثانية الاستقبال الأصلية
+VOLATILE_RESULT_KEYS = ('signal_id',)
+# تضيفها dispatch_side_effects بعد الحفظ عند إرسال التوصية، وإعادة التشغيل لا تنفذ الآثار الجانبية
+SIDE_EFFECT_RESULT_KEYS = ('recommendation_sent', 'message')
+MISMATCH_SAMPLES = 20
+
+def parse_speed(value: str) -> Optional[float]:
+    """
+    'max' -> None (دون انتظار)، 'realtime' -> 1، '10x' أو '10' -> 10
+    """
+    value = (value or 'max').strip().lower()
+    if value == 'max':
+        return None
+    if value == 'realtime':
+        return 1.0
+    speed = float(value[:-1] if value.endswith('x') else value)
+    if speed <= 0:
+        raise ValueError('السرعة يجب أن تكون أكبر من صفر')
+    return speed
+
+def source_uri(source: str) -> str:
+    """
+    مسار ملف SQLite يُفتح للقراءة فقط، وغيره يُعامل كعنوان SQLAlchemy
+    """
+    if '://' in source:
+        return source
+    return f'sqlite:///file:{source}?mode=ro&uri=true'
+
+def target_uri(target: str) -> str:
+    """
+    مسار ملف SQLite (يُنشأ إن لم يوجد) أو عنوان SQLAlchemy
+    """
+    if '://' in target:
+        return target
+    return f'sqlite:///{os.path.abspath(target)}'
+
+def _database_key(url) -> tuple:
+    database = url.database or ''
+    if url.get_backend_name() == 'sqlite':
+        database = os.path.realpath(database[len('file:'):] if database.startswith('file:') else database)
+    return url.get_backend_name(), url.host, url.port, database
+
+def _aware(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+def _normalize(result: Optional[Dict]) -> Optional[Dict]:
+    if result is None:
+        return None
+    return {
+        key: round(value, 6) if isinstance(value, float) else value
+        for key, value in result.items()
+        if key not in VOLATILE_RESULT_KEYS and key not in SIDE_EFFECT_RESULT_KEYS
+    }
+
+class ReplayEngine:
+    def __init__(self, source: str, speed: Optional[float] = None, batch_size: int = 1000,
+                 window: int = 256, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 limit: Optional[int] = None, compare: bool = True):
+        self.source = source_uri(source)
+        self.speed = speed
+        self.batch_size = batch_size
+        # عدد الرسائل المرسلة للكاتب دون انتظار نتيجتها (حتى تُحفظ على دفعات)
+        self.window = window
+        self.since = since
+        self.until = until
+        self.limit = limit
+        self.compare = compare
+
+    def check_target(self, target: str, engine):
+        """
+        التحقق من قاعدة الهدف قبل أي DDL فيها (init_db): يجب أن تكون قاعدة التطبيق (DATABASE_URL)
+        المذكورة صراحة، لا المصدر ولا قاعدة SQLite الحية الافتراضية، وجداولها فارغة
+        """
+        target_key = _database_key(make_url(target_uri(target)))
+        if target_key != _database_key(engine.url):
+            raise ValueError(
+                f"الهدف لا يطابق قاعدة التطبيق {engine.url.render_as_string(hide_password=True)}: "
+                "اضبط DATABASE_URL على قاعدة الهدف"
+            )
+        if target_key == _database_key(make_url(self.source)):
+            raise ValueError('المصدر هو قاعدة البيانات الهدف نفسها')
+        if target_key == _database_key(make_url(f'sqlite:///{DEFAULT_SQLITE_PATH}')):
+            raise ValueError('الهدف هو قاعدة البيانات الحية الافتراضية: إعادة التشغيل تتم في قاعدة جديدة')
+
+        existing = set(inspect(engine).get_table_names())
+        with engine.connect() as connection:
+            for table in db.metadata.sorted_tables:
+                if table.name in existing and connection.execute(select(1).select_from(table).limit(1)).first():
+                    raise ValueError(f'قاعدة البيانات الهدف ليست فارغة (الجدول {table.name})')
+
+    def _messages(self, engine) -> Iterator:
+        """
+        رسائل المصدر بترتيب الاستقبال على دفعات من batch_size صف
+        """
+        messages = TelegramMessage.__table__
+        available = {column['name'] for column in inspect(engine).get_columns(messages.name)}
+        columns = [
+            messages.c[name] for name in (
+                'message_id', 'channel_type', 'message_text', 'received_time',
+                'channel_id', 'telegram_message_id', 'processing_result'
+            ) if name in available
+        ]
+        query = select(*columns).order_by(messages.c.received_time, messages.c.id)
+        if self.since is not None:
+            query = query.where(messages.c.received_time >= self.since)
+        if self.until is not None:
+            query = query.where(messages.c.received_time < self.until)
+        if self.limit is not None:
+            query = query.limit(self.limit)
+
+        with engine.connect() as connection:
+            result = connection.execution_options(yield_per=self.batch_size).execute(query)
+            for partition in result.partitions():
+                for row in partition:
+                    yield row._mapping
+
+    @staticmethod
+    def _apply(row):
+        from src.routes.smart_falcon import ingest_message
+
+        received_time = _aware(row['received_time'])
+        with clock.frozen(received_time):
+            return ingest_message(
+                row['channel_type'], row['message_text'], row['message_id'], received_time,
+                row.get('channel_id'), row.get('telegram_message_id')
+            )
+
+    def run(self) -> Dict:
+        if db.session.query(TelegramMessage.id).first() is not None:
+            raise ValueError('قاعدة البيانات الهدف ليست فارغة: إعادة التشغيل تتم في قاعدة جديدة')
+        db.session.commit()
+
+        engine = create_engine(self.source)
+        if _database_key(engine.url) == _database_key(db.engine.url):
+            engine.dispose()
+            raise ValueError('المصدر هو قاعدة البيانات الهدف نفسها')
+
+        stats = {
+            'by_type': Counter(), 'outcomes': Counter(), 'failed': 0,
+            'compared': 0, 'mismatches': 0, 'samples': []
+        }
+        pending = deque()
+        first_time = last_time = None
+        wall_start = time.perf_counter()
+
+        try:
+            for row in self._messages(engine):
+                received_time = _aware(row['received_time'])
+                if first_time is None:
+                    first_time = received_time
+                last_time = received_time
+                if self.speed is not None:
+                    delay = (received_time - first_time).total_seconds() / self.speed - (time.perf_counter() - wall_start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                stats['by_type'][row['channel_type']] += 1
+                if ingestion_writer.enabled:
+                    pending.append((row, ingestion_writer.submit(self._apply, row)))
+                    while len(pending) >= self.window:
+                        self._collect(stats, *pending.popleft())
+                else:
+                    try:
+                        outcome = ingestion_writer.run(self._apply, row)
+                    except Exception as e:
+                        outcome = e
+                    self._record(stats, row, outcome)
+            while pending:
+                self._collect(stats, *pending.popleft())
+        finally:
+            engine.dispose()
+
+        elapsed = time.perf_counter() - wall_start
+        messages = sum(stats['by_type'].values())
+        virtual_span = (last_time - first_time).total_seconds() if first_time is not None else 0.0
+        summary = {
+            'speed': 'max' if self.speed is None else self.speed,
+            'messages': messages,
+            'by_type': dict(stats['by_type']),
+            'outcomes': dict(stats['outcomes']),
+            'failed': stats['failed'],
+            'first_received_time': first_time.isoformat() if first_time else None,
+            'last_received_time': last_time.isoformat() if last_time else None,
+            'elapsed_sec': round(elapsed, 3),
+            'throughput_msgs_per_sec': round(messages / elapsed, 1) if elapsed > 0 else None,
+            'virtual_span_sec': round(virtual_span, 1),
+            'time_compression': round(virtual_span / elapsed, 1) if elapsed > 0 else None
+        }
+        if self.compare:
+            summary['comparison'] = {
+                'compared': stats['compared'],
+                'mismatches': stats['mismatches'],
+                'samples': stats['samples']
+            }
+        return summary
+
+    def _collect(self, stats: Dict, row, future):
+        try:
+            outcome = future.result()
+        except Exception as e:
+            outcome = e
+        self._record(stats, row, outcome)
+
+    def _record(self, stats: Dict, row, outcome):
+        if isinstance(outcome, Exception):
+            stats['failed'] += 1
+            logging.error(f"فشل إعادة تشغيل الرسالة {row['message_id']}: {outcome}")
+            return
+
+        result = outcome.result
+        if 'error' in result:
+            stats['outcomes']['error'] += 1
+        elif 'decision' in result:
+            stats['outcomes'][f"signal_{result['decision']}"] += 1
+        elif 'performance_status' in result:
+            stats['outcomes'][f"evaluation_{result['performance_status']}"] += 1
+        else:
+            stats['outcomes']['other'] += 1
+
+        stored = row.get('processing_result')
+        if not self.compare or not stored:
+            return
+        try:
+            expected = _normalize(json.loads(stored))
+        except ValueError:
+            return
+        actual = _normalize(result)
+        stats['compared'] += 1
+        if expected != actual:
+            stats['mismatches'] += 1
+            if len(stats['samples']) < MISMATCH_SAMPLES:
+                stats['samples'].append({
+                    'message_id': row['message_id'],
+                    'channel_type': row['channel_type'],
+                    'received_time': _aware(row['received_time']).isoformat(),
+                    'expected': expected,
+                    'actual': actual
+                })
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+from flask import Response, jsonify
+
+try:
+    import orjson
+except ImportError:  # orjson اختياري، نعود إلى jsonify بدونه
+    orjson = None
+
+# orjson.Fragment يسمح بتمرير نص JSON مخزن كما هو دون فكه وإعادة ترميزه
+FAST_JSON = orjson is not None and hasattr(orjson, 'Fragment')
+
+class InvalidFields(ValueError):
+    pass
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """
+    تحليل معامل ?fields= مع التحقق من أسماء الحقول
+    """
+    if not value:
+        return list(allowed)
+
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise InvalidFields(f"حقول غير معروفة: {', '.join(unknown)}")
+    return fields
+
+def project_columns(model, fields: Iterable[str], required: Iterable[str] = ()) -> List:
+    """
+    أعمدة الاستعلام للحقول المطلوبة (مع الحقول اللازمة داخلياً كمفتاح الترقيم)
+    """
+    names = list(dict.fromkeys(list(fields) + list(required)))
+    return [getattr(model, name) for name in names]
+
+def raw_json(text: Optional[str], default: str = '[]'):
+    """
+    قيمة عمود JSON نصي جاهزة للتسلسل دون فك ترميزها إن أمكن
+    """
+    if FAST_JSON:
+        return orjson.Fragment(text or default)
+    return json.loads(text or default)
+
+def rows_to_dicts(rows, fields: Sequence[str], json_fields: Iterable[str] = ()) -> List[Dict]:
+    """
+    تحويل صفوف استعلام أعمدة (بدون كائنات ORM) إلى قواميس بنفس شكل to_dict
+    """
+    json_fields = set(json_fields)
+    result = []
+    for row in rows:
+        item = {}
+        for field in fields:
+            value = getattr(row, field)
+            if field in json_fields:
+                value = raw_json(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            item[field] = value
+        result.append(item)
+    return result
+
+def json_response(payload, status: int = 200) -> Response:
+    """
+    استجابة JSON عبر orjson عند توفره، وإلا عبر jsonify
+    """
+    if FAST_JSON:
+        return Response(
+            orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+            status=status,
+            mimetype='application/json'
+        )
+    response = jsonify(payload)
+    response.status_code = status
+    return response
@@ -0,0 +1,243 @@
+"""
+هياكل بيانات تقريبية بذاكرة ثابتة (بايثون خالص دون اعتماديات)
+- TDigest: تقدير المئينات (p50/p90...) لتدفق قيم، قابل للدمج والتخزين كـ JSON
+- CountMinSketch: تقدير تكرار العناصر (لا يقل أبداً عن التكرار الحقيقي)
+- HeavyHitters: أعلى K عناصر حسب تقدير Count-Min بذاكرة O(K)
+"""
+import heapq
+import json
+import math
+import random
+from array import array
+from typing import Dict, Hashable, Iterable, List, Optional
+
+class TDigest:
+    """
+    t-digest بأسلوب الدمج (merging digest) مع دالة المقياس k1
+    يحتفظ بعدد محدود من المراكز (~compression) بدقة أعلى عند الأطراف
+    الخطأ النسبي في المئين q يتناسب مع q(1-q)/compression تقريباً
+    """
+
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: List[List[float]] = []
+        self._buffer: List[List[float]] = []
+
+    def add(self, value: float, weight: float = 1.0):
+        value = float(value)
+        self._buffer.append([value, weight])
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def update(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """
+        دمج ملخص آخر في هذا الملخص (مثلاً ملخصات عدة محافظ لمجموعة)
+        """
+        if other.count == 0:
+            return self
+        other._compress()
+        self._buffer.extend([list(c) for c in other._centroids])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q: float) -> float:
+        return self.compression * (math.asin(2 * q - 1) / math.pi + 0.5) / 2
+
+    def _q(self, k: float) -> float:
+        k = min(k, self.compression / 2)
+        return (math.sin((2 * k / self.compression - 0.5) * math.pi) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer)
+        self._buffer = []
+
+        merged = []
+        weight_so_far = 0.0
+        q_limit = self._q(self._k(0.0) + 1) * self.count
+        mean, weight = items[0]
+        for item_mean, item_weight in items[1:]:
+            if weight_so_far + weight + item_weight <= q_limit:
+                weight += item_weight
+                mean += (item_mean - mean) * item_weight / weight
+            else:
+                merged.append([mean, weight])
+                weight_so_far += weight
+                q_limit = self._q(self._k(weight_so_far / self.count) + 1) * self.count
+                mean, weight = item_mean, item_weight
+        merged.append([mean, weight])
+        self._centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        تقدير المئين q (بين 0 و 1) بالاستيفاء الخطي بين مراكز المجموعات
+        """
+        if self.count == 0:
+            return None
+        self._compress()
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        centroids = self._centroids
+        if len(centroids) == 1:
+            return centroids[0][0]
+
+        target = q * self.count
+        cumulative = 0.0
+        previous_center = 0.0
+        previous_mean = self.min
+        for mean, weight in centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                fraction = (target - previous_center) / span if span > 0 else 0.0
+                return previous_mean + (mean - previous_mean) * fraction
+            cumulative += weight
+            previous_center, previous_mean = center, mean
+
+        span = self.count - previous_center
+        fraction = (target - previous_center) / span if span > 0 else 0.0
+        return previous_mean + (self.max - previous_mean) * fraction
+
+    def percentiles(self, qs: Iterable[float]) -> Dict[str, Optional[float]]:
+        return {f"p{q * 100:g}": self.quantile(q) for q in qs}
+
+    def to_dict(self) -> Dict:
+        self._compress()
+        return {
+            'compression': self.compression,
+            'count': self.count,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'centroids': [[round(mean, 6), weight] for mean, weight in self._centroids]
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TDigest':
+        digest = cls(data.get('compression', 100))
+        digest.count = data.get('count', 0.0)
+        if digest.count:
+            digest.min = data['min']
+            digest.max = data['max']
+        digest._centroids = [list(c) for c in data.get('centroids', [])]
+        return digest
+
+    @classmethod
+    def from_json(cls, text: Optional[str], compression: float = 100) -> 'TDigest':
+        return cls.from_dict(json.loads(text)) if text else cls(compression)
+
+# عدد أولي (2^61 - 1) لدوال التجزئة العامة في CountMinSketch
+MERSENNE_PRIME = (1 << 61) - 1
+
+class CountMinSketch:
+    """
+    Count-Min sketch بعرض w = ⌈e/ε⌉ وعمق d = ⌈ln(1/δ)⌉
+    التقدير ≥ التكرار الحقيقي دائماً، ويتجاوزه بأكثر من ε·N باحتمال لا يزيد عن δ
+    (N مجموع كل الإضافات)
+    """
+
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01, seed: int = 0x5EED):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1 / delta)))
+        self.total = 0
+        self._rows = [array('q', bytes(8 * self.width)) for _ in range(self.depth)]
+        # دالة (a·h + b) mod p مستقلة لكل صف كما يفترض حد الخطأ؛ hash((row, key)) يجعل الصفوف مترابطة
+        # فيتصادم المفتاح مع نفس العنصر الثقيل في كل الصفوف
+        generator = random.Random(seed)
+        self._hashes = [
+            (generator.randrange(1, MERSENNE_PRIME), generator.randrange(MERSENNE_PRIME))
+            for _ in range(self.depth)
+        ]
+
+    def _indexes(self, key: Hashable):
+        # hash ثابت داخل العملية الواحدة، وهذا كافٍ لتحليل في الذاكرة
+        h = hash(key) % MERSENNE_PRIME
+        return [((a * h + b) % MERSENNE_PRIME) % self.width for a, b in self._hashes]
+
+    def add(self, key: Hashable, count: int = 1) -> int:
+        """
+        إضافة تكرار وإرجاع التقدير الجديد
+        """
+        self.total += count
+        estimate = None
+        for row, index in zip(self._rows, self._indexes(key)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    @property
+    def error_bound(self) -> float:
+        """
+        أقصى خطأ إضافي (باحتمال 1-δ) بالنظر لما أضيف حتى الآن
+        """
+        return self.epsilon * self.total
+
+class HeavyHitters:
+    """
+    أعلى capacity عنصراً حسب آخر تقدير معروف لها (مع Count-Min)، بكومة صغرى وحذف كسول
+    أي عنصر يتجاوز تقديره أصغر تقدير في المجموعة يدخلها، فلا تُفقد العناصر الأكثر تكراراً
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._estimates: Dict[Hashable, int] = {}
+        self._heap: List = []
+
+    def offer(self, key: Hashable, estimate: int):
+        if key in self._estimates:
+            self._estimates[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        elif len(self._estimates) < self.capacity:
+            self._estimates[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        elif estimate > self._min_estimate():
+            evicted = heapq.heappop(self._heap)[1]
+            del self._estimates[evicted]
+            self._estimates[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        # تنظيف الإدخالات القديمة المتراكمة
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(estimate, key) for key, estimate in self._estimates.items()]
+            heapq.heapify(self._heap)
+
+    def _min_estimate(self) -> int:
+        # إزالة إدخالات قديمة حتى يطابق رأس الكومة التقدير الحالي لعنصره
+        while self._heap:
+            estimate, key = self._heap[0]
+            if self._estimates.get(key) == estimate:
+                return estimate
+            heapq.heappop(self._heap)
+        return 0
+
+    def items(self) -> Dict[Hashable, int]:
+        return dict(self._estimates)
+
+    def __len__(self):
+        return len(self._estimates)
+
+    def __contains__(self, key):
+        return key in self._estimates
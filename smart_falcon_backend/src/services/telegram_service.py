@@ -1,8 +1,9 @@
 import asyncio
-import aiohttp
+import json
 import logging
 from typing import Optional
 import os
+from src.services.metrics import telegram_requests
 
 logging.basicConfig(level=logging.INFO)
 
@@ -14,7 +15,15 @@ class TelegramNotificationService:
     def __init__(self):
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN', '')
         self.channel_id = os.getenv('TELEGRAM_NOTIFICATION_CHANNEL_ID', '')
-        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        # يمكن توجيهه لخادم محلي (benchmarks/fake_telegram_api.py) في الاختبارات وقياس الحمل
+        self.api_base_url = os.getenv('TELEGRAM_API_BASE_URL', 'https://api.telegram.org').rstrip('/')
+        self.base_url = f"{self.api_base_url}/bot{self.bot_token}"
+        # إعادة المحاولة عند 429 (بعد retry_after) وأخطاء الخادم والشبكة (تراجع أسي)
+        # الإرسال يتم داخل طلب webhook، لذا لا ننتظر أكثر من TELEGRAM_MAX_RETRY_AFTER ثانية
+        self.max_retries = int(os.getenv('TELEGRAM_MAX_RETRIES', '3'))
+        self.max_retry_after = float(os.getenv('TELEGRAM_MAX_RETRY_AFTER', '5'))
+        self.retry_backoff = float(os.getenv('TELEGRAM_RETRY_BACKOFF', '0.5'))
+        self.timeout = float(os.getenv('TELEGRAM_TIMEOUT', '10'))
     
     async def send_message(self, message: str, parse_mode: str = 'Markdown') -> bool:
         """
@@ -24,29 +33,69 @@ class TelegramNotificationService:
             logging.warning("إعدادات التيليجرام غير مكتملة")
             return False
         
+        # استيراد متأخر: aiohttp مكلف ولا تحتاجه العمال التي لا ترسل إشعارات
+        import aiohttp
+        
+        url = f"{self.base_url}/sendMessage"
+        payload = {
+            'chat_id': self.channel_id,
+            'text': message,
+            'parse_mode': parse_mode,
+            'disable_web_page_preview': True
+        }
+        
         try:
-            url = f"{self.base_url}/sendMessage"
-            payload = {
-                'chat_id': self.channel_id,
-                'text': message,
-                'parse_mode': parse_mode,
-                'disable_web_page_preview': True
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        logging.info("✅ تم إرسال الرسالة بنجاح")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        logging.error(f"❌ فشل في إرسال الرسالة: {response.status} - {error_text}")
-                        return False
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+                for attempt in range(self.max_retries + 1):
+                    retry_in = None
+                    try:
+                        async with session.post(url, json=payload) as response:
+                            if response.status == 200:
+                                telegram_requests.inc('ok')
+                                logging.info("✅ تم إرسال الرسالة بنجاح")
+                                return True
+                            
+                            error_text = await response.text()
+                            if response.status == 429:
+                                telegram_requests.inc('rate_limited')
+                                retry_in = self._retry_after(error_text)
+                                if retry_in is not None and retry_in > self.max_retry_after:
+                                    logging.error(f"❌ تجاوز حد معدل التيليجرام (retry_after={retry_in}ث)، لن ننتظر")
+                                    return False
+                                retry_in = retry_in if retry_in is not None else self.retry_backoff * 2 ** attempt
+                            elif response.status >= 500:
+                                telegram_requests.inc('server_error')
+                                retry_in = self.retry_backoff * 2 ** attempt
+                            else:
+                                telegram_requests.inc('client_error')
+                                logging.error(f"❌ فشل في إرسال الرسالة: {response.status} - {error_text}")
+                                return False
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        telegram_requests.inc('network_error')
+                        logging.warning(f"⚠️ خطأ شبكة في إرسال الرسالة: {e}")
+                        retry_in = self.retry_backoff * 2 ** attempt
+                    
+                    if attempt < self.max_retries:
+                        logging.warning(f"⚠️ إعادة محاولة الإرسال بعد {retry_in:.2f}ث ({attempt + 1}/{self.max_retries})")
+                        await asyncio.sleep(retry_in)
+                
+                logging.error(f"❌ فشل في إرسال الرسالة بعد {self.max_retries + 1} محاولات")
+                return False
                         
         except Exception as e:
             logging.error(f"❌ خطأ في إرسال الرسالة: {e}")
             return False
     
+    @staticmethod
+    def _retry_after(error_text: str) -> Optional[float]:
+        """
+        parameters.retry_after من استجابة 429 (بالثواني)
+        """
+        try:
+            return float(json.loads(error_text)['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return None
+    
     def send_message_sync(self, message: str, parse_mode: str = 'Markdown') -> bool:
         """
         إرسال رسالة بشكل متزامن
@@ -0,0 +1,276 @@
+import os
+import math
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import case, exists, func, or_, select, update
+from src.models.user import db
+from src.models.smart_falcon import Wallet, Signal, SignalWalletLink
+from src.services.clock import clock
+from src.services.serialization import project_columns, rows_to_dicts
+
+logging.basicConfig(level=logging.INFO)
+
+# نصف عمر التناقص: وزن مشاركة عمرها نصف عمر = نصف وزن مشاركة جديدة
+DECAY_HALF_LIFE_HOURS = float(os.getenv('WALLET_DECAY_HALF_LIFE_HOURS', '168'))
+DECAY_LAMBDA = math.log(2) / (DECAY_HALF_LIFE_HOURS * 3600)
+
+def current_decayed_calls(decayed_calls: Optional[float], updated_ts: Optional[float], now: Optional[float] = None) -> float:
+    """
+    وزن المشاركات المتناقص حتى اللحظة الحالية (المخزن محسوب عند آخر تحديث)
+    """
+    if not decayed_calls or updated_ts is None:
+        return 0.0
+    now = clock.time() if now is None else now
+    return decayed_calls * math.exp(-DECAY_LAMBDA * max(now - updated_ts, 0.0))
+
+def _decayed_rate(calls, successes):
+    # النجاح يُسجل بعد المشاركة بدقائق فقد يتجاوز العداد المتناقص للمشاركات بقليل
+    return case((calls <= 0, 0.0), (successes >= calls, 1.0), else_=successes * 1.0 / calls)
+
+def _decay_update(calls_increment: float, successes_increment: float, now_ts: float) -> Dict:
+    """
+    قيم SET لتحديث العدادات المتناقصة في O(1): تناقص القيمة المخزنة منذ آخر تحديث ثم الإضافة
+    """
+    wallets = Wallet.__table__.c
+    factor = func.exp(-DECAY_LAMBDA * (now_ts - func.coalesce(wallets.decay_updated_ts, now_ts)))
+    calls = func.coalesce(wallets.decayed_calls, 0.0) * factor + calls_increment
+    successes = func.coalesce(wallets.decayed_successes, 0.0) * factor + successes_increment
+    return {
+        'decayed_calls': calls,
+        'decayed_successes': successes,
+        'decayed_success_rate': _decayed_rate(calls, successes),
+        'decay_updated_ts': now_ts
+    }
+
+def _epoch(column):
+    """
+    تعبير SQL لتحويل عمود تاريخ (UTC بدون منطقة زمنية) إلى ثوانٍ منذ epoch
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return (func.julianday(column) - 2440587.5) * 86400.0
+    return func.extract('epoch', column)
+
+def wallet_unique_id(wallet_info: Dict) -> str:
+    return f"{wallet_info['type']}_{wallet_info['id']}"
+
+def fetch_wallet_performance(wallet_ids: List[str]) -> List[Dict]:
+    """
+    بيانات أداء المحافظ الموجودة باستعلام IN واحد، بنفس ترتيب المعرفات وشكل to_dict
+    (استعلام أعمدة لا كائنات ORM حتى لا نقرأ قيماً قديمة بعد التحديثات الجماعية)
+    """
+    if not wallet_ids:
+        return []
+    rows = db.session.query(*project_columns(Wallet, Wallet.SERIALIZED_FIELDS)).filter(
+        Wallet.wallet_unique_id.in_(set(wallet_ids))
+    ).all()
+    by_id = {row.wallet_unique_id: row for row in rows}
+    ordered = [by_id[w] for w in dict.fromkeys(wallet_ids) if w in by_id]
+    return rows_to_dicts(ordered, Wallet.SERIALIZED_FIELDS)
+
+def _insert_ignore(values: List[Dict]):
+    """
+    إضافة المحافظ غير الموجودة دون خطأ عند التعارض (INSERT ... ON CONFLICT DO NOTHING)
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        # قواعد أخرى: إضافة ما ليس موجوداً فقط
+        existing = set(db.session.execute(
+            select(Wallet.wallet_unique_id).where(
+                Wallet.wallet_unique_id.in_([v['wallet_unique_id'] for v in values])
+            )
+        ).scalars())
+        missing = [v for v in values if v['wallet_unique_id'] not in existing]
+        if missing:
+            db.session.execute(Wallet.__table__.insert(), missing)
+        return
+
+    statement = insert(Wallet.__table__).on_conflict_do_nothing(index_elements=['wallet_unique_id'])
+    db.session.execute(statement, values)
+
+def record_wallet_calls(wallets_details: List[Dict], seen_at: datetime):
+    """
+    تسجيل مشاركة المحافظ في إشارة جديدة: إنشاء الجديدة منها ثم زيادة total_calls (مع success_rate)
+    وتحديث last_seen بأمر UPDATE واحد ذري (لا قراءة ثم كتابة في Python)
+    """
+    new_wallets = {}
+    for wallet_info in wallets_details:
+        unique_id = wallet_unique_id(wallet_info)
+        new_wallets.setdefault(unique_id, {
+            'wallet_unique_id': unique_id,
+            'wallet_type': wallet_info['type'],
+            'wallet_number': wallet_info['id'],
+            'date_added': seen_at,
+            'last_seen': seen_at,
+            'total_calls': 0,
+            'successful_calls': 0,
+            'success_rate': 0.0,
+            'status': 'ACTIVE',
+            'decayed_calls': 0.0,
+            'decayed_successes': 0.0,
+            'decayed_success_rate': 0.0
+        })
+    if not new_wallets:
+        return
+
+    _insert_ignore(list(new_wallets.values()))
+    wallets = Wallet.__table__.c
+    db.session.execute(
+        update(Wallet.__table__)
+        .where(wallets.wallet_unique_id.in_(list(new_wallets)))
+        .values(
+            total_calls=wallets.total_calls + 1,
+            # المقام زاد فتتغير النسبة أيضاً (قيم SET تُحسب من الصف قبل التحديث)
+            success_rate=wallets.successful_calls * 1.0 / (wallets.total_calls + 1),
+            last_seen=seen_at,
+            **_decay_update(1.0, 0.0, seen_at.timestamp())
+        )
+    )
+
+def record_signal_success(signal_id: str):
+    """
+    زيادة successful_calls وإعادة حساب success_rate لكل محافظ الإشارة بأمر UPDATE واحد
+    """
+    wallets = Wallet.__table__.c
+    successful_calls = wallets.successful_calls + 1
+    db.session.execute(
+        update(Wallet.__table__)
+        .where(wallets.wallet_unique_id.in_(
+            select(SignalWalletLink.wallet_unique_id).where(SignalWalletLink.signal_id == signal_id)
+        ))
+        .values(
+            successful_calls=successful_calls,
+            # قيم SET تُحسب من الصف قبل التحديث، لذا نستخدم successful_calls + 1 هنا أيضاً
+            success_rate=case(
+                (wallets.total_calls > 0, successful_calls * 1.0 / wallets.total_calls),
+                else_=0.0
+            ),
+            **_decay_update(0.0, 1.0, clock.time())
+        )
+    )
+
+def _rebuild_chunk(wallet_filter, now_ts: float) -> int:
+    """
+    إعادة حساب إحصائيات مجموعة محافظ من signals ⋈ signal_wallet_links بأمر UPDATE ... FROM تجميعي
+    لا يكتب إلا الصفوف التي تغيرت عداداتها أو التي لم تُحسب عداداتها المتناقصة بعد
+    """
+    wallets = Wallet.__table__
+    links = SignalWalletLink.__table__
+    signals = Signal.__table__
+
+    is_success = signals.c.performance_status == 'SUCCESS'
+    weight = func.exp(-DECAY_LAMBDA * (now_ts - _epoch(signals.c.signal_time)))
+    in_chunk = select(wallets.c.wallet_unique_id).where(wallet_filter)
+    aggregate = (
+        select(
+            links.c.wallet_unique_id,
+            func.count().label('total'),
+            func.sum(case((is_success, 1), else_=0)).label('successes'),
+            func.sum(weight).label('decayed_calls'),
+            func.sum(case((is_success, weight), else_=0.0)).label('decayed_successes')
+        )
+        .select_from(links.join(signals, signals.c.signal_id == links.c.signal_id))
+        .where(links.c.wallet_unique_id.in_(in_chunk))
+        .group_by(links.c.wallet_unique_id)
+        .subquery()
+    )
+    success_rate = case((aggregate.c.total > 0, aggregate.c.successes * 1.0 / aggregate.c.total), else_=0.0)
+
+    updated = db.session.execute(
+        update(wallets)
+        .where(wallets.c.wallet_unique_id == aggregate.c.wallet_unique_id)
+        .where(or_(
+            wallets.c.total_calls.is_distinct_from(aggregate.c.total),
+            wallets.c.successful_calls.is_distinct_from(aggregate.c.successes),
+            wallets.c.success_rate.is_distinct_from(success_rate),
+            wallets.c.decay_updated_ts.is_(None)
+        ))
+        .values(
+            total_calls=aggregate.c.total,
+            successful_calls=aggregate.c.successes,
+            success_rate=success_rate,
+            decayed_calls=aggregate.c.decayed_calls,
+            decayed_successes=aggregate.c.decayed_successes,
+            decayed_success_rate=_decayed_rate(aggregate.c.decayed_calls, aggregate.c.decayed_successes),
+            decay_updated_ts=now_ts
+        )
+    ).rowcount
+
+    # محافظ بلا أي روابط (مثلاً بعد حذف الإشارات)
+    updated += db.session.execute(
+        update(wallets)
+        .where(wallet_filter)
+        .where(~exists().where(links.c.wallet_unique_id == wallets.c.wallet_unique_id))
+        .where(or_(
+            wallets.c.total_calls != 0, wallets.c.successful_calls != 0, wallets.c.success_rate != 0,
+            wallets.c.decayed_calls != 0
+        ))
+        .values(
+            total_calls=0, successful_calls=0, success_rate=0.0,
+            decayed_calls=0.0, decayed_successes=0.0, decayed_success_rate=0.0, decay_updated_ts=now_ts
+        )
+    ).rowcount
+    return updated
+
+def rebuild_wallet_stats(since: Optional[datetime] = None, chunk_size: int = 5000) -> Dict:
+    """
+    إعادة بناء total_calls و successful_calls و success_rate من الروابط والإشارات
+    (والعدادات المتناقصة زمنياً للمحافظ التي تغيرت أو لم تُحسب لها من قبل)
+    - بدون since: كل المحافظ، على دفعات حسب نطاقات id
+    - مع since: المحافظ المرتبطة بإشارات منذ ذلك الوقت فقط (تقييم الإشارة يكتمل خلال دقائق من وقتها)
+    كل دفعة بمعاملة مستقلة حتى لا يُحجب الإدخال طوال مدة إعادة البناء
+    """
+    started = time.perf_counter()
+    now_ts = time.time()
+    wallets = Wallet.__table__
+
+    if since is None:
+        low, high = db.session.execute(select(func.min(wallets.c.id), func.max(wallets.c.id))).one()
+        db.session.commit()
+        chunks = [] if low is None else [
+            wallets.c.id.between(start, start + chunk_size - 1)
+            for start in range(low, high + 1, chunk_size)
+        ]
+    else:
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        links = SignalWalletLink.__table__
+        signals = Signal.__table__
+        wallet_ids = db.session.execute(
+            select(wallets.c.id).distinct()
+            .select_from(
+                wallets.join(links, links.c.wallet_unique_id == wallets.c.wallet_unique_id)
+                .join(signals, signals.c.signal_id == links.c.signal_id)
+            )
+            .where(signals.c.signal_time >= since)
+            .order_by(wallets.c.id)
+        ).scalars().all()
+        db.session.commit()
+        chunks = [
+            wallets.c.id.in_(wallet_ids[i:i + chunk_size])
+            for i in range(0, len(wallet_ids), chunk_size)
+        ]
+
+    updated = 0
+    for wallet_filter in chunks:
+        try:
+            updated += _rebuild_chunk(wallet_filter, now_ts)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    summary = {
+        'mode': 'full' if since is None else 'incremental',
+        'since': since.isoformat() if since else None,
+        'chunks': len(chunks),
+        'wallets_updated': updated,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    logging.info(f"تمت إعادة بناء إحصائيات المحافظ: {summary}")
+    return summary
@@ -0,0 +1,122 @@
+"""
+إعدادات التخزين لقاعدة البيانات
+- عنوان قاعدة البيانات من DATABASE_URL (مثلاً postgresql://...) وإلا ملف SQLite المحلي
+- لـ SQLite: وضع WAL و synchronous=NORMAL و mmap وحجم الذاكرة المؤقتة ومهلة الانتظار عند القفل،
+  تُطبق على كل اتصال جديد عبر حدث connect في SQLAlchemy
+- لـ SQLite أيضاً: BEGIN صريح من SQLAlchemy لتعمل نقاط الحفظ (SAVEPOINT) التي يستخدمها كاتب الإدخال
+"""
+import os
+import math
+import sqlite3
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+def sqlite_pragmas() -> dict:
+    """
+    إعدادات PRAGMA المطبقة على كل اتصال SQLite
+    """
+    return {
+        # القراء لا يحجبون الكاتب والعكس
+        'journal_mode': 'WAL',
+        # آمن مع WAL: قد تضيع آخر معاملة عند انقطاع الكهرباء لكن لا تتلف القاعدة
+        'synchronous': 'NORMAL',
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 10000),
+        # قيمة سالبة = بالكيلوبايت
+        'cache_size': -_env_int('SQLITE_CACHE_SIZE_KB', 65536),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 268435456),
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': _env_int('SQLITE_WAL_AUTOCHECKPOINT', 1000)
+    }
+
+def database_uri() -> str:
+    """
+    عنوان قاعدة البيانات: DATABASE_URL إن وُجد وإلا ملف SQLite المحلي
+    """
+    uri = os.getenv('DATABASE_URL')
+    if not uri:
+        return f"sqlite:///{DEFAULT_SQLITE_PATH}"
+    # بعض المنصات ما زالت تستخدم البادئة القديمة
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def engine_options(uri: str) -> dict:
+    """
+    خيارات محرك SQLAlchemy ومجمع الاتصالات حسب نوع قاعدة البيانات
+    """
+    if uri.startswith('sqlite'):
+        if uri in ('sqlite://', 'sqlite:///:memory:'):
+            # قاعدة في الذاكرة تستخدم مجمعاً خاصاً لا يقبل خيارات الحجم
+            return {'connect_args': {'check_same_thread': False}}
+        return {
+            # مهلة pysqlite بالثواني (تتداخل مع busy_timeout وتكمله)
+            'connect_args': {'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 10000) / 1000, 'check_same_thread': False},
+            'pool_size': _env_int('DB_POOL_SIZE', 10),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': 30
+        }
+
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': 30,
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True
+    }
+
+def configure_storage(app):
+    """
+    ضبط عنوان قاعدة البيانات وخيارات المحرك قبل db.init_app
+    """
+    uri = database_uri()
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+
+def _sqlite_exp(value):
+    # بعض نسخ SQLite لا تتضمن الدوال الرياضية؛ نحتاج exp لحساب التناقص الزمني
+    if value is None:
+        return None
+    return math.exp(min(value, 700.0))
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict = None):
+    """
+    تطبيق إعدادات PRAGMA على اتصال sqlite3 مفتوح
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in (pragmas or sqlite_pragmas()).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def tune_engine(engine: Engine):
+    """
+    تسجيل حدث connect على المحرك لتطبيق إعدادات SQLite على كل اتصال جديد
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            apply_sqlite_pragmas(dbapi_connection, pragmas)
+            dbapi_connection.create_function('exp', 1, _sqlite_exp, deterministic=True)
+            # تعطيل إدارة pysqlite للمعاملات ليتحكم SQLAlchemy في BEGIN بنفسه،
+            # وإلا لا تعمل SAVEPOINT (begin_nested) بشكل صحيح
+            dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def on_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
+    logging.info(f"تم ضبط SQLite: {pragmas}")
@@ -0,0 +1,55 @@
+"""
+إعداد الاختبارات: نسخة مؤقتة من src/database/app.db (بيانات تاريخية حقيقية) تُضبط قبل استيراد التطبيق
+التشغيل (من مجلد smart_falcon_backend): python -m pytest -q
+"""
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TMP_DIR = tempfile.mkdtemp(prefix='sf_tests_')
+shutil.copy(os.path.join(BACKEND_DIR, 'src', 'database', 'app.db'), os.path.join(TMP_DIR, 'app.db'))
+
+# الإعدادات تُقرأ عند استيراد التطبيق
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TMP_DIR, 'app.db')}"
+os.environ['ANALYTICS_SNAPSHOT_DIR'] = os.path.join(TMP_DIR, 'analytics_snapshots')
+# ميزانيات التحليلات تغطي مسار قاعدة البيانات (الأسوأ) لا اللقطة العمودية
+os.environ['ANALYTICS_SNAPSHOT_ENABLED'] = '0'
+os.environ['TELEGRAM_BOT_TOKEN'] = ''
+os.environ.pop('METRICS_SHARED_DIR', None)
+
+@pytest.fixture(scope='session')
+def app():
+    from src.main import app, init_db
+    init_db()
+    return app
+
+@pytest.fixture
+def client(app):
+    """
+    عميل اختبار بذاكرات مؤقتة فارغة حتى يصل كل طلب إلى قاعدة البيانات
+    """
+    from src.services.http_cache import response_cache
+    from src.services.pagination import count_cache
+    from src.routes.smart_falcon import dashboard_cache, recent_messages
+
+    for cache in (response_cache, count_cache, dashboard_cache, recent_messages):
+        cache.clear()
+    return app.test_client()
+
+# كل مولد رسائل يأخذ نطاق معرفات منفصلاً حتى لا تُعامل رسائل اختبار كتكرار لرسائل اختبار سبقه
+_message_id_ranges = itertools.count(1, 1_000_000)
+
+@pytest.fixture
+def make_generator():
+    from benchmarks.messages import MessageGenerator
+
+    def make(seed, **kwargs):
+        return MessageGenerator(seed=seed, first_message_id=next(_message_id_ranges), **kwargs)
+    return make
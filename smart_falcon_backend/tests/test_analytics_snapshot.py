@@ -0,0 +1,42 @@
+"""
+مفتاح اللقطة العمودية: قاعدتان بنفس إصدارات البيانات لا تتشاركان لقطة في نفس المجلد
+"""
+from sqlalchemy import select, update
+
+from src.models.smart_falcon import SystemConfig
+from src.models.user import db
+from src.services.analytics_snapshot import SNAPSHOT_TABLES, AnalyticsSnapshotStore
+from src.services.data_version import data_versions
+
+def database_id():
+    return db.session.execute(
+        select(SystemConfig.config_value).where(SystemConfig.config_key == 'database_id')
+    ).scalar_one()
+
+def set_database_id(value):
+    db.session.execute(
+        update(SystemConfig.__table__).where(SystemConfig.__table__.c.config_key == 'database_id')
+        .values(config_value=value)
+    )
+    db.session.commit()
+
+def test_snapshot_key_includes_database_identity(app, tmp_path):
+    with app.app_context():
+        original = database_id()
+        assert len(original) == 32
+        
+        store = AnalyticsSnapshotStore(str(tmp_path), min_refresh_interval=0)
+        first = store.get()
+        versions = data_versions.get(*SNAPSHOT_TABLES, fresh=True)
+        try:
+            # قاعدة أخرى بنفس إصدارات جداول اللقطة
+            set_database_id('another-database')
+            assert data_versions.get(*SNAPSHOT_TABLES, fresh=True) == versions
+            second = store.get()
+        finally:
+            set_database_id(original)
+        
+        assert second.path != first.path
+        assert second.version.split('_', 1)[1] == first.version.split('_', 1)[1]
+        # العودة للقاعدة الأصلية تعيد نفس اللقطة دون بناء جديد
+        assert store.get().path == first.path
@@ -0,0 +1,40 @@
+"""
+صفوف data_versions: تُزرع في الترحيل، وإضافتها عند الكتابة لا تتعارض مع معاملة متزامنة
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+
+from src.models.smart_falcon import DataVersion, SystemConfig
+from src.models.user import db
+from src.services.data_version import TRACKED_TABLES, data_versions, insert_missing_versions
+
+def versions():
+    return dict(db.session.execute(select(DataVersion.table_name, DataVersion.version)).all())
+
+def test_migration_seeds_every_tracked_table(app):
+    with app.app_context():
+        assert set(TRACKED_TABLES) <= set(versions())
+
+def test_insert_missing_versions_ignores_existing_rows(app):
+    with app.app_context():
+        before = versions()
+        # محاكاة معاملة سبقتنا بإضافة الصف: الإضافة الثانية لا تفشل ولا تعيد ضبط الإصدار
+        insert_missing_versions(db.session, TRACKED_TABLES, datetime.now(timezone.utc))
+        db.session.commit()
+        assert versions() == before
+
+def test_write_recreates_missing_row_and_bumps_it(app):
+    with app.app_context():
+        db.session.execute(delete(DataVersion).where(DataVersion.table_name == 'system_config'))
+        db.session.commit()
+        assert 'system_config' not in versions()
+        
+        db.session.add(SystemConfig(config_key='test_data_versions', config_value='1'))
+        db.session.commit()
+        assert versions()['system_config'] == 1
+        
+        db.session.execute(delete(SystemConfig).where(SystemConfig.config_key == 'test_data_versions'))
+        db.session.commit()
+        assert versions()['system_config'] == 2
+        assert data_versions.get('system_config', fresh=True) == (2,)
@@ -0,0 +1,20 @@
+"""
+زمن استيراد التطبيق (بدء التشغيل البارد) عبر benchmarks/import_time.py في مفسر جديد:
+الوحدات الثقيلة تبقى متأخرة والزمن ضمن الميزانية (IMPORT_BUDGET_MS)
+"""
+import os
+import statistics
+
+from benchmarks.import_time import LAZY_MODULES, measure_once
+
+MODULE = 'src.main'
+
+def test_heavy_modules_are_not_imported_at_startup():
+    timings = measure_once(MODULE)
+    eager = sorted({name.split('.')[0] for name in timings} & set(LAZY_MODULES))
+    assert not eager, f"وحدات ثقيلة مستوردة مبكراً: {', '.join(eager)}"
+
+def test_import_time_within_budget():
+    budget_ms = float(os.getenv('IMPORT_BUDGET_MS', '1000'))
+    median_ms = statistics.median(measure_once(MODULE)[MODULE] for _ in range(3)) / 1000
+    assert median_ms <= budget_ms, f"{MODULE}: {median_ms:.1f} ms (الميزانية {budget_ms} ms)"
@@ -0,0 +1,90 @@
+"""
+كاتب الإدخال: فشل مهمة لا يُفشل باقي دفعتها، وفشل حفظ الدفعة يعيد تطبيق مهامها فردياً
+"""
+from concurrent.futures import wait
+
+import pytest
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+
+from src.models.smart_falcon import SystemConfig
+from src.models.user import db
+from src.services.ingestion_writer import IngestionWriter
+
+PREFIX = 'writer_test_'
+POISON = f'{PREFIX}poison'
+
+@pytest.fixture
+def writer(app):
+    # نافذة تجميع طويلة حتى تقع كل المهام المرسلة معاً في دفعة واحدة
+    writer = IngestionWriter(max_batch=64, max_wait=0.5)
+    writer.init_app(app)
+    yield writer
+    writer.stop()
+    with app.app_context():
+        db.session.execute(delete(SystemConfig).where(SystemConfig.config_key.like(f'{PREFIX}%')))
+        db.session.commit()
+
+@pytest.fixture
+def poison_commit():
+    """
+    أي حفظ يتضمن الصف POISON يفشل (كخطأ لا يظهر إلا عند COMMIT)
+    """
+    def before_commit(session):
+        # الحدث يُطلق أيضاً عند إنهاء savepoint كل مهمة
+        if session.in_nested_transaction():
+            return
+        if session.execute(select(SystemConfig.id).where(SystemConfig.config_key == POISON)).first():
+            raise RuntimeError('فشل الحفظ')
+    
+    event.listen(Session, 'before_commit', before_commit)
+    yield
+    event.remove(Session, 'before_commit', before_commit)
+
+calls = []
+
+def add_config(key):
+    calls.append(key)
+    db.session.add(SystemConfig(config_key=key, config_value='1'))
+    db.session.flush()
+    if key.endswith('bad'):
+        raise ValueError(key)
+    return key
+
+def stored_keys(app):
+    with app.app_context():
+        return set(db.session.execute(
+            select(SystemConfig.config_key).where(SystemConfig.config_key.like(f'{PREFIX}%'))
+        ).scalars())
+
+def test_failing_job_does_not_fail_batch_mates(app, writer):
+    keys = [f'{PREFIX}{i}' for i in range(5)] + [f'{PREFIX}bad'] + [f'{PREFIX}{i}' for i in range(5, 10)]
+    futures = [writer.submit(add_config, key) for key in keys]
+    wait(futures, timeout=30)
+    
+    assert writer.batches == 1
+    for key, future in zip(keys, futures):
+        if key.endswith('bad'):
+            with pytest.raises(ValueError):
+                future.result()
+        else:
+            assert future.result() == key
+    # الـ savepoint يلغي صف المهمة الفاشلة وحدها
+    assert stored_keys(app) == {key for key in keys if not key.endswith('bad')}
+
+def test_failed_batch_commit_falls_back_to_one_by_one(app, writer, poison_commit):
+    keys = [f'{PREFIX}{i}' for i in range(3)] + [POISON] + [f'{PREFIX}{i}' for i in range(3, 6)]
+    calls.clear()
+    futures = [writer.submit(add_config, key) for key in keys]
+    wait(futures, timeout=30)
+    
+    # الدفعة لم تُحفظ، وأعيد تطبيق كل مهمة مرة ثانية في معاملتها الخاصة
+    assert writer.batches == 0
+    assert calls == keys + keys
+    for key, future in zip(keys, futures):
+        if key == POISON:
+            with pytest.raises(RuntimeError):
+                future.result()
+        else:
+            assert future.result() == key
+    assert stored_keys(app) == set(keys) - {POISON}
@@ -0,0 +1,27 @@
+"""
+مرشح المستمع: /api/signals/open-contracts يرد 304 ما لم تتغير مجموعة العقود المفتوحة
+"""
+
+URL = '/api/signals/open-contracts'
+
+def test_etag_follows_open_contracts_not_signal_updates(client, make_generator):
+    generator = make_generator(21, updates_per_signal=3)
+    message, token = generator.kol_track()
+    assert client.post('/webhook/telegram', json=message.payload()).status_code == 200
+
+    response = client.get(URL)
+    assert token['contract_address'] in response.get_json()['contract_addresses']
+    etag = response.headers['ETag']
+
+    # تحديث ATH الأولي يعدّل جدول signals دون فتح إشارة أو إغلاقها
+    update = generator.phanes_update(token)
+    result = client.post('/webhook/telegram', json=update.payload()).get_json()['processing_result']
+    assert 'initial_ath' in result
+    assert client.get(URL, headers={'If-None-Match': etag}).status_code == 304
+
+    # إشارة جديدة تغير المجموعة
+    message, token = generator.kol_track()
+    client.post('/webhook/telegram', json=message.payload())
+    response = client.get(URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert token['contract_address'] in response.get_json()['contract_addresses']
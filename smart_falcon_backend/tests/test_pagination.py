@@ -0,0 +1,60 @@
+"""
+الترقيم بالمؤشر (keyset_page): المرور على كل الصفحات يعيد كل الصفوف مرة واحدة بترتيب
+(قيمة الترتيب تنازلياً والقيم الفارغة في النهاية، ثم id تنازلياً) عبر القيم المتساوية والفارغة
+"""
+from datetime import datetime
+
+import pytest
+
+from src.models.smart_falcon import Wallet
+from src.models.user import db
+from src.services.pagination import MAX_PER_PAGE, keyset_page
+
+@pytest.fixture
+def wallets_with_ties_and_nulls(app):
+    """
+    محافظ إضافية بقيم ترتيب متساوية وفارغة، تُلغى في نهاية الاختبار (rollback)
+    """
+    with app.app_context():
+        tied_time = datetime(2025, 1, 1, 12, 0, 0)
+        for number in range(12):
+            db.session.add(Wallet(
+                wallet_unique_id=f'Pagination_{number}', wallet_type='New Wallet', wallet_number=90000 + number,
+                last_seen=tied_time, success_rate=0.5, total_calls=7
+            ))
+        db.session.flush()
+        # None في المُنشئ يأخذ القيمة الافتراضية للعمود، فتُضبط القيم الفارغة بتحديث صريح
+        added = Wallet.query.filter(Wallet.wallet_unique_id.like('Pagination_%'))
+        added.filter(Wallet.wallet_number % 3 == 0).update({Wallet.success_rate: None}, synchronize_session=False)
+        added.filter(Wallet.wallet_number % 4 == 0).update({Wallet.total_calls: None}, synchronize_session=False)
+        yield
+        db.session.rollback()
+
+def walk(sort_column, per_page):
+    ids, cursor, pages = [], '', 0
+    while True:
+        rows, cursor = keyset_page(db.session.query(Wallet.id, sort_column), sort_column, Wallet.id, cursor, per_page)
+        ids.extend(row.id for row in rows)
+        pages += 1
+        assert pages <= 10_000
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize('sort_column', [Wallet.success_rate, Wallet.total_calls, Wallet.last_seen])
+@pytest.mark.parametrize('per_page', [1, 4, 50])
+def test_cursor_round_trip_across_ties_and_nulls(wallets_with_ties_and_nulls, sort_column, per_page):
+    rows = db.session.query(Wallet.id, sort_column).all()
+    # ترتيب متوقع محسوب في بايثون: القيم الفارغة آخراً
+    expected = [
+        row.id for row in sorted(rows, key=lambda row: (getattr(row, sort_column.key) is not None,
+                                                        getattr(row, sort_column.key) or 0, row.id), reverse=True)
+    ]
+    assert any(getattr(row, sort_column.key) is None for row in rows) or sort_column is Wallet.last_seen
+    assert walk(sort_column, per_page) == expected
+
+def test_per_page_is_clamped(client):
+    assert client.get('/api/wallets?cursor=&per_page=0').get_json()['per_page'] == 1
+    body = client.get(f'/api/wallets?cursor=&per_page={MAX_PER_PAGE * 10}').get_json()
+    assert body['per_page'] == MAX_PER_PAGE
+    assert len(body['wallets']) <= MAX_PER_PAGE
+    assert client.get('/api/signals?per_page=-5').get_json()['pages'] >= 1
@@ -0,0 +1,86 @@
+"""
+ميزانيات الاستعلامات للنقاط الرئيسية (query_budget): تفشل عند زيادة عدد الاستعلامات
+أو تكرار شكل استعلام واحد (نمط N+1)
+"""
+from urllib.parse import quote
+
+import pytest
+
+from src.services.query_profiler import query_budget
+
+# (المسار، أقصى عدد استعلامات)
+READ_BUDGETS = [
+    ('/api/signals', 7),
+    ('/api/signals?cursor=', 6),
+    ('/api/signals?status=SUCCESS', 7),
+    ('/api/wallets', 7),
+    ('/api/wallets?cursor=', 6),
+    ('/api/dashboard/stats', 8),
+    ('/api/analytics/patterns', 15),
+    ('/api/analytics/clusters', 7),
+    ('/api/analytics/performance', 6),
+    ('/api/analytics/time-patterns', 6),
+    ('/api/analytics/rules', 8),
+    ('/api/analytics/quantiles/clusters', 6),
+    ('/api/config', 4),
+]
+
+# شكل الاستعلام الواحد لا يتكرر أكثر من هذا في طلب قراءة
+MAX_REPEATED = 3
+
+@pytest.fixture(scope='module')
+def sample_ids(app):
+    from src.models.smart_falcon import Signal, Wallet
+
+    with app.app_context():
+        wallet = Wallet.query.order_by(Wallet.total_calls.desc()).first()
+        signal = Signal.query.filter_by(evaluation_complete=True).first()
+        return wallet.wallet_unique_id, signal.signal_id
+
+@pytest.mark.parametrize('path, budget', READ_BUDGETS)
+def test_read_endpoint_budget(client, path, budget):
+    with query_budget(budget, max_repeated=MAX_REPEATED):
+        response = client.get(path)
+    assert response.status_code == 200
+
+def test_wallet_analysis_budget(client, sample_ids):
+    wallet_id, _ = sample_ids
+    with query_budget(9, max_repeated=MAX_REPEATED):
+        response = client.get(f'/api/analytics/wallet/{quote(wallet_id)}')
+    assert response.status_code == 200
+    assert response.get_json()['performance_summary']['total_signals'] > 0
+
+def test_signal_analysis_budget(client, sample_ids):
+    _, signal_id = sample_ids
+    with query_budget(8, max_repeated=MAX_REPEATED):
+        response = client.get(f'/api/analytics/signal/{quote(signal_id)}')
+    assert response.status_code == 200
+
+def test_conditional_get_revalidation_is_cheap(client):
+    response = client.get('/api/signals')
+    with query_budget(2):
+        revalidated = client.get('/api/signals', headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+def test_webhook_budget(client, make_generator):
+    """
+    استقبال إشارات وتحديثات Phanes، وإعادة الإرسال المكرر دون أي استعلام
+    """
+    for message in make_generator(7).stream(30):
+        with query_budget(25):
+            response = client.post('/webhook/telegram', json=message.payload())
+        assert response.status_code == 200
+
+        with query_budget(0):
+            duplicate = client.post('/webhook/telegram', json=message.payload())
+        assert duplicate.get_json()['duplicate'] is True
+
+def test_webhook_signal_links_are_batched(client, make_generator):
+    """
+    روابط محافظ الإشارة تُحفظ بأمر واحد لا بأمر لكل محفظة
+    """
+    generator = make_generator(11)
+    message, _ = generator.kol_track()
+    with query_budget(16, max_repeated=1):
+        response = client.post('/webhook/telegram', json=message.payload())
+    assert 'decision' in response.get_json()['processing_result']
@@ -0,0 +1,100 @@
+"""
+إعادة التشغيل (flask replay): رسائل قاعدة مصدر تُعاد في قاعدة فارغة بنفس النتائج،
+والأمر يرفض أي هدف غير صريح أو غير فارغ قبل إنشاء جداول فيه
+كل تشغيل في عملية منفصلة لأن التطبيق يرتبط بقاعدة DATABASE_URL عند الاستيراد
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from tests.conftest import BACKEND_DIR
+
+# قاعدة مصدر: رسائل مولدة عبر webhook كما تصل من المستمع
+INGEST_SCRIPT = '''
+import sys
+from benchmarks.messages import MessageGenerator
+from src.main import app, init_db
+init_db()
+client = app.test_client()
+for message in MessageGenerator(seed=int(sys.argv[1])).stream(int(sys.argv[2])):
+    assert client.post('/webhook/telegram', json=message.payload()).status_code == 200
+'''
+
+def run_backend(args, database_path):
+    """
+    database_path=None: دون DATABASE_URL (قاعدة SQLite الحية الافتراضية)
+    """
+    env = {**os.environ, 'ANALYTICS_SNAPSHOT_ENABLED': '0', 'TELEGRAM_BOT_TOKEN': ''}
+    env.pop('DATABASE_URL')
+    if database_path is not None:
+        env['DATABASE_URL'] = f'sqlite:///{database_path}'
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300
+    )
+
+def replay(source, target, database_path):
+    return run_backend(
+        ['-m', 'flask', '--app', 'src.main', 'replay', '--source', source, '--target', target], database_path
+    )
+
+def table_names(path):
+    with sqlite3.connect(path) as connection:
+        return {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+@pytest.fixture(scope='module')
+def source_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('replay') / 'source.db')
+    completed = run_backend(['-c', INGEST_SCRIPT, '3', '300'], path)
+    assert completed.returncode == 0, completed.stderr
+    return path
+
+def test_replay_into_empty_database_matches_stored_results(source_db, tmp_path):
+    target = str(tmp_path / 'target.db')
+    completed = replay(source_db, target, target)
+    assert completed.returncode == 0, completed.stderr
+    
+    summary = json.loads(completed.stdout)
+    assert summary['messages'] == 300
+    assert summary['failed'] == 0
+    assert summary['comparison']['compared'] == 300
+    assert summary['comparison']['mismatches'] == 0, summary['comparison']['samples']
+
+def test_replay_refuses_target_other_than_database_url(source_db, tmp_path):
+    bound = str(tmp_path / 'bound.db')
+    completed = replay(source_db, str(tmp_path / 'other.db'), bound)
+    assert completed.returncode != 0
+    assert 'DATABASE_URL' in completed.stderr
+    assert not os.path.exists(bound)
+
+def test_replay_refuses_source_as_target(source_db):
+    completed = replay(source_db, source_db, source_db)
+    assert completed.returncode != 0
+    assert 'المصدر' in completed.stderr
+
+def test_replay_refuses_default_live_database(source_db):
+    live = os.path.join(BACKEND_DIR, 'src', 'database', 'app.db')
+    with open(live, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    
+    completed = replay(source_db, live, None)
+    assert completed.returncode != 0
+    assert 'الحية' in completed.stderr
+    with open(live, 'rb') as f:
+        assert hashlib.sha256(f.read()).hexdigest() == digest
+
+def test_replay_refuses_non_empty_target_before_ddl(source_db, tmp_path):
+    # قاعدة غير فارغة بمخطط قديم: الرفض قبل create_all والترحيلات
+    target = str(tmp_path / 'used.db')
+    with sqlite3.connect(target) as connection:
+        connection.execute("CREATE TABLE wallets (id INTEGER PRIMARY KEY, wallet_unique_id VARCHAR(100))")
+        connection.execute("INSERT INTO wallets (wallet_unique_id) VALUES ('KOL_1')")
+    
+    completed = replay(source_db, target, target)
+    assert completed.returncode != 0
+    assert 'ليست فارغة' in completed.stderr
+    assert table_names(target) == {'wallets'}
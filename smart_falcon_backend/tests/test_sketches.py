@@ -0,0 +1,109 @@
+"""
+الهياكل التقريبية (src/services/sketches.py) على توزيعات معروفة:
+الخطأ يُقاس في رتبة القيمة المقدرة (نسبة القيم الأصغر منها) مقارنة بالمئين المطلوب
+"""
+import bisect
+import random
+from collections import Counter
+
+import pytest
+
+from src.services.sketches import CountMinSketch, HeavyHitters, TDigest
+
+QUANTILES = (0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999)
+
+def stream(distribution, size=50_000, seed=1):
+    generator = random.Random(seed)
+    if distribution == 'uniform':
+        return [generator.random() for _ in range(size)]
+    # مضاعفات الربح: ذيل طويل إلى اليمين
+    return [generator.lognormvariate(0, 1) for _ in range(size)]
+
+def rank_error(ordered, estimate, q):
+    return abs(bisect.bisect_left(ordered, estimate) / len(ordered) - q)
+
+def tolerance(q):
+    # دالة المقياس k1 تصغّر المراكز عند الأطراف فيكون الخطأ فيها أقل
+    return 0.001 if q <= 0.01 or q >= 0.99 else 0.005
+
+@pytest.mark.parametrize('distribution', ['uniform', 'lognormal'])
+def test_tdigest_quantile_error(distribution):
+    values = stream(distribution)
+    ordered = sorted(values)
+    digest = TDigest(100)
+    digest.update(values)
+    
+    assert digest.count == len(values)
+    assert digest.quantile(0) == ordered[0] and digest.quantile(1) == ordered[-1]
+    assert len(digest.to_dict()['centroids']) <= 100
+    for q in QUANTILES:
+        assert rank_error(ordered, digest.quantile(q), q) <= tolerance(q), q
+
+@pytest.mark.parametrize('distribution', ['uniform', 'lognormal'])
+def test_tdigest_merge_matches_whole_stream(distribution):
+    values = stream(distribution)
+    ordered = sorted(values)
+    # ملخص لكل محفظة ثم دمجها لمجموعة، كما في ملخصات مئينات الربح
+    parts = [TDigest(100) for _ in range(8)]
+    for index, value in enumerate(values):
+        parts[index % 8].add(value)
+    merged = TDigest(100)
+    for part in parts:
+        # المرور بـ JSON كما تُخزن الملخصات في quantile_sketches
+        merged.merge(TDigest.from_json(part.to_json()))
+    
+    assert merged.count == len(values)
+    assert (merged.min, merged.max) == (ordered[0], ordered[-1])
+    for q in QUANTILES:
+        assert rank_error(ordered, merged.quantile(q), q) <= tolerance(q), q
+
+def test_tdigest_small_and_empty():
+    assert TDigest().quantile(0.5) is None
+    assert TDigest.from_json(None).count == 0
+    digest = TDigest()
+    digest.update([3.0, 1.0, 2.0])
+    assert digest.quantile(0.5) == pytest.approx(2.0)
+    assert TDigest().merge(digest).quantile(0.5) == pytest.approx(2.0)
+
+def zipf_stream(keys=20_000, size=200_000, seed=2):
+    """
+    تكرارات بتوزيع Zipf كظهور مجموعات المحافظ (قلة متكررة وذيل طويل نادر)
+    المفاتيح صفوف أعداد صحيحة: hash ثابت بين التشغيلات بخلاف النصوص
+    """
+    generator = random.Random(seed)
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(keys)]
+    return [(key, key * 7) for key in generator.choices(range(keys), weights, k=size)]
+
+def test_count_min_error_bound():
+    items = zipf_stream()
+    sketch = CountMinSketch(epsilon=0.001, delta=0.01)
+    for item in items:
+        sketch.add(item)
+    
+    true_counts = Counter(items)
+    errors = [sketch.estimate(item) - count for item, count in true_counts.items()]
+    assert sketch.total == len(items)
+    assert sketch.error_bound == pytest.approx(0.001 * len(items))
+    # لا يقل التقدير عن القيمة الحقيقية أبداً، ويتجاوزها بأكثر من ε·N لنسبة لا تزيد عن δ من المفاتيح
+    assert min(errors) >= 0
+    assert sum(error > sketch.error_bound for error in errors) / len(errors) <= sketch.delta
+    # الصفوف مستقلة: لا يتصادم مفتاح مع نفس العنصر الثقيل في كل الصفوف فيرث تكراره كاملاً
+    assert max(errors) <= 2 * sketch.error_bound
+
+def test_heavy_hitters_recall():
+    items = zipf_stream()
+    sketch = CountMinSketch(epsilon=0.001, delta=0.01)
+    heavy_hitters = HeavyHitters(capacity=100)
+    for item in items:
+        heavy_hitters.offer(item, sketch.add(item))
+    
+    assert len(heavy_hitters) == 100
+    true_counts = Counter(items)
+    top = [item for item, _count in true_counts.most_common(50)]
+    recall = sum(item in heavy_hitters for item in top) / len(top)
+    assert recall == 1.0
+    # التقدير المحفوظ من آخر ظهور للعنصر: لا يقل عن تكراره، وقد يزيد تقديره الحالي بتصادمات لاحقة
+    assert all(
+        true_counts[item] <= estimate <= sketch.estimate(item)
+        for item, estimate in heavy_hitters.items().items()
+    )
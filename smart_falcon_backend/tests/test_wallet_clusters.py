@@ -0,0 +1,45 @@
+"""
+مجموعات المحافظ: اللقطة العمودية ومسار قاعدة البيانات يعيدان نفس المجموعات بنفس الترتيب
+"""
+import pytest
+
+from src.services.analytics_snapshot import AnalyticsSnapshotStore
+from src.services.pattern_analyzer import AdvancedPatternAnalyzer
+
+def make_analyzer(snapshot_store=None, min_occurrences=3, min_success_rate=0.6):
+    analyzer = AdvancedPatternAnalyzer(snapshot_store)
+    analyzer.MIN_OCCURRENCES = min_occurrences
+    analyzer.MIN_SUCCESS_RATE = min_success_rate
+    return analyzer
+
+# عتبات منخفضة تكثر المجموعات المتعادلة في النسبة والمرات، فيظهر أثر فض التعادل
+@pytest.mark.parametrize('cluster_size,min_occurrences,min_success_rate', [(2, 3, 0.6), (2, 2, 0.0), (3, 2, 0.0)])
+@pytest.mark.parametrize('limit', [5, 1000])
+def test_snapshot_and_orm_clusters_identical(app, tmp_path, cluster_size, min_occurrences, min_success_rate, limit):
+    with app.app_context():
+        store = AnalyticsSnapshotStore(str(tmp_path), min_refresh_interval=0)
+        columnar = make_analyzer(store, min_occurrences, min_success_rate).analyze_wallet_clusters(
+            cluster_size, mode='exact', limit=limit, signals_limit=None
+        )
+        orm = make_analyzer(None, min_occurrences, min_success_rate).analyze_wallet_clusters(
+            cluster_size, mode='exact', limit=limit, signals_limit=None
+        )
+    
+    assert 'error' not in orm
+    assert orm['promising_clusters']
+    assert columnar == orm
+    
+    clusters = orm['promising_clusters']
+    keys = [(-c['success_rate'], -c['total_calls'], c['cluster']) for c in clusters]
+    assert keys == sorted(keys)
+
+@pytest.mark.parametrize('cluster_size,min_occurrences,min_success_rate', [(2, 3, 0.6), (2, 2, 0.0), (3, 2, 0.0)])
+def test_approximate_top_clusters_match_exact(app, cluster_size, min_occurrences, min_success_rate):
+    with app.app_context():
+        analyzer = make_analyzer(None, min_occurrences, min_success_rate)
+        exact = analyzer.analyze_wallet_clusters(cluster_size, mode='exact', limit=20, signals_limit=None)
+        approximate = analyzer.analyze_wallet_clusters(cluster_size, mode='approximate', limit=20, signals_limit=None)
+    
+    assert approximate['mode'] == 'approximate'
+    assert not approximate['approximation']['candidates_saturated']
+    assert approximate['promising_clusters'] == exact['promising_clusters']
@@ -0,0 +1,143 @@
+"""
+إحصائيات المحافظ: العدادات المتناقصة زمنياً (EWMA) تطابق الصيغة المغلقة Σ exp(-λ·(T - tᵢ))
+"""
+import math
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+import pytest
+
+from src.models.smart_falcon import Signal, SignalWalletLink, Wallet
+from src.models.user import db
+from src.services.clock import clock
+from src.services.wallet_stats import (
+    DECAY_LAMBDA, current_decayed_calls, record_signal_success, record_wallet_calls
+)
+
+START = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+def closed_form(times, at):
+    return sum(math.exp(-DECAY_LAMBDA * (at - t.timestamp())) for t in times)
+
+def test_decayed_counters_match_closed_form(app):
+    wallet = {'type': 'Decay', 'id': 1}
+    # مشاركات متباعدة بفترات غير منتظمة، ونجاح بعد بعضها بدقائق
+    calls = [START + timedelta(hours=h) for h in (0, 5, 30, 31, 200, 420)]
+    successes = [calls[1] + timedelta(minutes=12), calls[4] + timedelta(minutes=3)]
+    events = sorted([(t, 'call') for t in calls] + [(t, 'success') for t in successes])
+    
+    with app.app_context():
+        try:
+            for index, (at, kind) in enumerate(events):
+                if kind == 'call':
+                    record_wallet_calls([wallet], at)
+                else:
+                    db.session.add(SignalWalletLink(
+                        link_id=f'decay_link_{index}', signal_id=f'decay_signal_{index}',
+                        wallet_unique_id='Decay_1'
+                    ))
+                    db.session.flush()
+                    with clock.frozen(at):
+                        record_signal_success(f'decay_signal_{index}')
+            
+            row = db.session.query(Wallet).filter_by(wallet_unique_id='Decay_1').one()
+            last = events[-1][0].timestamp()
+            assert row.decay_updated_ts == pytest.approx(last)
+            assert row.decayed_calls == pytest.approx(closed_form(calls, last), rel=1e-9)
+            assert row.decayed_successes == pytest.approx(closed_form(successes, last), rel=1e-9)
+            assert row.decayed_success_rate == pytest.approx(
+                closed_form(successes, last) / closed_form(calls, last), rel=1e-9
+            )
+            
+            # القراءة لاحقاً تطبق التناقص حتى لحظة القراءة دون كتابة
+            later = last + 3 * 86400
+            assert current_decayed_calls(row.decayed_calls, row.decay_updated_ts, now=later) == pytest.approx(
+                closed_form(calls, later), rel=1e-9
+            )
+        finally:
+            db.session.rollback()
+
+@pytest.fixture
+def backfilled_signal(app):
+    """
+    إشارة أقدم من كل إشارات المحفظة الأنشط لكن بمعرف أحدث (كرسالة فائتة تصل بالتعبئة)
+    ومعرف إشارة يأتي أخيراً أبجدياً: استعلام IN دون ترتيب يعيدها آخراً بأي من الترتيبين
+    """
+    with app.app_context():
+        wallet_id = db.session.query(SignalWalletLink.wallet_unique_id).group_by(
+            SignalWalletLink.wallet_unique_id
+        ).order_by(db.func.count().desc()).limit(1).scalar()
+        oldest = db.session.query(db.func.min(Signal.signal_time)).scalar()
+        db.session.add(Signal(
+            signal_id='~backfilled', contract_address='backfilled', signal_time=oldest - timedelta(days=1),
+            performance_status='FAILURE', evaluation_complete=True
+        ))
+        db.session.add(SignalWalletLink(
+            link_id='backfilled_link', signal_id='~backfilled', wallet_unique_id=wallet_id
+        ))
+        db.session.commit()
+    yield wallet_id
+    with app.app_context():
+        db.session.query(SignalWalletLink).filter_by(link_id='backfilled_link').delete()
+        db.session.query(Signal).filter_by(signal_id='~backfilled').delete()
+        db.session.commit()
+
+def test_recent_signals_are_the_latest(client, app, backfilled_signal):
+    with app.app_context():
+        latest = [
+            row.signal_id for row in db.session.query(Signal.signal_id)
+            .join(SignalWalletLink, SignalWalletLink.signal_id == Signal.signal_id)
+            .filter(SignalWalletLink.wallet_unique_id == backfilled_signal)
+            .order_by(Signal.signal_time, Signal.id).all()
+        ]
+    assert len(latest) > 10 and latest[0] == '~backfilled'
+    
+    body = client.get(f'/api/analytics/wallet/{quote(backfilled_signal)}').get_json()
+    assert [signal['signal_id'] for signal in body['recent_signals']] == latest[-10:]
+
+def wallet_stats(app, at):
+    """
+    إحصائيات كل المحافظ، والعدادات المتناقصة مُقدَّمة إلى لحظة مشتركة at
+    """
+    with app.app_context():
+        return {
+            row.wallet_unique_id: (
+                row.total_calls, row.successful_calls, row.success_rate,
+                current_decayed_calls(row.decayed_calls, row.decay_updated_ts, now=at),
+                current_decayed_calls(row.decayed_successes, row.decay_updated_ts, now=at)
+            )
+            for row in db.session.query(Wallet).all()
+        }
+
+def test_rebuild_reproduces_incremental_stats(app, client, make_generator):
+    from src.services.wallet_stats import rebuild_wallet_stats
+    
+    # نقطة بداية متسقة مهما أضافت الاختبارات السابقة من روابط
+    with app.app_context():
+        rebuild_wallet_stats()
+    
+    for message in make_generator(21, success_rate=0.5).stream(400):
+        client.post('/webhook/telegram', json=message.payload())
+    at = clock.time()
+    incremental = wallet_stats(app, at)
+    with app.app_context():
+        assert db.session.query(Wallet).filter(Wallet.successful_calls > 0).count() > 0
+    
+    # العدادات الصحيحة متطابقة فلا تكتب إعادة البناء أي صف
+    with app.app_context():
+        assert rebuild_wallet_stats()['wallets_updated'] == 0
+    assert wallet_stats(app, at) == incremental
+    
+    # إجبار إعادة حساب العدادات المتناقصة: إعادة البناء تزن النجاح بوقت الإشارة
+    # والمسار التزايدي بوقت التقييم (بعد ثوانٍ هنا)، فالفرق أصغر بكثير من التسامح
+    with app.app_context():
+        db.session.query(Wallet).update({Wallet.decay_updated_ts: None})
+        db.session.commit()
+        assert rebuild_wallet_stats()['wallets_updated'] == len(incremental)
+    rebuilt = wallet_stats(app, at)
+    
+    assert rebuilt.keys() == incremental.keys()
+    for unique_id, (total, successes, rate, decayed_calls, decayed_successes) in incremental.items():
+        assert rebuilt[unique_id][:3] == (total, successes, rate), unique_id
+        assert rebuilt[unique_id][3] == pytest.approx(decayed_calls, rel=1e-6, abs=1e-9), unique_id
+        assert rebuilt[unique_id][4] == pytest.approx(decayed_successes, rel=1e-6, abs=1e-9), unique_id
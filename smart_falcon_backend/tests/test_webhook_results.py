@@ -0,0 +1,51 @@
+"""
+نتيجة معالجة رسائل webhook: المحفوظ في processing_result يطابق ما يُعاد للمرسل
+"""
+import json
+
+from src.models.smart_falcon import TelegramMessage
+
+def post_until_recommendation(client, generator, attempts=50):
+    """
+    إرسال رسائل KOL Track حتى يصدر قرار شراء (يُرسل عنده إشعار التوصية)
+    """
+    for _ in range(attempts):
+        message, _token = generator.kol_track()
+        body = client.post('/webhook/telegram', json=message.payload()).get_json()
+        if body['processing_result'].get('decision') in ('BUY', 'STRONG_BUY'):
+            return message, body
+    raise AssertionError('لم يصدر قرار شراء من الرسائل المولدة')
+
+def stored_result(app, message_id):
+    with app.app_context():
+        row = TelegramMessage.query.filter_by(message_id=message_id).one()
+        return json.loads(row.processing_result)
+
+def test_recommendation_fields_are_stored(app, client, make_generator):
+    _message, body = post_until_recommendation(client, make_generator(5, golden_rate=0.5))
+    result = body['processing_result']
+    # بدون TELEGRAM_BOT_TOKEN يفشل الإرسال لكن تُسجَّل نتيجته ونص التوصية
+    assert result['recommendation_sent'] is False
+    assert result['message']
+    assert stored_result(app, body['message_id']) == result
+
+def row_counts(app):
+    from src.models.smart_falcon import Signal, SignalWalletLink
+    with app.app_context():
+        return tuple(model.query.count() for model in (TelegramMessage, Signal, SignalWalletLink))
+
+def test_duplicate_retry_returns_original_body(app, client, make_generator):
+    from src.routes.smart_falcon import recent_messages
+    
+    message, first = post_until_recommendation(client, make_generator(9, golden_rate=0.5))
+    counts = row_counts(app)
+    
+    # إعادة الإرسال تُخدم من recent_messages، ثم من قاعدة البيانات (عامل آخر أو بعد انتهاء الذاكرة)
+    cached = client.post('/webhook/telegram', json=message.payload()).get_json()
+    recent_messages.clear()
+    stored = client.post('/webhook/telegram', json=message.payload()).get_json()
+    batch = client.post('/webhook/telegram/batch', json={'messages': [message.payload()]}).get_json()
+    
+    for retry in (cached, stored, batch['results'][0]):
+        assert retry == {**first, 'duplicate': True}
+    assert row_counts(app) == counts
@@ -34,11 +34,20 @@ function App() {
 
   useEffect(() => {
     fetchDashboardData()
+
+    // تحديث مباشر عند وصول إشارة أو تقييم جديد بدلاً من الاستطلاع
+    const events = new EventSource(`${API_BASE}/api/stream?types=signal,evaluation`)
+    const refresh = () => fetchDashboardData({ silent: true })
+    events.addEventListener('signal', refresh)
+    events.addEventListener('evaluation', refresh)
+    events.addEventListener('lagged', refresh)
+
+    return () => events.close()
   }, [])
 
-  const fetchDashboardData = async () => {
+  const fetchDashboardData = async ({ silent = false } = {}) => {
     try {
-      setLoading(true)
+      if (!silent) setLoading(true)
       const response = await fetch(`${API_BASE}/api/dashboard/stats`)
       if (!response.ok) throw new Error('فشل في جلب البيانات')
       
@@ -49,7 +58,7 @@ function App() {
     } catch (err) {
       setError(err.message)
     } finally {
-      setLoading(false)
+      if (!silent) setLoading(false)
     }
   }
 